@@ -0,0 +1,111 @@
+import argparse
+import glob
+import json
+import os
+import time
+
+from jiwer import wer
+from transformers.models.whisper.english_normalizer import EnglishTextNormalizer
+
+from faster_whisper import CascadePipeline, WhisperModel, decode_audio
+
+parser = argparse.ArgumentParser(description="Cascade benchmark")
+parser.add_argument(
+    "--data_dir",
+    type=str,
+    required=True,
+    help="Directory containing audio files, each with a reference transcript in a .txt "
+    "file of the same name.",
+)
+parser.add_argument("--model", type=str, default="large-v3", help="Main model.")
+parser.add_argument("--draft_model", type=str, default="tiny", help="Draft model.")
+parser.add_argument("--device", type=str, default="cuda", help="Device to use.")
+parser.add_argument(
+    "--log_prob_threshold",
+    type=float,
+    default=-0.5,
+    help="Escalate the windows with a lower average log probability.",
+)
+parser.add_argument(
+    "--compression_ratio_threshold",
+    type=float,
+    default=2.0,
+    help="Escalate the windows with a higher compression ratio.",
+)
+parser.add_argument(
+    "--no_speech_threshold",
+    type=float,
+    default=0.5,
+    help="Escalate the windows with a higher no speech probability.",
+)
+args = parser.parse_args()
+
+with open(os.path.join(os.path.dirname(__file__), "normalizer.json"), "r") as f:
+    normalizer = EnglishTextNormalizer(json.load(f))
+
+
+def run(pipeline, audios):
+    transcriptions = []
+    windows = []
+    start = time.perf_counter()
+    for audio in audios:
+        segments, info = pipeline.transcribe(audio, language="en")
+        transcriptions.append("".join(segment.text for segment in segments))
+        windows.extend(info.windows)
+    return transcriptions, windows, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    paths = sorted(
+        path
+        for path in glob.glob(os.path.join(args.data_dir, "*"))
+        if not path.endswith(".txt")
+        and os.path.exists(os.path.splitext(path)[0] + ".txt")
+    )
+    audios = [decode_audio(path) for path in paths]
+    references = []
+    for path in paths:
+        with open(os.path.splitext(path)[0] + ".txt", "r") as f:
+            references.append(normalizer(f.read()))
+
+    model = WhisperModel(args.model, device=args.device)
+    draft_model = WhisperModel(args.draft_model, device=args.device)
+    cascade = CascadePipeline(
+        model,
+        draft_model,
+        log_prob_threshold=args.log_prob_threshold,
+        compression_ratio_threshold=args.compression_ratio_threshold,
+        no_speech_threshold=args.no_speech_threshold,
+    )
+
+    # warmup
+    run(draft_model, audios[:1])
+    run(model, audios[:1])
+
+    results = {}
+    for name, pipeline in (
+        (args.draft_model, draft_model),
+        (args.model, model),
+        ("%s -> %s" % (args.draft_model, args.model), cascade),
+    ):
+        transcriptions, windows, runtime = run(pipeline, audios)
+        transcriptions = [normalizer(transcription) for transcription in transcriptions]
+        results[name] = (
+            100 * wer(hypothesis=transcriptions, reference=references),
+            runtime,
+            windows,
+        )
+
+    main_runtime = results[args.model][1]
+    print("%-24s %8s %10s %10s" % ("pipeline", "WER", "runtime", "saved"))
+    for name, (word_error_rate, runtime, _) in results.items():
+        print(
+            "%-24s %7.2f%% %9.2fs %9.1f%%"
+            % (name, word_error_rate, runtime, 100 * (1 - runtime / main_runtime))
+        )
+
+    windows = list(results.values())[-1][2]
+    print(
+        "%d/%d windows escalated to %s"
+        % (sum(window.escalated for window in windows), len(windows), args.model)
+    )
@@ -0,0 +1,104 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from faster_whisper import WhisperModel, decode_audio
+
+parser = argparse.ArgumentParser(description="Dynamic batching benchmark")
+parser.add_argument(
+    "--audio", type=str, required=True, help="Audio file to transcribe."
+)
+parser.add_argument("--model", type=str, default="large-v3", help="Model to benchmark.")
+parser.add_argument("--device", type=str, default="cuda", help="Device to use.")
+parser.add_argument(
+    "--concurrency",
+    type=int,
+    nargs="+",
+    default=[1, 4, 8],
+    help="Numbers of clients transcribing concurrently.",
+)
+parser.add_argument(
+    "--requests",
+    type=int,
+    default=4,
+    help="Number of transcriptions sent by each client.",
+)
+parser.add_argument(
+    "--max_batch_size",
+    type=int,
+    default=8,
+    help="Maximum batch size of the scheduler.",
+)
+parser.add_argument(
+    "--max_wait",
+    type=float,
+    default=0.005,
+    help="Maximum time in seconds a window waits to be batched.",
+)
+args = parser.parse_args()
+
+
+def client(model, audio, latencies):
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        segments, _ = model.transcribe(audio, language="en")
+        for _ in segments:
+            pass
+        latencies.append(time.perf_counter() - start)
+
+
+def run(model, audio, concurrency):
+    latencies = []
+    threads = [
+        threading.Thread(target=client, args=(model, audio, latencies))
+        for _ in range(concurrency)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return len(latencies) / elapsed, np.percentile(latencies, [50, 90, 99])
+
+
+if __name__ == "__main__":
+    audio = decode_audio(args.audio)
+    duration = audio.shape[0] / 16000
+
+    models = {
+        "unbatched": WhisperModel(args.model, device=args.device),
+        "dynamic batching": WhisperModel(
+            args.model,
+            device=args.device,
+            dynamic_batch_size=args.max_batch_size,
+            dynamic_batch_max_wait=args.max_wait,
+        ),
+    }
+
+    print(
+        "%-17s %11s %10s %14s %8s %8s %8s"
+        % ("mode", "concurrency", "requests/s", "audio s/s", "p50", "p90", "p99")
+    )
+    for name, model in models.items():
+        # warmup
+        run(model, audio, 1)
+
+        for concurrency in args.concurrency:
+            throughput, (p50, p90, p99) = run(model, audio, concurrency)
+            print(
+                "%-17s %11d %10.2f %14.1f %7.2fs %7.2fs %7.2fs"
+                % (
+                    name,
+                    concurrency,
+                    throughput,
+                    throughput * duration,
+                    p50,
+                    p90,
+                    p99,
+                )
+            )
@@ -0,0 +1,93 @@
+import argparse
+import glob
+import os
+import time
+
+from faster_whisper import WhisperModel, decode_audio
+
+parser = argparse.ArgumentParser(description="Language identification benchmark")
+parser.add_argument(
+    "--data_dir",
+    type=str,
+    default=os.path.join(os.path.dirname(__file__), "..", "tests", "data"),
+    help="Directory containing the audio files to identify.",
+)
+parser.add_argument("--model", type=str, default="large-v3", help="Main model.")
+parser.add_argument(
+    "--language_detection_model",
+    type=str,
+    default="tiny",
+    help="Auxiliary model identifying the language.",
+)
+parser.add_argument("--device", type=str, default="cuda", help="Device to use.")
+parser.add_argument(
+    "--language_detection_threshold",
+    type=float,
+    default=0.5,
+    help="Probability below which the main model is used.",
+)
+parser.add_argument(
+    "--repeat",
+    type=int,
+    default=3,
+    help="Times an experiment will be run.",
+)
+args = parser.parse_args()
+
+
+def detect(model, audios, language_detection_model=None):
+    return [
+        model.detect_language(
+            audio,
+            language_detection_threshold=args.language_detection_threshold,
+            language_detection_model=language_detection_model,
+        )[:2]
+        for audio in audios
+    ]
+
+
+if __name__ == "__main__":
+    paths = sorted(glob.glob(os.path.join(args.data_dir, "*")))
+    audios = [decode_audio(path) for path in paths]
+
+    model = WhisperModel(args.model, device=args.device)
+    language_detection_model = WhisperModel(
+        args.language_detection_model, device=args.device
+    )
+
+    # warmup
+    reference = detect(model, audios)
+    auxiliary = detect(language_detection_model, audios)
+
+    for name, kwargs in (
+        (args.model, {}),
+        (
+            "%s -> %s" % (args.language_detection_model, args.model),
+            {"language_detection_model": language_detection_model},
+        ),
+    ):
+        runtimes = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = detect(model, audios, **kwargs)
+            runtimes.append(time.perf_counter() - start)
+
+        agreement = sum(
+            language == reference_language
+            for (language, _), (reference_language, _) in zip(results, reference)
+        )
+        print(
+            "%-24s %.2f files/s, %d/%d languages agree with %s"
+            % (
+                name,
+                len(audios) / min(runtimes),
+                agreement,
+                len(audios),
+                args.model,
+            )
+        )
+
+    escalations = sum(
+        probability <= args.language_detection_threshold for _, probability in auxiliary
+    )
+    print("%d/%d files escalated to %s" % (escalations, len(audios), args.model))
@@ -0,0 +1,97 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from faster_whisper import WhisperModel, decode_audio
+
+parser = argparse.ArgumentParser(description="Speech-rate token cap benchmark")
+parser.add_argument(
+    "--audio",
+    type=str,
+    default=os.path.join(os.path.dirname(__file__), "..", "tests", "data", "jfk.flac"),
+    help="Audio file the looping clips are cut from.",
+)
+parser.add_argument("--model", type=str, default="large-v3", help="Model to benchmark.")
+parser.add_argument("--device", type=str, default="cuda", help="Device to use.")
+parser.add_argument(
+    "--max_new_tokens_per_second",
+    type=float,
+    default=8.0,
+    help="Token rate of the cap.",
+)
+parser.add_argument(
+    "--num_clips",
+    type=int,
+    default=20,
+    help="Number of synthetic 30-second clips.",
+)
+args = parser.parse_args()
+
+sampling_rate = 16000
+
+
+def make_looping_clips(audio):
+    # A short snippet repeated over a window, or a single word followed by a long silence,
+    # are typical triggers of repetition loops.
+    rng = np.random.default_rng(0)
+    clips = []
+    for i in range(args.num_clips):
+        snippet_duration = rng.uniform(0.5, 2.0)
+        start = rng.integers(0, audio.shape[0] - int(snippet_duration * sampling_rate))
+        snippet = audio[start : start + int(snippet_duration * sampling_rate)]
+        if i % 2 == 0:
+            gap = np.zeros(int(0.1 * sampling_rate), dtype=audio.dtype)
+            clip = np.tile(np.concatenate([snippet, gap]), 30)
+        else:
+            clip = snippet
+        clip = np.pad(
+            clip[: 30 * sampling_rate], (0, max(0, 30 * sampling_rate - clip.size))
+        )
+        clips.append(clip.astype(np.float32))
+    return clips
+
+
+def run(model, clips, **kwargs):
+    latencies = []
+    num_tokens = 0
+    capped_decodings = 0
+    for clip in clips:
+        start = time.perf_counter()
+        segments, info = model.transcribe(clip, language="en", **kwargs)
+        num_tokens += sum(len(segment.tokens) for segment in segments)
+        latencies.append(time.perf_counter() - start)
+        capped_decodings += sum(window.capped_decodings for window in info.windows)
+    return np.array(latencies), num_tokens, capped_decodings
+
+
+if __name__ == "__main__":
+    clips = make_looping_clips(decode_audio(args.audio))
+    model = WhisperModel(args.model, device=args.device)
+
+    # warmup
+    run(model, clips[:1])
+
+    print(
+        "%-22s %8s %8s %8s %8s %8s" % ("mode", "mean", "p99", "max", "tokens", "capped")
+    )
+    for name, kwargs in (
+        ("no cap", {}),
+        (
+            "%.1f tokens/s" % args.max_new_tokens_per_second,
+            {"max_new_tokens_per_second": args.max_new_tokens_per_second},
+        ),
+    ):
+        latencies, num_tokens, capped_decodings = run(model, clips, **kwargs)
+        print(
+            "%-22s %7.2fs %7.2fs %7.2fs %8d %8d"
+            % (
+                name,
+                latencies.mean(),
+                np.percentile(latencies, 99),
+                latencies.max(),
+                num_tokens,
+                capped_decodings,
+            )
+        )
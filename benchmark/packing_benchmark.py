@@ -0,0 +1,86 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from jiwer import wer
+
+from faster_whisper import BatchedInferencePipeline, WhisperModel, decode_audio
+
+parser = argparse.ArgumentParser(description="Short clip packing benchmark")
+parser.add_argument(
+    "--audio",
+    type=str,
+    default=os.path.join(
+        os.path.dirname(__file__), "..", "tests", "data", "multilingual.mp3"
+    ),
+    help="Audio file the short clips are cut from.",
+)
+parser.add_argument("--model", type=str, default="large-v3", help="Model to benchmark.")
+parser.add_argument("--device", type=str, default="cuda", help="Device to use.")
+parser.add_argument("--num_clips", type=int, default=256, help="Number of clips.")
+parser.add_argument("--batch_size", type=int, default=8, help="Batch size.")
+parser.add_argument(
+    "--separator_duration",
+    type=float,
+    default=1.0,
+    help="Duration in seconds of the silence between two packed clips.",
+)
+args = parser.parse_args()
+
+sampling_rate = 16000
+
+
+def make_clips(audio):
+    rng = np.random.default_rng(0)
+    clips = []
+    for _ in range(args.num_clips):
+        size = int(rng.uniform(1.0, 3.0) * sampling_rate)
+        start = rng.integers(0, audio.shape[0] - size)
+        clips.append(audio[start : start + size])
+    return clips
+
+
+def run(pipeline, clips, **kwargs):
+    start = time.perf_counter()
+    results = pipeline.transcribe_clips(
+        clips,
+        separator_duration=args.separator_duration,
+        batch_size=args.batch_size,
+        language="en",
+        **kwargs,
+    )
+    elapsed = time.perf_counter() - start
+    transcriptions = [
+        "".join(segment.text for segment in segments) for segments in results
+    ]
+    return transcriptions, elapsed
+
+
+if __name__ == "__main__":
+    clips = make_clips(decode_audio(args.audio))
+    model = WhisperModel(args.model, device=args.device)
+    pipeline = BatchedInferencePipeline(model)
+
+    # warmup
+    run(pipeline, clips[: args.batch_size])
+
+    unpacked, unpacked_time = run(pipeline, clips, max_clips_per_window=1)
+    packed, packed_time = run(pipeline, clips)
+
+    # Empty transcripts are not supported by the WER.
+    pairs = [(ref, hyp) for ref, hyp in zip(unpacked, packed) if ref.strip()]
+    print("%-10s %10s" % ("mode", "clips/s"))
+    print("%-10s %10.2f" % ("unpacked", len(clips) / unpacked_time))
+    print("%-10s %10.2f" % ("packed", len(clips) / packed_time))
+    print(
+        "WER of the packed transcripts against the unpacked ones: %.2f%%"
+        % (
+            100
+            * wer(
+                reference=[ref for ref, _ in pairs],
+                hypothesis=[hyp for _, hyp in pairs],
+            )
+        )
+    )
@@ -0,0 +1,82 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from faster_whisper import BatchedInferencePipeline, WhisperModel, decode_audio
+
+parser = argparse.ArgumentParser(description="Batch prefetching benchmark")
+parser.add_argument(
+    "--audio",
+    type=str,
+    default=os.path.join(os.path.dirname(__file__), "..", "tests", "data", "jfk.flac"),
+    help="Audio file repeated to make a long input.",
+)
+parser.add_argument("--model", type=str, default="tiny", help="Model to benchmark.")
+parser.add_argument("--device", type=str, default="cpu", help="Device to use.")
+parser.add_argument("--batch_size", type=int, default=8, help="Batch size.")
+parser.add_argument(
+    "--repeats",
+    type=int,
+    default=40,
+    help="Number of times the audio is repeated, separated by one second of silence.",
+)
+parser.add_argument(
+    "--prefetch_batches",
+    type=int,
+    default=1,
+    help="Number of batches decoded ahead of the batch being yielded.",
+)
+parser.add_argument(
+    "--word_timestamps",
+    action="store_true",
+    help="Add the word timestamps, which are computed outside the background thread.",
+)
+args = parser.parse_args()
+
+sampling_rate = 16000
+
+
+def run(pipeline, audio, prefetch_batches):
+    start = time.perf_counter()
+    segments, info = pipeline.transcribe(
+        audio,
+        language="en",
+        batch_size=args.batch_size,
+        word_timestamps=args.word_timestamps,
+        prefetch_batches=prefetch_batches,
+    )
+    transcription = "".join(segment.text for segment in segments)
+    return transcription, len(info.windows), time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    audio = decode_audio(args.audio)
+    silence = np.zeros(sampling_rate, dtype=audio.dtype)
+    audio = np.concatenate([np.concatenate([audio, silence])] * args.repeats)
+
+    model = WhisperModel(args.model, device=args.device)
+    pipeline = BatchedInferencePipeline(model)
+
+    # warmup
+    run(pipeline, audio[: 60 * sampling_rate], 0)
+
+    print("%-10s %10s %10s %10s" % ("prefetch", "chunks/s", "runtime", "speedup"))
+    baseline_runtime = None
+    reference = None
+    for prefetch_batches in (0, args.prefetch_batches):
+        transcription, num_chunks, runtime = run(pipeline, audio, prefetch_batches)
+        if baseline_runtime is None:
+            baseline_runtime = runtime
+            reference = transcription
+        print(
+            "%-10d %10.2f %9.2fs %9.2fx"
+            % (
+                prefetch_batches,
+                num_chunks / runtime,
+                runtime,
+                baseline_runtime / runtime,
+            )
+        )
+    print("Same transcription: %s" % (transcription == reference))
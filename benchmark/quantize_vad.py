@@ -0,0 +1,31 @@
+"""Generates the int8 Silero VAD model from the bundled fp32 model.
+
+Only the LSTM weights are quantized: quantizing the convolutions (including the STFT basis)
+degrades the speech probabilities too much and the ONNX Runtime ConvInteger kernels are
+slower than the fp32 convolutions on CPU.
+"""
+
+import argparse
+import os
+
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+from faster_whisper.utils import get_assets_path
+
+parser = argparse.ArgumentParser(description="Silero VAD quantization")
+parser.add_argument(
+    "--output",
+    type=str,
+    default=os.path.join(get_assets_path(), "silero_vad_v6_int8.onnx"),
+    help="Path of the quantized model.",
+)
+args = parser.parse_args()
+
+if __name__ == "__main__":
+    quantize_dynamic(
+        os.path.join(get_assets_path(), "silero_vad_v6.onnx"),
+        args.output,
+        op_types_to_quantize=["LSTM"],
+        weight_type=QuantType.QInt8,
+    )
+    print("Quantized model saved to %s" % args.output)
@@ -0,0 +1,70 @@
+import argparse
+import time
+
+from faster_whisper import WhisperModel, decode_audio
+
+parser = argparse.ArgumentParser(description="Speculative encoding benchmark")
+parser.add_argument(
+    "--audio", type=str, required=True, help="Audio file to transcribe."
+)
+parser.add_argument("--model", type=str, default="large-v3", help="Model to benchmark.")
+parser.add_argument("--device", type=str, default="cuda", help="Device to use.")
+parser.add_argument(
+    "--num_workers",
+    type=int,
+    default=2,
+    help="Number of model workers, the encoding can only overlap with at least 2.",
+)
+parser.add_argument(
+    "--without_timestamps",
+    action="store_true",
+    help="Only sample text tokens, which makes the next window fully predictable.",
+)
+parser.add_argument(
+    "--repeat",
+    type=int,
+    default=3,
+    help="Times an experiment will be run.",
+)
+args = parser.parse_args()
+
+
+def transcribe(model, audio, speculative_encoding):
+    segments, info = model.transcribe(
+        audio,
+        language="en",
+        condition_on_previous_text=False,
+        without_timestamps=args.without_timestamps,
+        speculative_encoding=speculative_encoding,
+    )
+    for _ in segments:
+        pass
+    return info
+
+
+if __name__ == "__main__":
+    model = WhisperModel(args.model, device=args.device, num_workers=args.num_workers)
+    audio = decode_audio(args.audio)
+
+    # warmup
+    transcribe(model, audio, speculative_encoding=False)
+
+    results = {}
+    for speculative_encoding in (False, True):
+        runtimes = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            info = transcribe(model, audio, speculative_encoding)
+            runtimes.append(time.perf_counter() - start)
+        results[speculative_encoding] = min(runtimes)
+
+        if speculative_encoding:
+            hits = sum(window.encoder_prefetched for window in info.windows)
+            print(
+                "Speculative encoding hit rate: %d/%d windows"
+                % (hits, max(len(info.windows) - 1, 0))
+            )
+
+    print("Min execution time without speculative encoding: %.3fs" % results[False])
+    print("Min execution time with speculative encoding: %.3fs" % results[True])
+    print("Speedup: %.2fx" % (results[False] / results[True]))
@@ -0,0 +1,88 @@
+import argparse
+import glob
+import json
+import os
+import time
+
+from jiwer import wer
+from transformers.models.whisper.english_normalizer import EnglishTextNormalizer
+
+from faster_whisper import WhisperModel, decode_audio
+
+parser = argparse.ArgumentParser(description="Time scale benchmark")
+parser.add_argument(
+    "--data_dir",
+    type=str,
+    required=True,
+    help="Directory containing audio files, each with a reference transcript in a .txt "
+    "file of the same name.",
+)
+parser.add_argument("--model", type=str, default="large-v3", help="Model to benchmark.")
+parser.add_argument("--device", type=str, default="cuda", help="Device to use.")
+parser.add_argument(
+    "--time_scales",
+    type=float,
+    nargs="+",
+    default=[1.0, 1.25, 1.5],
+    help="Speed factors to compare.",
+)
+parser.add_argument(
+    "--vad_filter", action="store_true", help="Remove the audio without speech."
+)
+args = parser.parse_args()
+
+with open(os.path.join(os.path.dirname(__file__), "normalizer.json"), "r") as f:
+    normalizer = EnglishTextNormalizer(json.load(f))
+
+
+def run(model, audios, time_scale):
+    transcriptions = []
+    num_windows = 0
+    start = time.perf_counter()
+    for audio in audios:
+        segments, info = model.transcribe(
+            audio, language="en", vad_filter=args.vad_filter, time_scale=time_scale
+        )
+        transcriptions.append("".join(segment.text for segment in segments))
+        num_windows += len(info.windows)
+    return transcriptions, num_windows, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    paths = sorted(
+        path
+        for path in glob.glob(os.path.join(args.data_dir, "*"))
+        if not path.endswith(".txt")
+        and os.path.exists(os.path.splitext(path)[0] + ".txt")
+    )
+    audios = [decode_audio(path) for path in paths]
+    references = []
+    for path in paths:
+        with open(os.path.splitext(path)[0] + ".txt", "r") as f:
+            references.append(normalizer(f.read()))
+
+    model = WhisperModel(args.model, device=args.device)
+
+    # warmup
+    run(model, audios[:1], 1.0)
+
+    print(
+        "%-10s %8s %8s %10s %8s"
+        % ("time_scale", "WER", "windows", "runtime", "speedup")
+    )
+    baseline_runtime = None
+    for time_scale in args.time_scales:
+        transcriptions, num_windows, runtime = run(model, audios, time_scale)
+        transcriptions = [normalizer(transcription) for transcription in transcriptions]
+        if baseline_runtime is None:
+            baseline_runtime = runtime
+        print(
+            "%-10.2f %7.2f%% %8d %9.2fs %7.2fx"
+            % (
+                time_scale,
+                100 * wer(hypothesis=transcriptions, reference=references),
+                num_windows,
+                runtime,
+                baseline_runtime / runtime,
+            )
+        )
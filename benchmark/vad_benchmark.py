@@ -0,0 +1,83 @@
+import argparse
+import glob
+import os
+import timeit
+
+import numpy as np
+
+from faster_whisper import decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+parser = argparse.ArgumentParser(description="VAD variants benchmark")
+parser.add_argument(
+    "--data_dir",
+    type=str,
+    default=os.path.join(os.path.dirname(__file__), "..", "tests", "data"),
+    help="Directory containing the audio files to benchmark.",
+)
+parser.add_argument(
+    "--repeat",
+    type=int,
+    default=3,
+    help="Times an experiment will be run.",
+)
+args = parser.parse_args()
+
+variants = {
+    "fp32": VadOptions(),
+    "int8": VadOptions(quantized=True),
+    "fp32, stride 2": VadOptions(window_stride=2),
+    "int8, stride 2": VadOptions(quantized=True, window_stride=2),
+}
+
+
+def get_speech_mask(speech_timestamps, num_samples):
+    mask = np.zeros(num_samples, dtype=bool)
+    for chunk in speech_timestamps:
+        mask[chunk["start"] : chunk["end"]] = True
+    return mask
+
+
+def get_agreement(reference, hypothesis):
+    # Intersection over union of the speech samples.
+    union = np.logical_or(reference, hypothesis).sum()
+    if union == 0:
+        return 1.0
+    return np.logical_and(reference, hypothesis).sum() / union
+
+
+if __name__ == "__main__":
+    paths = sorted(glob.glob(os.path.join(args.data_dir, "*")))
+    audios = [decode_audio(path) for path in paths]
+    total_duration = sum(audio.shape[0] for audio in audios) / 16000
+
+    references = [
+        get_speech_mask(get_speech_timestamps(audio, variants["fp32"]), len(audio))
+        for audio in audios
+    ]
+
+    for name, vad_options in variants.items():
+        # warmup and model loading
+        speech_timestamps = [
+            get_speech_timestamps(audio, vad_options) for audio in audios
+        ]
+        runtimes = timeit.repeat(
+            lambda: [get_speech_timestamps(audio, vad_options) for audio in audios],
+            repeat=args.repeat,
+            number=1,
+        )
+        agreements = [
+            get_agreement(reference, get_speech_mask(timestamps, len(audio)))
+            for reference, timestamps, audio in zip(
+                references, speech_timestamps, audios
+            )
+        ]
+        print(
+            "%-16s speed: %7.1fx real time, speech agreement (IoU): %.3f (min %.3f)"
+            % (
+                name,
+                total_duration / min(runtimes),
+                np.mean(agreements),
+                np.min(agreements),
+            )
+        )
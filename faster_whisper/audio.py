@@ -121,3 +121,64 @@ def pad_or_trim(array, length: int = 3000, *, axis: int = -1):
         array = np.pad(array, pad_widths)
 
     return array
+
+
+def time_stretch(
+    audio: np.ndarray, rate: float, sampling_rate: int = 16000
+) -> np.ndarray:
+    """Changes the speed of the audio without changing its pitch.
+
+    The waveform similarity overlap-add (WSOLA) method is used: the output is built from
+    overlapping input frames taken every `rate` times the output hop, and each frame is
+    shifted within a small tolerance to best continue the previous frame.
+
+    Args:
+      audio: A float32 Numpy array.
+      rate: Speed factor, e.g. 1.25 makes the audio 25% shorter.
+      sampling_rate: Sample rate of the audio.
+
+    Returns:
+      A float32 Numpy array of about len(audio) / rate samples.
+    """
+    if rate <= 0:
+        raise ValueError("The time stretch rate must be positive, got %s" % rate)
+    if rate == 1 or audio.shape[0] == 0:
+        return audio
+
+    frame_length = int(0.03 * sampling_rate)
+    hop_length = frame_length // 2
+    tolerance = hop_length // 2
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame_length) / frame_length)
+
+    output_length = int(round(audio.shape[0] / rate))
+    num_frames = output_length // hop_length + 1
+    padded = np.pad(
+        audio.astype(np.float32),
+        (tolerance, 2 * (frame_length + tolerance) + int(np.ceil(hop_length * rate))),
+    )
+
+    output = np.zeros(num_frames * hop_length + frame_length, dtype=np.float32)
+    norm = np.zeros_like(output)
+    position = tolerance
+
+    for i in range(num_frames):
+        nominal = tolerance + int(round(i * hop_length * rate))
+        if i > 0:
+            # Pick the frame around the nominal position that is the most similar to the
+            # natural continuation of the previous frame.
+            natural = padded[
+                position + hop_length : position + hop_length + frame_length
+            ]
+            region = padded[nominal - tolerance : nominal + tolerance + frame_length]
+            correlation = np.correlate(region, natural, mode="valid")
+            position = nominal - tolerance + int(np.argmax(correlation))
+        else:
+            position = nominal
+
+        start = i * hop_length
+        output[start : start + frame_length] += (
+            padded[position : position + frame_length] * window
+        )
+        norm[start : start + frame_length] += window
+
+    return output[:output_length] / np.maximum(norm[:output_length], 1e-8)
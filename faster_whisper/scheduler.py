@@ -0,0 +1,225 @@
+import threading
+import time
+
+from typing import List, Optional
+
+import ctranslate2
+import numpy as np
+
+
+class _Request:
+    def __init__(self, kind: str, key: tuple, inputs: np.ndarray, prompts, kwargs):
+        self.kind = kind
+        self.key = key
+        self.inputs = inputs
+        self.prompts = prompts
+        self.kwargs = kwargs
+        self.arrival = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    @property
+    def num_rows(self) -> int:
+        return self.inputs.shape[0]
+
+
+class BatchScheduler:
+    """Batches the encode and generate calls of concurrent transcriptions.
+
+    The calls made by the threads running WhisperModel.transcribe() are queued and block
+    until a worker of the scheduler ran them. A worker takes the oldest pending call, waits
+    at most max_wait seconds for other calls of the same kind and with the same generation
+    options, and runs them as a single batch on the model. Each call keeps its own prompts,
+    so the transcriptions are still conditioned on their own previous text. Since
+    CTranslate2 requires the <|startoftranscript|> token at the same position in all the
+    prompts of a batch, only the calls whose prompts have the same number of previous text
+    tokens are batched together.
+    """
+
+    def __init__(
+        self,
+        model: ctranslate2.models.Whisper,
+        sot_token_id: int,
+        max_batch_size: int = 8,
+        max_wait: float = 0.005,
+        num_workers: Optional[int] = None,
+    ):
+        """Initializes the scheduler.
+
+        Args:
+          model: The CTranslate2 Whisper model.
+          sot_token_id: Id of the <|startoftranscript|> token.
+          max_batch_size: Maximum number of windows encoded or decoded in a single call.
+          max_wait: Maximum time in seconds a call waits for other calls to fill its batch.
+          num_workers: Number of batches that can run concurrently. Defaults to the number of
+            workers of the model.
+        """
+        self.model = model
+        self.sot_token_id = sot_token_id
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: List[_Request] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._run, daemon=True)
+            for _ in range(num_workers or model.num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def encode(self, features: np.ndarray) -> ctranslate2.StorageView:
+        """Encodes a batch of Mel features, see ctranslate2.models.Whisper.encode."""
+        if features.ndim == 2:
+            features = np.expand_dims(features, 0)
+        return self._submit("encode", (), features, None, {})
+
+    def generate(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        prompts: List[List[int]],
+        **kwargs,
+    ) -> List[ctranslate2.models.WhisperGenerationResult]:
+        """Decodes a batch of encoder outputs, see ctranslate2.models.Whisper.generate."""
+        key = tuple(
+            sorted(
+                (name, tuple(value) if isinstance(value, list) else value)
+                for name, value in kwargs.items()
+            )
+        )
+        key += (tuple(sorted({prompt.index(self.sot_token_id) for prompt in prompts})),)
+        return self._submit(
+            "generate", key, get_numpy_array(encoder_output), prompts, kwargs
+        )
+
+    def close(self) -> None:
+        """Stops the workers once the pending calls are processed."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _submit(self, kind: str, key: tuple, inputs: np.ndarray, prompts, kwargs):
+        request = _Request(kind, key, inputs, prompts, kwargs)
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The batch scheduler is closed")
+            self._pending.append(request)
+            self._condition.notify_all()
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _next_batch(self) -> List[_Request]:
+        with self._condition:
+            while True:
+                if not self._pending:
+                    if self._closed:
+                        return []
+                    self._condition.wait()
+                    continue
+
+                first = self._pending[0]
+                candidates = [
+                    request
+                    for request in self._pending
+                    if request.kind == first.kind and request.key == first.key
+                ]
+                num_rows = sum(request.num_rows for request in candidates)
+                remaining = first.arrival + self.max_wait - time.monotonic()
+                if num_rows >= self.max_batch_size or remaining <= 0 or self._closed:
+                    break
+                self._condition.wait(remaining)
+
+            batch = []
+            num_rows = 0
+            for request in candidates:
+                if batch and num_rows + request.num_rows > self.max_batch_size:
+                    break
+                batch.append(request)
+                num_rows += request.num_rows
+
+            for request in batch:
+                self._pending.remove(request)
+
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                break
+
+            try:
+                if batch[0].kind == "encode":
+                    results = self._run_encode(batch)
+                else:
+                    results = self._run_generate(batch)
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+                    request.done.set()
+                continue
+
+            for request, result in zip(batch, results):
+                request.result = result
+                request.done.set()
+
+    def _run_encode(self, batch: List[_Request]) -> List[ctranslate2.StorageView]:
+        features = np.concatenate([request.inputs for request in batch])
+        features = ctranslate2.StorageView.from_array(np.ascontiguousarray(features))
+        encoder_output = get_numpy_array(self.model.encode(features, to_cpu=True))
+
+        results = []
+        offset = 0
+        for request in batch:
+            rows = np.array(encoder_output[offset : offset + request.num_rows])
+            results.append(ctranslate2.StorageView.from_array(rows))
+            offset += request.num_rows
+        return results
+
+    def _run_generate(self, batch: List[_Request]) -> List[list]:
+        encoder_output = np.concatenate([request.inputs for request in batch])
+        encoder_output = ctranslate2.StorageView.from_array(
+            np.ascontiguousarray(encoder_output)
+        )
+        prompts = [prompt for request in batch for prompt in request.prompts]
+        outputs = self.model.generate(encoder_output, prompts, **batch[0].kwargs)
+
+        results = []
+        offset = 0
+        for request in batch:
+            results.append(outputs[offset : offset + request.num_rows])
+            offset += request.num_rows
+        return results
+
+
+def get_numpy_array(storage: ctranslate2.StorageView) -> np.ndarray:
+    if storage.device != "cpu":
+        storage = storage.to_device(ctranslate2.Device.cpu)
+    return np.asarray(storage)
+
+
+def select_rows(
+    storage: ctranslate2.StorageView, rows: List[int]
+) -> ctranslate2.StorageView:
+    """Returns the given rows of the storage on its device.
+
+    The rows of a GPU storage are gathered on the GPU with torch when it is installed,
+    otherwise the storage is copied to the CPU.
+    """
+    if storage.device != "cpu":
+        try:
+            import torch
+        except ImportError:
+            pass
+        else:
+            tensor = torch.as_tensor(storage)
+            index = torch.tensor(rows, device=tensor.device)
+            return ctranslate2.StorageView.from_array(tensor[index].contiguous())
+
+    array = get_numpy_array(storage)[rows]
+    return ctranslate2.StorageView.from_array(np.ascontiguousarray(array))
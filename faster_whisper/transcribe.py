@@ -1,13 +1,37 @@
+import asyncio
+import collections
+import contextlib
+import copy
+import functools
 import itertools
 import json
 import logging
 import os
+import queue
+import re
+import threading
+import time
 import zlib
 
-from dataclasses import asdict, dataclass
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
 from inspect import signature
 from math import ceil
-from typing import BinaryIO, Iterable, List, Optional, Tuple, Union
+from typing import (
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from warnings import warn
 
 import ctranslate2
@@ -16,15 +40,27 @@ import tokenizers
 
 from tqdm import tqdm
 
-from faster_whisper.audio import decode_audio, pad_or_trim
+from faster_whisper.audio import decode_audio, pad_or_trim, time_stretch
 from faster_whisper.feature_extractor import FeatureExtractor
+from faster_whisper.scheduler import BatchScheduler, get_numpy_array, select_rows
 from faster_whisper.tokenizer import _LANGUAGE_CODES, Tokenizer
-from faster_whisper.utils import download_model, format_timestamp, get_end, get_logger
+from faster_whisper.utils import (
+    PeakMemoryMonitor,
+    download_model,
+    format_timestamp,
+    get_end,
+    get_logger,
+    get_memory_usage,
+    iterate_in_executor,
+    iterate_in_thread,
+)
 from faster_whisper.vad import (
     SpeechTimestampsMap,
     VadOptions,
     collect_chunks,
+    get_clip_timestamps,
     get_speech_timestamps,
+    split_speech_chunks,
 )
 
 
@@ -95,6 +131,232 @@ class TranscriptionOptions:
     clip_timestamps: Union[str, List[float]]
     hallucination_silence_threshold: Optional[float]
     hotwords: Optional[str]
+    speculative_encoding: bool = False
+    batched_fallback: int = 0
+    language_detection_threshold: Optional[float] = 0.5
+    language_lock_windows: int = 0
+    language_lock_interval: int = 0
+    adaptive_beam: bool = False
+    adaptive_beam_log_prob_threshold: Optional[float] = -0.5
+    adaptive_beam_compression_ratio_threshold: Optional[float] = 2.0
+    max_new_tokens_per_second: Optional[float] = None
+    clip_encode_batch_size: int = 8
+
+
+@dataclass
+class WindowInfo:
+    """Decoding statistics of a 30-second window, collected as the segments are generated.
+
+    Attributes:
+      seek: Start of the window in frames.
+      start: Start of the window in seconds.
+      duration: Duration of the window content in seconds.
+      encoder_prefetched: Whether the encoder output was computed speculatively while the
+        previous window was being decoded.
+      encoder_batched: Whether the encoder output was computed in a batch with the next
+        clips shorter than a window.
+      temperature: Temperature of the accepted decoding, i.e. the fallback level that was
+        needed for this window.
+      language: Language used to decode this window.
+      language_probability: Probability of the language detected on this window, None if
+        the language was not detected on this window (e.g. it was locked in multilingual mode).
+      avg_logprob: Average log probability of the accepted decoding.
+      compression_ratio: Compression ratio of the text of the accepted decoding.
+      no_speech_prob: Probability of the no speech token.
+      escalated: Whether the window was decoded again by the main model of a CascadePipeline.
+      beam_search: In the adaptive beam mode, whether the greedy decoding was rejected and
+        the window was decoded again with the beam search. None if no greedy decoding was
+        attempted.
+      speech_duration: Duration of speech in the window estimated from the frame energy,
+        when `max_new_tokens_per_second` is set.
+      max_new_tokens: Maximum number of tokens decoded for this window, derived from the
+        speech duration, when `max_new_tokens_per_second` is set.
+      capped_decodings: Number of decodings of this window that reached max_new_tokens and
+        triggered a fallback.
+    """
+
+    seek: int
+    start: float
+    duration: float
+    encoder_prefetched: bool = False
+    encoder_batched: bool = False
+    temperature: Optional[float] = None
+    language: Optional[str] = None
+    language_probability: Optional[float] = None
+    avg_logprob: Optional[float] = None
+    compression_ratio: Optional[float] = None
+    no_speech_prob: Optional[float] = None
+    escalated: bool = False
+    beam_search: Optional[bool] = None
+    speech_duration: Optional[float] = None
+    max_new_tokens: Optional[int] = None
+    capped_decodings: int = 0
+
+
+class LanguageLock:
+    """Skips the per-window language detection of the multilingual mode.
+
+    The language is locked after `language_lock_windows` consecutive windows detected with
+    the same language and a probability higher than `language_detection_threshold`. While it
+    is locked, the language is only detected again every `language_lock_interval` windows
+    (never if 0), and the lock is released as soon as a window fails the
+    `log_prob_threshold` or `compression_ratio_threshold` checks.
+    """
+
+    def __init__(self, options: TranscriptionOptions):
+        self.options = options
+        self.language = None
+        self.locked = False
+        self.num_confident_windows = 0
+        self.num_skipped_windows = 0
+
+    def should_detect(self) -> bool:
+        """Returns True if the language should be detected on the next window."""
+        if not self.locked:
+            return True
+        interval = self.options.language_lock_interval
+        return interval > 0 and self.num_skipped_windows + 1 >= interval
+
+    def skip(self) -> None:
+        """Records a window decoded with the locked language."""
+        self.num_skipped_windows += 1
+
+    def update(self, language: str, language_probability: float) -> None:
+        """Records the language detected on a window."""
+        threshold = self.options.language_detection_threshold
+        confident = threshold is None or language_probability > threshold
+
+        if confident and language == self.language:
+            self.num_confident_windows += 1
+        else:
+            self.num_confident_windows = 1 if confident else 0
+
+        self.language = language
+        self.num_skipped_windows = 0
+        self.locked = (
+            self.options.language_lock_windows > 0
+            and self.num_confident_windows >= self.options.language_lock_windows
+        )
+
+    def update_decoding(self, avg_logprob: float, compression_ratio: float) -> None:
+        """Releases the lock if the decoding of a window degraded."""
+        if not self.locked:
+            return
+
+        options = self.options
+        if (
+            options.log_prob_threshold is not None
+            and avg_logprob < options.log_prob_threshold
+        ) or (
+            options.compression_ratio_threshold is not None
+            and compression_ratio > options.compression_ratio_threshold
+        ):
+            self.locked = False
+            self.num_confident_windows = 0
+
+
+class BatchSizeTuner:
+    """Chooses the batch sizes of BatchedInferencePipeline when batch_size is "auto".
+
+    The batches are measured per cost key, made of the options changing the cost of a row
+    (the beam size, the maximum length of the decodings, the word timestamps, ...): the
+    time and the peak growth of the resident memory of each stage of a batch. The first
+    batches of a key, of 1 and 2 chunks, calibrate a linear model of the time, a fixed
+    cost plus a cost per row, which is then refitted on the last batches. The next batch
+    size is the smallest one reaching 90% of the maximum throughput of this model, capped
+    by the number of rows fitting in the memory left under `memory_budget`, given the
+    largest memory growth per row of the last batches. The batch size at most doubles from
+    one batch to the next, and the batch following a batch which exceeded the memory
+    budget is half as large.
+
+    The memory is the resident memory of the whole process, read from /proc: it is only
+    measured on Linux, where the batch sizes are otherwise chosen from the time alone. The
+    memory growth of a stage measured while another stage or another transcription is
+    measured is discarded (see `PeakMemoryMonitor`), but the memory allocated during a
+    stage by the other threads of the application is counted in its growth.
+    """
+
+    def __init__(
+        self,
+        memory_budget: Optional[int] = None,
+        max_batch_size: int = 64,
+        history: int = 8,
+    ):
+        self.memory_budget = memory_budget
+        self.max_batch_size = max_batch_size
+        # (rows, seconds, memory growth) of the last batches of each (key, stage).
+        self.measures = collections.defaultdict(
+            lambda: collections.deque(maxlen=history)
+        )
+        self.backoff_sizes = {}
+        self._lock = threading.Lock()
+
+    def next_batch_size(self, key: Hashable, max_rows: int) -> int:
+        """Returns the size of the next batch of this cost key, at most max_rows."""
+        with self._lock:
+            decode_sizes = [rows for rows, _, _ in self.measures[key, "decode"]]
+            if 1 not in decode_sizes:
+                size = 1
+            elif len(set(decode_sizes)) < 2:
+                size = 2
+            else:
+                size = self._fit_batch_size(key, decode_sizes[-1])
+            backoff_size = self.backoff_sizes.pop(key, None)
+            if backoff_size is not None:
+                size = min(size, backoff_size)
+        return max(1, min(size, max_rows))
+
+    def _fit_batch_size(self, key: Hashable, last_size: int) -> int:
+        fixed_time = 0.0
+        time_per_row = 0.0
+        memory_per_row = 0.0
+        for (measured_key, _), measures in list(self.measures.items()):
+            if measured_key != key or not measures:
+                continue
+            rows = np.array([measure[0] for measure in measures], dtype=np.float64)
+            seconds = np.array([measure[1] for measure in measures])
+            if len(set(rows)) >= 2:
+                slope, intercept = np.polyfit(rows, seconds, 1)
+            else:
+                slope, intercept = seconds.sum() / rows.sum(), 0.0
+            time_per_row += slope
+            fixed_time += intercept
+            memory_per_row += max(
+                (growth / rows for rows, _, growth in measures if growth is not None),
+                default=0.0,
+            )
+
+        size = self.max_batch_size
+        if time_per_row > 0:
+            # size / (fixed_time + size * time_per_row) >= 0.9 / time_per_row
+            size = ceil(9 * max(fixed_time, 0.0) / time_per_row)
+
+        memory_usage = get_memory_usage()
+        if (
+            self.memory_budget is not None
+            and memory_usage is not None
+            and memory_per_row > 0
+        ):
+            size = min(size, int((self.memory_budget - memory_usage) / memory_per_row))
+
+        return min(size, 2 * last_size, self.max_batch_size)
+
+    @contextlib.contextmanager
+    def measure(self, key: Hashable, stage: str, rows: int) -> Iterator[None]:
+        """Measures the time and the peak memory growth of a stage of a batch of rows."""
+        start = time.perf_counter()
+        with PeakMemoryMonitor() as monitor:
+            yield
+        seconds = time.perf_counter() - start
+
+        with self._lock:
+            self.measures[key, stage].append((rows, seconds, monitor.peak_growth))
+            if (
+                self.memory_budget is not None
+                and monitor.peak is not None
+                and monitor.peak > self.memory_budget
+            ):
+                self.backoff_sizes[key] = max(1, rows // 2)
 
 
 @dataclass
@@ -106,77 +368,228 @@ class TranscriptionInfo:
     all_language_probs: Optional[List[Tuple[str, float]]]
     transcription_options: TranscriptionOptions
     vad_options: VadOptions
+    windows: List[WindowInfo] = field(default_factory=list)
+
+
+@dataclass
+class BatchedRequest:
+    """An audio prepared by BatchedInferencePipeline, whose chunks are ready to be decoded.
+
+    It holds all the state of a transcription, so that a pipeline can run concurrent
+    transcriptions from several threads.
+
+    Attributes:
+      features: Padded features of the chunks.
+      chunks_metadata: Offset and duration of the chunks in the audio after the VAD.
+      tokenizer: Tokenizer with the language and the task of the audio.
+      options: Transcription options.
+      info: Transcription info returned to the caller.
+      tasks: Tasks decoded on every chunk, None for a single task.
+      speech_chunks: Speech chunks found by the VAD, to restore the timestamps of the
+        segments. None if the timestamps are already relative to the original audio.
+      time_scale: Speed factor of the time stretch applied to the chunks.
+      language_lock: Language lock of this audio in multilingual mode.
+      segments: Segments of the chunks decoded so far by transcribe_many.
+      pending_chunks: Number of chunks not decoded yet by transcribe_many.
+      last_speech_timestamp: End of the last word aligned in this audio.
+    """
+
+    features: Union[np.ndarray, List[np.ndarray]]
+    chunks_metadata: List[dict]
+    tokenizer: Tokenizer
+    options: TranscriptionOptions
+    info: TranscriptionInfo
+    tasks: Optional[List[str]]
+    speech_chunks: Optional[List[dict]]
+    time_scale: float
+    language_lock: LanguageLock
+    segments: List[Segment] = field(default_factory=list)
+    pending_chunks: int = 0
+    last_speech_timestamp: float = 0.0
 
 
 class BatchedInferencePipeline:
     def __init__(
         self,
         model,
+        memory_budget: Optional[int] = None,
+        max_batch_size: int = 64,
     ):
+        """Initializes the batched pipeline.
+
+        Args:
+          model: WhisperModel instance.
+          memory_budget: When batch_size is "auto", maximum resident memory of the process
+            in bytes. The memory is only measured on Linux, and the memory of a GPU is not
+            included.
+          max_batch_size: When batch_size is "auto", maximum number of chunks of a batch.
+        """
+        # The pipeline does not keep any state of a transcription: it is held by the
+        # BatchedRequest of each call, so that concurrent calls can share the pipeline.
         self.model: WhisperModel = model
-        self.last_speech_timestamp = 0.0
+        self.batch_size_tuner = BatchSizeTuner(memory_budget, max_batch_size)
+        if memory_budget is not None and get_memory_usage() is None:
+            self.model.logger.warning(
+                "The memory usage cannot be measured on this platform, "
+                "the memory budget is ignored"
+            )
 
-    def forward(self, features, tokenizer, chunks_metadata, options):
+    def forward(
+        self,
+        request: BatchedRequest,
+        features: np.ndarray,
+        chunks_metadata: List[dict],
+    ) -> List[List[dict]]:
+        """Decodes a batch of chunks of the request and returns the segments of each chunk
+        (of each task in turn when there are multiple tasks).
+        """
         encoder_output, outputs = self.generate_segment_batched(
-            features, tokenizer, options
+            features,
+            request.tokenizer,
+            request.options,
+            request.language_lock,
+            request.tasks,
+        )
+        return self._segment_outputs(request, encoder_output, outputs, chunks_metadata)
+
+    def _batch_cost_key(self, request: BatchedRequest) -> Hashable:
+        """Returns the options of the request changing the cost of a chunk in a batch."""
+        options = request.options
+        return (
+            request.features[0].shape if len(request.features) > 0 else None,
+            len(request.tasks) if request.tasks is not None else 1,
+            options.beam_size,
+            options.best_of,
+            options.max_new_tokens,
+            options.word_timestamps,
         )
 
+    def _next_batch_size(
+        self, batch_size: Union[int, str], key: Optional[Hashable], max_rows: int
+    ) -> int:
+        """Returns batch_size, or the size chosen by the tuner if batch_size is "auto"."""
+        if batch_size != "auto":
+            return min(batch_size, max_rows)
+        if key is None:
+            return 1
+        return self.batch_size_tuner.next_batch_size(key, max_rows)
+
+    def _measure_batch(
+        self, batch_size: Union[int, str], key: Hashable, stage: str, rows: int
+    ):
+        """Measures a stage of a batch for the tuner if batch_size is "auto"."""
+        if batch_size != "auto":
+            return contextlib.nullcontext()
+        return self.batch_size_tuner.measure(key, stage, rows)
+
+    def _segment_outputs(
+        self,
+        request: BatchedRequest,
+        encoder_output: ctranslate2.StorageView,
+        outputs: List[dict],
+        chunks_metadata: List[dict],
+    ) -> List[List[dict]]:
+        """Splits the outputs of generate_segment_batched into segments and adds the word
+        timestamps.
+        """
+        request.info.windows.extend(
+            self._get_window_info(chunk_metadata, output)
+            for chunk_metadata, output in zip(chunks_metadata, outputs)
+        )
+        if request.tasks is not None:
+            # The outputs of each task follow each other.
+            chunks_metadata = chunks_metadata * len(request.tasks)
+
         segmented_outputs = []
         segment_sizes = []
         for chunk_metadata, output in zip(chunks_metadata, outputs):
-            duration = chunk_metadata["duration"]
-            segment_size = int(ceil(duration) * self.model.frames_per_second)
-            segment_sizes.append(segment_size)
-            (
-                subsegments,
-                seek,
-                single_timestamp_ending,
-            ) = self.model._split_segments_by_timestamps(
-                tokenizer=tokenizer,
-                tokens=output["tokens"],
-                time_offset=chunk_metadata["offset"],
-                segment_size=segment_size,
-                segment_duration=duration,
-                seek=0,
-            )
-            segmented_outputs.append(
-                [
-                    dict(
-                        text=tokenizer.decode(subsegment["tokens"]),
-                        avg_logprob=output["avg_logprob"],
-                        no_speech_prob=output["no_speech_prob"],
-                        tokens=subsegment["tokens"],
-                        start=subsegment["start"],
-                        end=subsegment["end"],
-                        compression_ratio=get_compression_ratio(
-                            tokenizer.decode(subsegment["tokens"])
-                        ),
-                        seek=int(
-                            chunk_metadata["offset"] * self.model.frames_per_second
-                        ),
-                    )
-                    for subsegment in subsegments
-                ]
+            subsegments, segment_size = self._split_output(
+                request.tokenizer, chunk_metadata, output
             )
-        if options.word_timestamps:
-            self.last_speech_timestamp = self.model.add_word_timestamps(
+            segmented_outputs.append(subsegments)
+            segment_sizes.append(segment_size)
+        if request.options.word_timestamps:
+            request.last_speech_timestamp = self.model.add_word_timestamps(
                 segmented_outputs,
-                tokenizer,
+                request.tokenizer,
                 encoder_output,
                 segment_sizes,
-                options.prepend_punctuations,
-                options.append_punctuations,
-                self.last_speech_timestamp,
+                request.options.prepend_punctuations,
+                request.options.append_punctuations,
+                request.last_speech_timestamp,
             )
 
         return segmented_outputs
 
+    def _get_window_info(self, chunk_metadata: dict, output: dict) -> WindowInfo:
+        return WindowInfo(
+            seek=int(chunk_metadata["offset"] * self.model.frames_per_second),
+            start=chunk_metadata["offset"],
+            duration=chunk_metadata["duration"],
+            temperature=output["temperature"],
+            language=output["language"],
+            language_probability=output["language_probability"],
+            avg_logprob=output["avg_logprob"],
+            compression_ratio=output["compression_ratio"],
+            no_speech_prob=output["no_speech_prob"],
+            beam_search=output["beam_search"],
+            speech_duration=output["speech_duration"],
+            max_new_tokens=output["max_new_tokens"],
+            capped_decodings=output["capped_decodings"],
+        )
+
+    def _split_output(
+        self, tokenizer: Tokenizer, chunk_metadata: dict, output: dict
+    ) -> Tuple[List[dict], int]:
+        """Splits the decoded tokens of a chunk into segments at the timestamp tokens.
+
+        Returns the segments and the size of the chunk in frames.
+        """
+        duration = chunk_metadata["duration"]
+        segment_size = int(ceil(duration) * self.model.frames_per_second)
+        (
+            subsegments,
+            seek,
+            single_timestamp_ending,
+        ) = self.model._split_segments_by_timestamps(
+            tokenizer=tokenizer,
+            tokens=output["tokens"],
+            time_offset=chunk_metadata["offset"],
+            segment_size=segment_size,
+            segment_duration=duration,
+            seek=0,
+        )
+        return [
+            dict(
+                text=tokenizer.decode(subsegment["tokens"]),
+                avg_logprob=output["avg_logprob"],
+                no_speech_prob=output["no_speech_prob"],
+                temperature=output["temperature"],
+                tokens=subsegment["tokens"],
+                start=subsegment["start"],
+                end=subsegment["end"],
+                compression_ratio=get_compression_ratio(
+                    tokenizer.decode(subsegment["tokens"])
+                ),
+                seek=int(chunk_metadata["offset"] * self.model.frames_per_second),
+            )
+            for subsegment in subsegments
+        ], segment_size
+
     def generate_segment_batched(
         self,
         features: np.ndarray,
         tokenizer: Tokenizer,
         options: TranscriptionOptions,
+        language_lock: Optional[LanguageLock] = None,
+        tasks: Optional[List[str]] = None,
+        languages: Optional[List[str]] = None,
     ):
+        """Decodes a batch of chunks.
+
+        languages are the languages of the chunks when they come from different audios,
+        otherwise all the chunks have the language of the tokenizer.
+        """
         batch_size = features.shape[0]
 
         prompt = self.model.get_prompt(
@@ -209,43 +622,208 @@ class BatchedInferencePipeline:
         encoder_output = self.model.encode(features)
         prompts = [prompt.copy() for _ in range(batch_size)]
 
+        if languages is None:
+            languages = [tokenizer.language_code] * batch_size
+        else:
+            languages = list(languages)
+        language_probabilities = [None] * batch_size
+
         if options.multilingual:
-            language_tokens = [
-                tokenizer.tokenizer.token_to_id(segment_langs[0][0])
-                for segment_langs in self.model.model.detect_language(encoder_output)
-            ]
+            if language_lock is None or language_lock.should_detect():
+                for i, segment_langs in enumerate(
+                    self.model.model.detect_language(encoder_output)
+                ):
+                    language_token, language_probabilities[i] = segment_langs[0]
+                    languages[i] = language_token[2:-2]
+                    if language_lock is not None:
+                        language_lock.update(languages[i], language_probabilities[i])
+            else:
+                languages = [language_lock.language] * batch_size
+                for _ in range(batch_size):
+                    language_lock.skip()
+
+        if any(language != tokenizer.language_code for language in languages):
             language_token_index = prompt.index(tokenizer.language)
 
-            for i, language_token in enumerate(language_tokens):
-                prompts[i][language_token_index] = language_token
+            for i, language in enumerate(languages):
+                prompts[i][language_token_index] = tokenizer.tokenizer.token_to_id(
+                    "<|%s|>" % language
+                )
 
-        results = self.model.model.generate(
-            encoder_output,
-            prompts,
-            beam_size=options.beam_size,
-            patience=options.patience,
-            length_penalty=options.length_penalty,
-            max_length=max_length,
-            suppress_blank=options.suppress_blank,
-            suppress_tokens=options.suppress_tokens,
-            return_scores=True,
-            return_no_speech_prob=True,
-            sampling_temperature=options.temperatures[0],
-            repetition_penalty=options.repetition_penalty,
-            no_repeat_ngram_size=options.no_repeat_ngram_size,
-        )
+        if tasks is not None:
+            # Each task decodes all the chunks, the row i uses the encoder output of the
+            # chunk i % batch_size.
+            task_token_index = prompt.index(tokenizer.task)
+            task_prompts = []
+            for task in tasks:
+                task_token = tokenizer.tokenizer.token_to_id("<|%s|>" % task)
+                for chunk_prompt in prompts:
+                    chunk_prompt = chunk_prompt.copy()
+                    chunk_prompt[task_token_index] = task_token
+                    task_prompts.append(chunk_prompt)
+            prompts = task_prompts
+            languages = languages * len(tasks)
+            language_probabilities = language_probabilities * len(tasks)
+
+        num_rows = len(prompts)
+        decode_results = [None] * num_rows
+        all_results = [[] for _ in range(num_rows)]
+        below_cr_threshold_results = [[] for _ in range(num_rows)]
+        remaining = list(range(num_rows))
+        beam_searches = [None] * num_rows
+        capped_decodings = [0] * num_rows
+
+        speech_durations = [None] * batch_size
+        max_new_tokens = [None] * batch_size
+        if options.max_new_tokens_per_second is not None:
+            for i, chunk_features in enumerate(features):
+                speech_durations[i] = get_speech_duration(
+                    chunk_features, self.model.feature_extractor.time_per_frame
+                )
+                max_new_tokens[i] = get_max_new_tokens(
+                    speech_durations[i], options.max_new_tokens_per_second
+                )
+        # The speech-rate cap only applies when it is lower than the maximum length.
+        row_caps = [
+            (
+                max_new_tokens[i % batch_size]
+                if max_new_tokens[i % batch_size] is not None
+                and len(prompt) + max_new_tokens[i % batch_size] < max_length
+                else None
+            )
+            for i in range(num_rows)
+        ]
+
+        # Each decoding is a temperature, and whether it is a greedy decoding that only
+        # passes the rejected chunks to the beam search.
+        decodings = [(temperature, False) for temperature in options.temperatures]
+        if (
+            options.adaptive_beam
+            and options.beam_size > 1
+            and options.temperatures[0] == 0
+        ):
+            decodings.insert(0, (0.0, True))
+
+        for temperature, greedy in decodings:
+            if temperature > 0:
+                kwargs = {
+                    "beam_size": 1,
+                    "num_hypotheses": options.best_of,
+                    "sampling_topk": 0,
+                    "sampling_temperature": temperature,
+                }
+            else:
+                kwargs = {
+                    "beam_size": 1 if greedy else options.beam_size,
+                    "patience": options.patience,
+                }
+
+            if num_rows == batch_size and len(remaining) == num_rows:
+                rows_encoder_output = encoder_output
+            else:
+                # The tasks repeat the encoder output of the chunks and only the failed
+                # chunks are decoded again, reusing their encoder output.
+                rows_encoder_output = select_rows(
+                    encoder_output, [i % batch_size for i in remaining]
+                )
+
+            # A batch decodes up to the highest cap of its rows, the rows going over their
+            # own cap are counted as capped.
+            rows_max_length = max_length
+            if all(row_caps[i] is not None for i in remaining):
+                rows_max_length = len(prompt) + max(row_caps[i] for i in remaining)
+
+            results = self.model.model.generate(
+                rows_encoder_output,
+                [prompts[i] for i in remaining],
+                length_penalty=options.length_penalty,
+                max_length=rows_max_length,
+                suppress_blank=options.suppress_blank,
+                suppress_tokens=options.suppress_tokens,
+                return_scores=True,
+                return_no_speech_prob=True,
+                repetition_penalty=options.repetition_penalty,
+                no_repeat_ngram_size=options.no_repeat_ngram_size,
+                **kwargs,
+            )
+
+            failed = []
+            for i, result in zip(remaining, results):
+                # return scores
+                seq_len = len(result.sequences_ids[0])
+                cum_logprob = result.scores[0] * (seq_len**options.length_penalty)
+                avg_logprob = cum_logprob / (seq_len + 1)
+
+                text = tokenizer.decode(result.sequences_ids[0]).strip()
+                compression_ratio = get_compression_ratio(text)
+
+                decode_result = (result, avg_logprob, temperature, compression_ratio)
+                all_results[i].append(decode_result)
+
+                if (
+                    options.compression_ratio_threshold is not None
+                    and compression_ratio <= options.compression_ratio_threshold
+                ):
+                    below_cr_threshold_results[i].append(decode_result)
+
+                if (
+                    row_caps[i] is not None
+                    and len(result.sequences_ids[0]) >= row_caps[i] - 1
+                ):
+                    capped_decodings[i] += 1
+                    needs_decoding = True
+                    if greedy:
+                        beam_searches[i] = True
+                elif greedy:
+                    beam_searches[i] = needs_decoding = self.model._needs_beam_search(
+                        avg_logprob, compression_ratio, result.no_speech_prob, options
+                    )
+                else:
+                    needs_decoding = self.model._needs_fallback(
+                        avg_logprob,
+                        compression_ratio,
+                        result.no_speech_prob,
+                        temperature,
+                        options,
+                    )
+
+                if needs_decoding:
+                    failed.append(i)
+                else:
+                    decode_results[i] = decode_result
+
+            remaining = failed
+            if not remaining:
+                break
+
+        for i in remaining:
+            # all failed, select the result with the highest average log probability
+            result, avg_logprob, _, compression_ratio = max(
+                below_cr_threshold_results[i] or all_results[i], key=lambda x: x[1]
+            )
+            # report the final temperature, as in WhisperModel.generate_with_fallback
+            decode_results[i] = (result, avg_logprob, temperature, compression_ratio)
 
         output = []
-        for result in results:
-            # return scores
-            seq_len = len(result.sequences_ids[0])
-            cum_logprob = result.scores[0] * (seq_len**options.length_penalty)
+        for i, (result, avg_logprob, temperature, compression_ratio) in enumerate(
+            decode_results
+        ):
+            if options.multilingual and language_lock is not None and i < batch_size:
+                language_lock.update_decoding(avg_logprob, compression_ratio)
 
             output.append(
                 dict(
-                    avg_logprob=cum_logprob / (seq_len + 1),
+                    avg_logprob=avg_logprob,
+                    compression_ratio=compression_ratio,
                     no_speech_prob=result.no_speech_prob,
                     tokens=result.sequences_ids[0],
+                    temperature=temperature,
+                    language=languages[i],
+                    language_probability=language_probabilities[i],
+                    beam_search=beam_searches[i],
+                    speech_duration=speech_durations[i % batch_size],
+                    max_new_tokens=max_new_tokens[i % batch_size],
+                    capped_decodings=capped_decodings[i],
                 )
             )
 
@@ -255,7 +833,7 @@ class BatchedInferencePipeline:
         self,
         audio: Union[str, BinaryIO, np.ndarray],
         language: Optional[str] = None,
-        task: str = "transcribe",
+        task: Union[str, Sequence[str]] = "transcribe",
         log_progress: bool = False,
         beam_size: int = 5,
         best_of: int = 5,
@@ -288,15 +866,31 @@ class BatchedInferencePipeline:
         multilingual: bool = False,
         vad_filter: bool = True,
         vad_parameters: Optional[Union[dict, VadOptions]] = None,
+        vad_mode: str = "concatenate",
         max_new_tokens: Optional[int] = None,
         chunk_length: Optional[int] = None,
         clip_timestamps: Optional[List[dict]] = None,
         hallucination_silence_threshold: Optional[float] = None,
-        batch_size: int = 8,
+        batch_size: Union[int, str] = 8,
         hotwords: Optional[str] = None,
         language_detection_threshold: Optional[float] = 0.5,
         language_detection_segments: int = 1,
-    ) -> Tuple[Iterable[Segment], TranscriptionInfo]:
+        speculative_encoding: bool = False,
+        batched_fallback: int = 0,
+        language_detection_model: Optional[Union[str, "WhisperModel"]] = None,
+        language_lock_windows: int = 0,
+        language_lock_interval: int = 0,
+        adaptive_beam: bool = False,
+        adaptive_beam_log_prob_threshold: Optional[float] = -0.5,
+        adaptive_beam_compression_ratio_threshold: Optional[float] = 2.0,
+        max_new_tokens_per_second: Optional[float] = None,
+        time_scale: float = 1.0,
+        clip_encode_batch_size: int = 8,
+        parallel_regions: int = 1,
+        prefetch_batches: int = 0,
+    ) -> Tuple[
+        Union[Iterable[Segment], Dict[str, Iterable[Segment]]], TranscriptionInfo
+    ]:
         """transcribe audio in chunks in batched fashion and return with language info.
 
         Arguments:
@@ -304,7 +898,10 @@ class BatchedInferencePipeline:
             language: The language spoken in the audio. It should be a language code such
                 as "en" or "fr". If not set, the language will be detected in the first 30 seconds
                 of audio.
-            task: Task to execute (transcribe or translate).
+            task: Task to execute (transcribe or translate). A sequence of tasks can be passed
+                to run them together: each chunk is encoded once and decoded with the prompt of
+                every task in the same batch. The segments are then returned as a dictionary
+                mapping each task to its segments, covering the same chunks.
             log_progress: whether to show progress bar or not.
             beam_size: Beam size to use for decoding.
             best_of: Number of candidates when sampling with non-zero temperature.
@@ -313,8 +910,17 @@ class BatchedInferencePipeline:
             repetition_penalty: Penalty applied to the score of previously generated tokens
                 (set > 1 to penalize).
             no_repeat_ngram_size: Prevent repetitions of ngrams with this size (set 0 to disable).
-            temperature: Temperature for sampling. If a list or tuple is passed,
-                only the first value is used.
+            temperature: Temperature for sampling. It can be a tuple of temperatures,
+                which will be successively used upon failures according to either
+                `compression_ratio_threshold` or `log_prob_threshold`. Only the chunks of
+                a batch that failed are decoded again with the next temperature.
+            compression_ratio_threshold: If the gzip compression ratio is above this value,
+                treat as failed.
+            log_prob_threshold: If the average log probability over sampled tokens is
+                below this value, treat as failed.
+            no_speech_threshold: If the no_speech probability is higher than this value AND
+                the average log probability over sampled tokens is below `log_prob_threshold`,
+                consider the chunk as silent and do not fall back.
             initial_prompt: Optional text string or iterable of token ids to provide as a
                 prompt for the each window.
             suppress_blank: Suppress blank outputs at the beginning of the sampling.
@@ -341,21 +947,49 @@ class BatchedInferencePipeline:
             clip_timestamps: Optionally provide list of dictionaries each containing "start" and
                 "end" keys that specify the start and end of the voiced region within
                 `chunk_length` boundary. vad_filter will be ignored if clip_timestamps is used.
-            batch_size: the maximum number of parallel requests to model for decoding.
+            batch_size: the maximum number of parallel requests to model for decoding, or
+                "auto" to choose it from the measured time and memory of the batches under
+                the memory budget of the pipeline (see `BatchSizeTuner`). The memory is only
+                measured on Linux, and "auto" cannot be combined with prefetch_batches since
+                the stages of the batches would be measured concurrently.
             hotwords:
                 Hotwords/hint phrases to the model. Has no effect if prefix is not None.
             language_detection_threshold: If the maximum probability of the language tokens is
                 higher than this value, the language is detected.
             language_detection_segments: Number of segments to consider for the language detection.
+            language_detection_model: Smaller multilingual model (a WhisperModel instance, or a
+                size or path to load one) that detects the language instead of this model.
+                See `WhisperModel.detect_language`.
+            language_lock_windows: When multilingual is True, stop detecting the language of
+                every chunk after this number of consecutive chunks confidently detected with
+                the same language (see `language_detection_threshold`). The lock is released
+                when a chunk fails the `log_prob_threshold` or `compression_ratio_threshold`
+                checks. 0 detects the language of every chunk.
+            language_lock_interval: While the language is locked, detect it again every
+                this number of chunks. 0 never detects it while locked. The language used for
+                each chunk is reported in `TranscriptionInfo.windows`.
+            adaptive_beam: Decode the chunks greedily first, and only decode again with
+                `beam_size` the chunks whose greedy result is outside the band set by
+                `adaptive_beam_log_prob_threshold` and
+                `adaptive_beam_compression_ratio_threshold`.
+            adaptive_beam_log_prob_threshold: Reject the greedy result if its average log
+                probability is lower than this value.
+            adaptive_beam_compression_ratio_threshold: Reject the greedy result if its
+                compression ratio is higher than this value.
+            max_new_tokens_per_second: Cap the number of tokens decoded for each chunk to
+                this rate times the speech duration of the chunk (at least one second),
+                estimated from the frame energy. A decoding reaching the cap triggers a
+                fallback.
+            time_scale: Speed up the speech chunks by this factor with a pitch-preserving
+                time stretch before the transcription, e.g. 1.25 to 1.5 for clean and slow
+                speech. The segment and word timestamps are scaled back to the original
+                audio.
+            prefetch_batches: Encode and decode up to this number of batches in a background
+                thread ahead of the batch being split into segments, aligned for the word
+                timestamps and yielded, so that this work overlaps with the model. 0 runs
+                everything in the calling thread. Not supported with batch_size="auto".
 
         Unused Arguments
-            compression_ratio_threshold: If the gzip compression ratio is above this value,
-                treat as failed.
-            log_prob_threshold: If the average log probability over sampled tokens is
-                below this value, treat as failed.
-            no_speech_threshold: If the no_speech probability is higher than this value AND
-                the average log probability over sampled tokens is below `log_prob_threshold`,
-                consider the segment as silent.
             condition_on_previous_text: If True, the previous output of the model is provided
                 as a prompt for the next window; disabling may make the text inconsistent across
                 windows, but the model becomes less prone to getting stuck in a failure loop,
@@ -367,15 +1001,210 @@ class BatchedInferencePipeline:
             hallucination_silence_threshold: Optional[float]
                 When word_timestamps is True, skip silent periods longer than this threshold
                 (in seconds) when a possible hallucination is detected. set as None.
+        Unsupported Arguments (a value other than the default raises a ValueError)
+            vad_mode: Only "concatenate" is supported, the speech chunks are always
+                collected into batched chunks.
+            speculative_encoding: Not supported, the chunks of a batch are encoded
+                together.
+            batched_fallback: Not supported, the chunks that need a fallback are always
+                decoded together.
+            clip_encode_batch_size: Must be 8, the chunks are always encoded in batches
+                of batch_size.
+            parallel_regions: Must be 1, the chunks are already independent and decoded
+                in batches.
         Returns:
           A tuple with:
 
-            - a generator over transcribed segments
+            - a generator over transcribed segments, or a dictionary of generators for each
+              task when multiple tasks are passed
             - an instance of TranscriptionInfo
         """
+        self._check_arguments(
+            batch_size,
+            prefetch_batches,
+            vad_mode,
+            speculative_encoding,
+            batched_fallback,
+            clip_encode_batch_size,
+            parallel_regions,
+        )
+
+        request = self._prepare_request(
+            audio,
+            language=language,
+            task=task,
+            beam_size=beam_size,
+            best_of=best_of,
+            patience=patience,
+            length_penalty=length_penalty,
+            repetition_penalty=repetition_penalty,
+            no_repeat_ngram_size=no_repeat_ngram_size,
+            temperature=temperature,
+            compression_ratio_threshold=compression_ratio_threshold,
+            log_prob_threshold=log_prob_threshold,
+            no_speech_threshold=no_speech_threshold,
+            initial_prompt=initial_prompt,
+            prefix=prefix,
+            suppress_blank=suppress_blank,
+            suppress_tokens=suppress_tokens,
+            without_timestamps=without_timestamps,
+            word_timestamps=word_timestamps,
+            prepend_punctuations=prepend_punctuations,
+            append_punctuations=append_punctuations,
+            multilingual=multilingual,
+            vad_filter=vad_filter,
+            vad_parameters=vad_parameters,
+            max_new_tokens=max_new_tokens,
+            chunk_length=chunk_length,
+            clip_timestamps=clip_timestamps,
+            hotwords=hotwords,
+            language_detection_threshold=language_detection_threshold,
+            language_detection_segments=language_detection_segments,
+            language_detection_model=language_detection_model,
+            language_lock_windows=language_lock_windows,
+            language_lock_interval=language_lock_interval,
+            adaptive_beam=adaptive_beam,
+            adaptive_beam_log_prob_threshold=adaptive_beam_log_prob_threshold,
+            adaptive_beam_compression_ratio_threshold=adaptive_beam_compression_ratio_threshold,
+            max_new_tokens_per_second=max_new_tokens_per_second,
+            time_scale=time_scale,
+            clip_encode_batch_size=clip_encode_batch_size,
+        )
+        sampling_rate = self.model.feature_extractor.sampling_rate
+
+        segments = self._batched_segments_generator(
+            request, batch_size, log_progress, prefetch_batches
+        )
+
+        if request.tasks is not None:
+            streams = split_segment_streams(segments, request.tasks)
+            if request.speech_chunks is not None or request.time_scale != 1:
+                streams = {
+                    task: restore_speech_timestamps(
+                        stream,
+                        request.speech_chunks,
+                        sampling_rate,
+                        request.time_scale,
+                    )
+                    for task, stream in streams.items()
+                }
+            return streams, request.info
+
+        segments = (segment for _, segment in segments)
+        if request.speech_chunks is not None or request.time_scale != 1:
+            segments = restore_speech_timestamps(
+                segments, request.speech_chunks, sampling_rate, request.time_scale
+            )
+
+        return segments, request.info
+
+    @staticmethod
+    def _check_arguments(
+        batch_size: Union[int, str],
+        prefetch_batches: int,
+        vad_mode: str,
+        speculative_encoding: bool,
+        batched_fallback: int,
+        clip_encode_batch_size: int,
+        parallel_regions: int,
+    ) -> None:
+        """Raises a ValueError for the arguments of `transcribe` that the pipeline does not
+        support.
+        """
+        if isinstance(batch_size, str) and batch_size != "auto":
+            raise ValueError('batch_size must be an integer or "auto"')
+
+        if batch_size == "auto" and prefetch_batches > 0:
+            raise ValueError('prefetch_batches is not supported with batch_size="auto"')
+
+        if vad_mode != "concatenate":
+            raise ValueError(
+                "BatchedInferencePipeline only supports the 'concatenate' VAD mode"
+            )
+
+        if speculative_encoding:
+            raise ValueError(
+                "speculative_encoding is not supported by BatchedInferencePipeline"
+            )
+
+        if batched_fallback != 0:
+            raise ValueError(
+                "batched_fallback is not supported by BatchedInferencePipeline"
+            )
 
+        if clip_encode_batch_size != 8:
+            raise ValueError(
+                "clip_encode_batch_size is not supported by BatchedInferencePipeline"
+            )
+
+        if parallel_regions != 1:
+            raise ValueError(
+                "parallel_regions is not supported by BatchedInferencePipeline"
+            )
+
+    def _prepare_request(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        *,
+        language: Optional[str],
+        task: Union[str, Sequence[str]],
+        beam_size: int,
+        best_of: int,
+        patience: float,
+        length_penalty: float,
+        repetition_penalty: float,
+        no_repeat_ngram_size: int,
+        temperature: Union[float, List[float], Tuple[float, ...]],
+        compression_ratio_threshold: Optional[float],
+        log_prob_threshold: Optional[float],
+        no_speech_threshold: Optional[float],
+        initial_prompt: Optional[Union[str, Iterable[int]]],
+        prefix: Optional[str],
+        suppress_blank: bool,
+        suppress_tokens: Optional[List[int]],
+        without_timestamps: bool,
+        word_timestamps: bool,
+        prepend_punctuations: str,
+        append_punctuations: str,
+        multilingual: bool,
+        vad_filter: bool,
+        vad_parameters: Optional[Union[dict, VadOptions]],
+        max_new_tokens: Optional[int],
+        chunk_length: Optional[int],
+        clip_timestamps: Optional[List[dict]],
+        hotwords: Optional[str],
+        language_detection_threshold: Optional[float],
+        language_detection_segments: int,
+        language_detection_model: Optional[Union[str, "WhisperModel"]],
+        language_lock_windows: int,
+        language_lock_interval: int,
+        adaptive_beam: bool,
+        adaptive_beam_log_prob_threshold: Optional[float],
+        adaptive_beam_compression_ratio_threshold: Optional[float],
+        max_new_tokens_per_second: Optional[float],
+        time_scale: float,
+        clip_encode_batch_size: int,
+    ) -> BatchedRequest:
+        """Decodes the audio, splits it into chunks, computes their features, detects the
+        language and resolves the transcription options (see `transcribe`).
+        """
         sampling_rate = self.model.feature_extractor.sampling_rate
 
+        tasks = None
+        if not isinstance(task, str):
+            tasks = list(task)
+            task = tasks[0]
+            if len(tasks) == 1:
+                tasks = None
+            elif len(set(tasks)) != len(tasks):
+                raise ValueError("The tasks must be unique")
+            elif not self.model.model.is_multilingual:
+                raise ValueError("Multiple tasks require a multilingual model")
+            elif word_timestamps:
+                raise ValueError(
+                    "Word timestamps are not supported with multiple tasks"
+                )
+
         if multilingual and not self.model.model.is_multilingual:
             self.model.logger.warning(
                 "The current model is English-only but the multilingual parameter is set to"
@@ -392,12 +1221,14 @@ class BatchedInferencePipeline:
         )
 
         chunk_length = chunk_length or self.model.feature_extractor.chunk_length
+        # The chunks fill a window once they are stretched.
+        max_chunk_duration = chunk_length * time_scale
         # if no segment split is provided, use vad_model and generate segments
         if not clip_timestamps:
             if vad_filter:
                 if vad_parameters is None:
                     vad_parameters = VadOptions(
-                        max_speech_duration_s=chunk_length,
+                        max_speech_duration_s=max_chunk_duration,
                         min_silence_duration_ms=160,
                     )
                 elif isinstance(vad_parameters, dict):
@@ -405,12 +1236,12 @@ class BatchedInferencePipeline:
                         vad_parameters.pop("max_speech_duration_s")
 
                     vad_parameters = VadOptions(
-                        **vad_parameters, max_speech_duration_s=chunk_length
+                        **vad_parameters, max_speech_duration_s=max_chunk_duration
                     )
 
                 clip_timestamps = get_speech_timestamps(audio, vad_parameters)
             # run the audio if it is less than 30 sec even without clip_timestamps
-            elif duration < chunk_length:
+            elif duration < max_chunk_duration:
                 clip_timestamps = [{"start": 0, "end": audio.shape[0]}]
             else:
                 raise RuntimeError(
@@ -420,7 +1251,7 @@ class BatchedInferencePipeline:
 
             clip_timestamps_provided = False
             audio_chunks, chunks_metadata = collect_chunks(
-                audio, clip_timestamps, max_duration=chunk_length
+                audio, clip_timestamps, max_duration=max_chunk_duration
             )
 
         else:
@@ -455,6 +1286,14 @@ class BatchedInferencePipeline:
             / sampling_rate
         )
 
+        if time_scale != 1:
+            audio_chunks = [
+                time_stretch(chunk, time_scale, sampling_rate) for chunk in audio_chunks
+            ]
+            for chunk_metadata in chunks_metadata:
+                chunk_metadata["offset"] /= time_scale
+                chunk_metadata["duration"] /= time_scale
+
         self.model.logger.info(
             "VAD filter removed %s of audio",
             format_timestamp(duration - duration_after_vad),
@@ -478,8 +1317,24 @@ class BatchedInferencePipeline:
                     language_probability,
                     all_language_probs,
                 ) = self.model.detect_language(
+                    audio=(
+                        np.concatenate(
+                            get_leading_chunks(
+                                audio_chunks,
+                                language_detection_segments
+                                * self.model.feature_extractor.n_samples,
+                            )
+                            + [np.zeros(0, dtype=np.float32)]
+                        )
+                        if language_detection_model is not None
+                        else None
+                    ),
                     features=np.concatenate(
-                        features
+                        get_leading_chunks(
+                            features,
+                            language_detection_segments
+                            * self.model.feature_extractor.nb_max_frames,
+                        )
                         + [
                             np.full((self.model.model.n_mels, 1), -1.5, dtype="float32")
                         ],
@@ -487,6 +1342,7 @@ class BatchedInferencePipeline:
                     ),  # add a dummy feature to account for empty audio
                     language_detection_segments=language_detection_segments,
                     language_detection_threshold=language_detection_threshold,
+                    language_detection_model=language_detection_model,
                 )
 
                 self.model.logger.info(
@@ -526,9 +1382,7 @@ class BatchedInferencePipeline:
             no_speech_threshold=no_speech_threshold,
             compression_ratio_threshold=compression_ratio_threshold,
             temperatures=(
-                temperature[:1]
-                if isinstance(temperature, (list, tuple))
-                else [temperature]
+                temperature if isinstance(temperature, (list, tuple)) else [temperature]
             ),
             initial_prompt=initial_prompt,
             prefix=prefix,
@@ -550,6 +1404,16 @@ class BatchedInferencePipeline:
             multilingual=multilingual,
             without_timestamps=without_timestamps,
             max_initial_timestamp=0.0,
+            language_detection_threshold=language_detection_threshold,
+            language_lock_windows=language_lock_windows,
+            language_lock_interval=language_lock_interval,
+            adaptive_beam=adaptive_beam,
+            adaptive_beam_log_prob_threshold=adaptive_beam_log_prob_threshold,
+            adaptive_beam_compression_ratio_threshold=(
+                adaptive_beam_compression_ratio_threshold
+            ),
+            max_new_tokens_per_second=max_new_tokens_per_second,
+            clip_encode_batch_size=clip_encode_batch_size,
         )
 
         info = TranscriptionInfo(
@@ -562,59 +1426,986 @@ class BatchedInferencePipeline:
             all_language_probs=all_language_probs,
         )
 
-        segments = self._batched_segments_generator(
-            features,
-            tokenizer,
-            chunks_metadata,
+        # The provided clip timestamps are already relative to the original audio.
+        speech_chunks = None if clip_timestamps_provided else clip_timestamps
+
+        return BatchedRequest(
+            features=features,
+            chunks_metadata=chunks_metadata,
+            tokenizer=tokenizer,
+            options=options,
+            info=info,
+            tasks=tasks,
+            speech_chunks=speech_chunks,
+            time_scale=time_scale,
+            language_lock=LanguageLock(options),
+        )
+
+    async def transcribe_async(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        executor: Optional[Executor] = None,
+        max_pending_segments: int = 16,
+        **kwargs,
+    ) -> Tuple[AsyncIterator[Segment], TranscriptionInfo]:
+        """Asyncio version of `transcribe`.
+
+        The audio decoding, the VAD and the language detection run in a bounded executor.
+        The batches are then decoded by a thread dedicated to the call, which blocks while
+        max_pending_segments segments wait for the consumer, so that slow consumers do not
+        hold the workers of the executor. Each call starts a thread, but only as many
+        threads as the model has workers decode at the same time. Cancelling the task
+        iterating over the segments stops the transcription after the batch being decoded.
+
+        Arguments:
+            audio: Path to the input file (or a file-like object), or the audio waveform.
+            executor: Executor preparing the transcription. If not set, the executor of the
+                model is used, which prepares as many transcriptions as the model has
+                workers.
+            max_pending_segments: Maximum number of segments decoded in advance of the
+                consumer.
+            kwargs: Any argument of `transcribe`.
+
+        Returns:
+          A tuple with:
+
+            - an async iterator over transcribed segments
+            - an instance of TranscriptionInfo
+        """
+        return await transcribe_async(
+            functools.partial(self.transcribe, audio, **kwargs),
+            executor or self.model._async_executor,
+            max_pending_segments,
+            self.model._async_decode_semaphore,
+        )
+
+    def transcribe_many(
+        self,
+        inputs: Iterable[Union[str, BinaryIO, np.ndarray]],
+        batch_size: Union[int, str] = 8,
+        log_progress: bool = False,
+        **kwargs,
+    ) -> Iterator[Tuple[List[Segment], TranscriptionInfo]]:
+        """Transcribes many audios, filling every batch regardless of the audio of the chunks.
+
+        The audios are prepared one after the other (audio decoding, VAD, language detection)
+        whenever fewer than batch_size chunks are waiting to be decoded. Each batch takes the
+        next batch_size chunks of this global queue, so that only the very last batch is
+        partly empty, and each chunk is decoded with the language of its audio. In
+        multilingual mode, the language lock only applies to the batches of a single audio.
+
+        Arguments:
+            inputs: Paths to the input files (or file-like objects), or audio waveforms.
+            batch_size: Number of chunks decoded together, or "auto" (see `transcribe`).
+            log_progress: whether to show progress bar or not.
+            kwargs: Any argument of `transcribe`, with a single task.
+
+        Returns:
+          An iterator over the transcribed segments and the TranscriptionInfo of each input,
+          in the order of the inputs. The segments of an input are yielded as soon as all its
+          chunks are decoded.
+        """
+        arguments = signature(self.transcribe).bind(None, **kwargs)
+        arguments.apply_defaults()
+        self._check_arguments(
+            batch_size,
+            arguments.arguments["prefetch_batches"],
+            arguments.arguments["vad_mode"],
+            arguments.arguments["speculative_encoding"],
+            arguments.arguments["batched_fallback"],
+            arguments.arguments["clip_encode_batch_size"],
+            arguments.arguments["parallel_regions"],
+        )
+        prepare_kwargs = {
+            name: arguments.arguments[name]
+            for name in signature(self._prepare_request).parameters
+            if name != "audio"
+        }
+        if not isinstance(prepare_kwargs["task"], str):
+            if len(prepare_kwargs["task"]) > 1:
+                raise ValueError("Multiple tasks are not supported by transcribe_many")
+            prepare_kwargs["task"] = prepare_kwargs["task"][0]
+
+        # The arguments are checked at the call, the inputs are only read when iterating.
+        return self._transcribe_many(
+            inputs,
+            prepare_kwargs,
             batch_size,
-            options,
+            arguments.arguments["prefetch_batches"],
             log_progress,
         )
-        if not clip_timestamps_provided:
-            segments = restore_speech_timestamps(
-                segments, clip_timestamps, sampling_rate
+
+    def _transcribe_many(
+        self,
+        inputs: Iterable[Union[str, BinaryIO, np.ndarray]],
+        prepare_kwargs: dict,
+        batch_size: Union[int, str],
+        prefetch_batches: int,
+        log_progress: bool,
+    ) -> Iterator[Tuple[List[Segment], TranscriptionInfo]]:
+        sampling_rate = self.model.feature_extractor.sampling_rate
+        # The prepared audios in order, until all their chunks are decoded.
+        requests = collections.deque()
+        decoded_batches = self._decode_batches(
+            inputs, prepare_kwargs, batch_size, requests
+        )
+        if prefetch_batches > 0:
+            decoded_batches = iterate_in_thread(decoded_batches, prefetch_batches)
+        pbar = tqdm(disable=not log_progress, position=0)
+
+        try:
+            # The last step yields the audios without speech at the end of the inputs.
+            for decoded_batch in itertools.chain(decoded_batches, [None]):
+                if decoded_batch is not None:
+                    batch = decoded_batch[0]
+                    key = self._batch_cost_key(batch[0][0])
+                    with self._measure_batch(batch_size, key, "segment", len(batch)):
+                        self._segment_batch(*decoded_batch)
+
+                while requests and requests[0].pending_chunks == 0:
+                    request = requests.popleft()
+                    segments = request.segments
+                    if request.speech_chunks is not None or request.time_scale != 1:
+                        segments = list(
+                            restore_speech_timestamps(
+                                segments,
+                                request.speech_chunks,
+                                sampling_rate,
+                                request.time_scale,
+                            )
+                        )
+                    pbar.update(1)
+                    yield segments, request.info
+        finally:
+            decoded_batches.close()
+
+        pbar.close()
+
+    def _decode_batches(
+        self,
+        inputs: Iterable[Union[str, BinaryIO, np.ndarray]],
+        prepare_kwargs: dict,
+        batch_size: Union[int, str],
+        requests: Deque[BatchedRequest],
+    ) -> Iterator[
+        Tuple[List[Tuple[BatchedRequest, int]], ctranslate2.StorageView, List[dict]]
+    ]:
+        """Prepares the audios whenever fewer than batch_size chunks are waiting, and decodes
+        the chunks in batches of batch_size whatever their audio.
+
+        The prepared audios are appended to requests. Yields the chunks of each batch as
+        (request, chunk index) tuples with the outputs of generate_segment_batched.
+        """
+        inputs = iter(inputs)
+        chunks = collections.deque()
+        exhausted = False
+        # All the requests share the options, hence the cost key.
+        key = None
+        max_batch_size = (
+            batch_size if batch_size != "auto" else self.batch_size_tuner.max_batch_size
+        )
+
+        while True:
+            while not exhausted and len(chunks) < max_batch_size:
+                audio = next(inputs, None)
+                if audio is None:
+                    exhausted = True
+                    break
+                request = self._prepare_request(audio, **prepare_kwargs)
+                request.pending_chunks = len(request.features)
+                requests.append(request)
+                chunks.extend((request, i) for i in range(len(request.features)))
+                if key is None and len(request.features) > 0:
+                    key = self._batch_cost_key(request)
+
+            if not chunks:
+                return
+
+            size = self._next_batch_size(batch_size, key, len(chunks))
+            batch = [chunks.popleft() for _ in range(size)]
+            first_request = batch[0][0]
+            single_request = all(request is first_request for request, _ in batch)
+            with self._measure_batch(batch_size, key, "decode", size):
+                encoder_output, outputs = self.generate_segment_batched(
+                    np.stack([request.features[i] for request, i in batch]),
+                    first_request.tokenizer,
+                    first_request.options,
+                    first_request.language_lock if single_request else None,
+                    languages=[request.tokenizer.language_code for request, _ in batch],
+                )
+            yield batch, encoder_output, outputs
+
+    def _segment_batch(
+        self,
+        batch: List[Tuple[BatchedRequest, int]],
+        encoder_output: ctranslate2.StorageView,
+        outputs: List[dict],
+    ) -> None:
+        """Splits the outputs of a batch of chunks of different audios into segments and
+        appends them to the request of each chunk.
+        """
+        single_request = all(request is batch[0][0] for request, _ in batch)
+        encoder_output_array = None
+        row = 0
+        for _, group in itertools.groupby(batch, key=lambda chunk: id(chunk[0])):
+            group = list(group)
+            request = group[0][0]
+            rows = slice(row, row + len(group))
+            row += len(group)
+
+            chunks_metadata = [request.chunks_metadata[i] for _, i in group]
+            request.info.windows.extend(
+                self._get_window_info(chunk_metadata, output)
+                for chunk_metadata, output in zip(chunks_metadata, outputs[rows])
             )
 
-        return segments, info
+            segmented_outputs = []
+            segment_sizes = []
+            for chunk_metadata, output in zip(chunks_metadata, outputs[rows]):
+                subsegments, segment_size = self._split_output(
+                    request.tokenizer, chunk_metadata, output
+                )
+                segmented_outputs.append(subsegments)
+                segment_sizes.append(segment_size)
+
+            if request.options.word_timestamps:
+                # The words are aligned with the tokenizer of the audio.
+                if single_request:
+                    group_encoder_output = encoder_output
+                else:
+                    if encoder_output_array is None:
+                        encoder_output_array = get_numpy_array(encoder_output)
+                    group_encoder_output = get_ctranslate2_storage(
+                        encoder_output_array[rows]
+                    )
+                request.last_speech_timestamp = self.model.add_word_timestamps(
+                    segmented_outputs,
+                    request.tokenizer,
+                    group_encoder_output,
+                    segment_sizes,
+                    request.options.prepend_punctuations,
+                    request.options.append_punctuations,
+                    request.last_speech_timestamp,
+                )
+
+            for subsegments in segmented_outputs:
+                for segment in subsegments:
+                    request.segments.append(
+                        get_batched_segment(
+                            segment, len(request.segments) + 1, request.options
+                        )
+                    )
+            request.pending_chunks -= len(group)
+
+    def transcribe_clips(
+        self,
+        clips: Sequence[Union[str, BinaryIO, np.ndarray]],
+        separator_duration: float = 1.0,
+        max_clips_per_window: Optional[int] = None,
+        **kwargs,
+    ) -> List[List[Segment]]:
+        """Transcribes many short clips by packing them into shared windows.
+
+        The clips are concatenated in order with silence separators into windows of at
+        most chunk_length seconds, so that the encoder does not process a padded window for
+        each clip. The windows are transcribed with word timestamps, each word is assigned to
+        the clip containing its middle, and a segment whose words belong to several clips is
+        split at the clip boundaries. The timestamps are relative to the start of the clip.
+        The word alignment runs even when word_timestamps is False, and the tokens of a
+        split segment are encoded again from the text of each part.
+
+        Arguments:
+            clips: Paths to the input files (or file-like objects), or audio waveforms. Each
+                clip must be shorter than chunk_length.
+            separator_duration: Duration in seconds of the silence between two clips.
+            max_clips_per_window: Maximum number of clips in a window. 1 transcribes each
+                clip in its own window.
+            kwargs: Any argument of `transcribe` except vad_filter, clip_timestamps and
+                without_timestamps.
+
+        Returns:
+          The list of transcribed segments of each clip.
+        """
+        sampling_rate = self.model.feature_extractor.sampling_rate
+        max_window_size = (
+            kwargs.get("chunk_length") or self.model.feature_extractor.chunk_length
+        ) * sampling_rate
+        separator = np.zeros(int(separator_duration * sampling_rate), dtype=np.float32)
+
+        pieces = []
+        windows = []
+        window_clips = []
+        clip_spans = []
+        position = window_start = num_window_clips = 0
+        for i, clip in enumerate(clips):
+            if not isinstance(clip, np.ndarray):
+                clip = decode_audio(clip, sampling_rate=sampling_rate)
+            if clip.shape[0] > max_window_size:
+                raise ValueError(
+                    "Clip %d is longer than %d seconds"
+                    % (i, max_window_size // sampling_rate)
+                )
+
+            if num_window_clips > 0 and (
+                position + separator.shape[0] + clip.shape[0] - window_start
+                > max_window_size
+                or num_window_clips == max_clips_per_window
+            ):
+                windows.append((window_start, position))
+                window_clips.append(num_window_clips)
+                window_start = position
+                num_window_clips = 0
+            if num_window_clips > 0:
+                pieces.append(separator)
+                position += separator.shape[0]
+
+            clip_spans.append((position, position + clip.shape[0]))
+            pieces.append(clip)
+            position += clip.shape[0]
+            num_window_clips += 1
+
+        if num_window_clips > 0:
+            windows.append((window_start, position))
+            window_clips.append(num_window_clips)
+        if not clip_spans:
+            return []
+
+        word_timestamps = kwargs.pop("word_timestamps", False)
+        segments, _ = self.transcribe(
+            np.concatenate(pieces).astype(np.float32),
+            vad_filter=False,
+            clip_timestamps=[
+                {"start": start / sampling_rate, "end": end / sampling_rate}
+                for start, end in windows
+            ],
+            without_timestamps=False,
+            word_timestamps=True,
+            **kwargs,
+        )
+
+        clip_starts = np.array([start for start, _ in clip_spans]) / sampling_rate
+        clip_ends = np.array([end for _, end in clip_spans]) / sampling_rate
+        clip_segments = [[] for _ in clip_spans]
+
+        # The segment seek is the start of its window, up to the rounding of the offset.
+        window_seeks = np.array(
+            [
+                int(start / sampling_rate * self.model.frames_per_second)
+                for start, _ in windows
+            ]
+        )
+        first_window_clips = np.cumsum([0] + window_clips)
+
+        def add_segment(i: int, segment: Segment) -> None:
+            offset = clip_starts[i]
+            duration = clip_ends[i] - offset
+
+            def to_clip_time(timestamp: float, ndigits: int = 3) -> float:
+                return round(
+                    float(min(max(timestamp - offset, 0.0), duration)), ndigits
+                )
+
+            clip_segments[i].append(
+                replace(
+                    segment,
+                    id=len(clip_segments[i]) + 1,
+                    seek=0,
+                    start=to_clip_time(segment.start),
+                    end=to_clip_time(segment.end),
+                    words=(
+                        [
+                            replace(
+                                word,
+                                start=to_clip_time(word.start, 2),
+                                end=to_clip_time(word.end, 2),
+                            )
+                            for word in segment.words
+                        ]
+                        if word_timestamps and segment.words is not None
+                        else None
+                    ),
+                )
+            )
+
+        for segment in segments:
+            window = np.searchsorted(window_seeks, segment.seek + 1, side="right") - 1
+            first = first_window_clips[window]
+            last = first_window_clips[window + 1]
+
+            if not segment.words:
+                overlaps = np.minimum(clip_ends[first:last], segment.end) - np.maximum(
+                    clip_starts[first:last], segment.start
+                )
+                add_segment(first + int(np.argmax(overlaps)), segment)
+                continue
+
+            # A word in a separator belongs to the clip after it.
+            word_clips = first + np.minimum(
+                np.searchsorted(
+                    clip_ends[first:last],
+                    [(word.start + word.end) / 2 for word in segment.words],
+                ),
+                last - first - 1,
+            )
+            parts = [
+                (int(i), [word for _, word in group])
+                for i, group in itertools.groupby(
+                    zip(word_clips, segment.words), key=lambda item: item[0]
+                )
+            ]
+            if len(parts) == 1:
+                add_segment(parts[0][0], segment)
+                continue
+
+            for i, words in parts:
+                text = "".join(word.word for word in words)
+                add_segment(
+                    i,
+                    replace(
+                        segment,
+                        text=text,
+                        start=words[0].start,
+                        end=words[-1].end,
+                        tokens=self.model.hf_tokenizer.encode(
+                            text, add_special_tokens=False
+                        ).ids,
+                        words=words,
+                    ),
+                )
+
+        return clip_segments
 
     def _batched_segments_generator(
-        self, features, tokenizer, chunks_metadata, batch_size, options, log_progress
+        self,
+        request: BatchedRequest,
+        batch_size: Union[int, str],
+        log_progress: bool,
+        prefetch_batches: int = 0,
+    ) -> Iterator[Tuple[Optional[str], Segment]]:
+        """Yields the segments of each task as (task, segment) tuples."""
+        options = request.options
+        tasks = request.tasks
+        pbar = tqdm(total=len(request.features), disable=not log_progress, position=0)
+        seg_idx = collections.Counter()
+        key = self._batch_cost_key(request)
+        decoded_batches = self._decode_request_batches(request, batch_size, key)
+        if prefetch_batches > 0:
+            # The next batches are encoded and decoded while this thread splits, aligns
+            # and yields the segments of the current batch.
+            decoded_batches = iterate_in_thread(decoded_batches, prefetch_batches)
+
+        try:
+            for start, end, encoder_output, outputs in decoded_batches:
+                num_chunks = end - start
+                with self._measure_batch(batch_size, key, "segment", num_chunks):
+                    results = self._segment_outputs(
+                        request,
+                        encoder_output,
+                        outputs,
+                        request.chunks_metadata[start:end],
+                    )
+
+                for j, result in enumerate(results):
+                    task = tasks[j // num_chunks] if tasks is not None else None
+                    for segment in result:
+                        seg_idx[task] += 1
+                        yield task, get_batched_segment(segment, seg_idx[task], options)
+
+                    if j < num_chunks:
+                        pbar.update(1)
+        finally:
+            decoded_batches.close()
+
+        pbar.close()
+
+    def _decode_request_batches(
+        self, request: BatchedRequest, batch_size: Union[int, str], key: Hashable
+    ) -> Iterator[Tuple[int, int, ctranslate2.StorageView, List[dict]]]:
+        """Decodes the chunks of the request in batches and yields the range of chunks of
+        each batch with the outputs of generate_segment_batched.
+        """
+        start = 0
+        while start < len(request.features):
+            end = start + self._next_batch_size(
+                batch_size, key, len(request.features) - start
+            )
+            with self._measure_batch(batch_size, key, "decode", end - start):
+                encoder_output, outputs = self.generate_segment_batched(
+                    request.features[start:end],
+                    request.tokenizer,
+                    request.options,
+                    request.language_lock,
+                    request.tasks,
+                )
+            yield start, end, encoder_output, outputs
+            start = end
+
+
+class CascadePipeline:
+    """Transcribes with a small draft model and decodes the uncertain windows again with
+    the main model.
+
+    Every window is first decoded by the draft model. A window is escalated to the main
+    model when the accepted decoding of the draft model has an average log probability
+    lower than log_prob_threshold, a compression ratio higher than
+    compression_ratio_threshold or a no speech probability higher than
+    no_speech_threshold. The main model then encodes and decodes the audio consumed by
+    this window, so the segments keep the timeline and the seek positions of the draft
+    pass.
+    """
+
+    def __init__(
+        self,
+        model: "WhisperModel",
+        draft_model: "WhisperModel",
+        log_prob_threshold: Optional[float] = -0.5,
+        compression_ratio_threshold: Optional[float] = 2.0,
+        no_speech_threshold: Optional[float] = 0.5,
     ):
-        pbar = tqdm(total=len(features), disable=not log_progress, position=0)
-        seg_idx = 0
-        for i in range(0, len(features), batch_size):
-            results = self.forward(
-                features[i : i + batch_size],
-                tokenizer,
-                chunks_metadata[i : i + batch_size],
-                options,
+        """Initializes the cascade.
+
+        Args:
+          model: Main model, decoding the escalated windows.
+          draft_model: Cheaper model decoding every window first.
+          log_prob_threshold: Escalate a window if its average log probability is lower
+            than this value. Disabled if None.
+          compression_ratio_threshold: Escalate a window if its compression ratio is higher
+            than this value. Disabled if None.
+          no_speech_threshold: Escalate a window if its no speech probability is higher
+            than this value. Disabled if None.
+        """
+        self.model = model
+        self.draft_model = draft_model
+        self.log_prob_threshold = log_prob_threshold
+        self.compression_ratio_threshold = compression_ratio_threshold
+        self.no_speech_threshold = no_speech_threshold
+
+    def transcribe(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        vad_filter: bool = False,
+        vad_parameters: Optional[Union[dict, VadOptions]] = None,
+        time_scale: float = 1.0,
+        **kwargs,
+    ) -> Tuple[Iterable[Segment], TranscriptionInfo]:
+        """Transcribes an input file with the cascade.
+
+        Arguments:
+          audio: Path to the input file (or a file-like object), or the audio waveform.
+          vad_filter: Enable the voice activity detection (VAD) to filter out parts of the audio
+            without speech. The speech chunks are concatenated and both models transcribe
+            the same concatenated audio.
+          vad_parameters: Dictionary of Silero VAD parameters or VadOptions class (see available
+            parameters and default values in the class `VadOptions`).
+          time_scale: Speed up the audio by this factor before the transcription, see
+            `WhisperModel.transcribe`. Both models transcribe the same stretched audio.
+          kwargs: Any argument of `WhisperModel.transcribe`, used by both models.
+
+        Returns:
+          A tuple with:
+
+            - a generator over transcribed segments
+            - an instance of TranscriptionInfo of the draft pass, where the windows decoded
+              by the main model are marked as escalated
+        """
+        if kwargs.pop("vad_mode", "concatenate") != "concatenate":
+            raise ValueError("CascadePipeline only supports the 'concatenate' VAD mode")
+
+        sampling_rate = self.draft_model.feature_extractor.sampling_rate
+        if not isinstance(audio, np.ndarray):
+            audio = decode_audio(audio, sampling_rate=sampling_rate)
+        duration = audio.shape[0] / sampling_rate
+
+        speech_chunks = None
+        if vad_filter and kwargs.get("clip_timestamps", "0") == "0":
+            if vad_parameters is None:
+                vad_parameters = VadOptions()
+            elif isinstance(vad_parameters, dict):
+                vad_parameters = VadOptions(**vad_parameters)
+            speech_chunks = get_speech_timestamps(audio, vad_parameters)
+            audio_chunks, _ = collect_chunks(audio, speech_chunks)
+            audio = np.concatenate(audio_chunks, axis=0)
+
+        if time_scale != 1:
+            audio = time_stretch(audio, time_scale, sampling_rate)
+            if "clip_timestamps" in kwargs:
+                kwargs["clip_timestamps"] = scale_clip_timestamps(
+                    kwargs["clip_timestamps"], time_scale
+                )
+
+        draft_segments, info = self.draft_model.transcribe(audio, **kwargs)
+        info.duration = duration
+        info.vad_options = vad_parameters
+
+        segments = self._generate_segments(audio, draft_segments, info, kwargs)
+        if speech_chunks or time_scale != 1:
+            segments = restore_speech_timestamps(
+                segments, speech_chunks, sampling_rate, time_scale
             )
 
-            for result in results:
-                for segment in result:
-                    seg_idx += 1
-                    yield Segment(
-                        seek=segment["seek"],
-                        id=seg_idx,
-                        text=segment["text"],
-                        start=round(segment["start"], 3),
-                        end=round(segment["end"], 3),
-                        words=(
-                            None
-                            if not options.word_timestamps
-                            else [Word(**word) for word in segment["words"]]
-                        ),
-                        tokens=segment["tokens"],
-                        avg_logprob=segment["avg_logprob"],
-                        no_speech_prob=segment["no_speech_prob"],
-                        compression_ratio=segment["compression_ratio"],
-                        temperature=options.temperatures[0],
+        return segments, info
+
+    def _generate_segments(
+        self,
+        audio: np.ndarray,
+        draft_segments: Iterable[Segment],
+        info: TranscriptionInfo,
+        kwargs: dict,
+    ) -> Iterable[Segment]:
+        windows = info.windows
+        pending = collections.defaultdict(list)
+        num_resolved = 0
+        previous_text = None
+        idx = 0
+
+        for segment in itertools.chain(draft_segments, [None]):
+            # The draft segments are yielded after their window was added to the list, so
+            # all the previous windows are complete.
+            num_complete = len(windows) if segment is None else len(windows) - 1
+            while num_resolved < num_complete:
+                window_segments = pending.pop(num_resolved, [])
+                if self._should_escalate(windows[num_resolved]):
+                    window_segments = self._decode_window(
+                        audio, info, num_resolved, previous_text, kwargs
                     )
+                if window_segments:
+                    previous_text = "".join(s.text for s in window_segments)
+                for window_segment in window_segments:
+                    idx += 1
+                    window_segment.id = idx
+                    yield window_segment
+                num_resolved += 1
+
+            if segment is not None:
+                pending[len(windows) - 1].append(segment)
+
+        self.model.logger.debug(
+            "Escalated %d/%d windows to the main model",
+            sum(window.escalated for window in windows),
+            len(windows),
+        )
 
-                pbar.update(1)
+    def _should_escalate(self, window: WindowInfo) -> bool:
+        return (
+            (
+                self.log_prob_threshold is not None
+                and window.avg_logprob < self.log_prob_threshold
+            )
+            or (
+                self.compression_ratio_threshold is not None
+                and window.compression_ratio > self.compression_ratio_threshold
+            )
+            or (
+                self.no_speech_threshold is not None
+                and window.no_speech_prob > self.no_speech_threshold
+            )
+        )
+
+    def _decode_window(
+        self,
+        audio: np.ndarray,
+        info: TranscriptionInfo,
+        index: int,
+        previous_text: Optional[str],
+        kwargs: dict,
+    ) -> List[Segment]:
+        window = info.windows[index]
+        window.escalated = True
+
+        # The window only covers the audio consumed by the draft model.
+        end = window.start + window.duration
+        if index + 1 < len(info.windows):
+            end = min(end, info.windows[index + 1].start)
+
+        sampling_rate = self.model.feature_extractor.sampling_rate
+        window_audio = audio[
+            round(window.start * sampling_rate) : round(end * sampling_rate)
+        ]
+
+        window_kwargs = dict(
+            kwargs,
+            language=window.language or info.language,
+            clip_timestamps="0",
+        )
+        if window.seek != 0:
+            window_kwargs.pop("prefix", None)
+        if previous_text and kwargs.get("condition_on_previous_text", True):
+            window_kwargs["initial_prompt"] = previous_text
+
+        segments, _ = self.model.transcribe(window_audio, **window_kwargs)
+        segments = list(segments)
+        for segment in segments:
+            segment.seek += window.seek
+            segment.start += window.start
+            segment.end += window.start
+            for word in segment.words or []:
+                word.start += window.start
+                word.end += window.start
+
+        return segments
+
+
+@dataclass
+class StreamingUpdate:
+    """Segments returned by `StreamingTranscriber.push` and `StreamingTranscriber.flush`.
+
+    Attributes:
+      stable: Segments committed by this call, in order. They are final: they are never
+        returned again nor changed by later calls.
+      provisional: Current hypothesis for the audio after the stable segments. It is
+        replaced by the provisional segments of the next call.
+    """
+
+    stable: List[Segment]
+    provisional: List[Segment]
+
+
+@dataclass
+class StreamingMetrics:
+    """Metrics of a StreamingTranscriber.
+
+    Attributes:
+      audio_duration: Duration in seconds of the audio pushed so far.
+      processing_time: Time in seconds spent decoding the buffer.
+      num_decodes: Number of decodings of the buffer.
+      decoded_duration: Total duration in seconds of the decoded buffers. The audio after
+        the last stable segment is decoded again on every decoding.
+      forced_commits: Number of commits of segments without agreement, because the buffer
+        exceeded max_buffer_duration.
+      latencies: Delay in seconds of each stable segment, between the end of the segment
+        and the end of the audio pushed when it was committed.
+    """
+
+    audio_duration: float = 0.0
+    processing_time: float = 0.0
+    num_decodes: int = 0
+    decoded_duration: float = 0.0
+    forced_commits: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def real_time_factor(self) -> float:
+        """Processing time per second of pushed audio."""
+        return (
+            self.processing_time / self.audio_duration if self.audio_duration else 0.0
+        )
+
+    @property
+    def redecode_factor(self) -> float:
+        """Number of times each second of pushed audio was decoded on average."""
+        return (
+            self.decoded_duration / self.audio_duration if self.audio_duration else 0.0
+        )
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        """Mean delay of the stable segments, None before the first one."""
+        return sum(self.latencies) / len(self.latencies) if self.latencies else None
+
+
+class StreamingTranscriber:
+    """Transcribes an audio stream pushed in small pieces, e.g. for live captioning.
+
+    The pushed audio is appended to a buffer starting at the end of the last stable
+    segment. Whenever min_chunk_duration seconds of new audio are buffered, the whole
+    buffer is transcribed again with the text of the last stable segments as prompt. The
+    leading segments of the hypothesis which have the same words in the last `agreement`
+    hypotheses are committed as stable (local agreement), except the last segment of the
+    hypothesis which may still grow. The buffer is then trimmed at the end of the last
+    stable segment, so that only the uncommitted audio is decoded again. If the buffer
+    exceeds max_buffer_duration without agreement, all the segments of the hypothesis but
+    the last one are committed anyway.
+
+    Example:
+      streamer = StreamingTranscriber(model, language="en")
+      for audio_chunk in microphone:
+          update = streamer.push(audio_chunk)
+          print(update.stable, update.provisional)
+      print(streamer.flush().stable)
+    """
+
+    def __init__(
+        self,
+        model: "WhisperModel",
+        min_chunk_duration: float = 1.0,
+        max_buffer_duration: float = 20.0,
+        agreement: int = 2,
+        **kwargs,
+    ):
+        """Initializes the streaming transcriber.
+
+        Args:
+          model: WhisperModel instance.
+          min_chunk_duration: Minimum duration in seconds of new audio before the buffer is
+            decoded again.
+          max_buffer_duration: Commit the segments without agreement when the buffer is
+            longer than this duration in seconds. It must be shorter than chunk_length so
+            that the buffer fits in a single window.
+          agreement: Number of consecutive hypotheses which must agree on a segment to
+            commit it. 1 commits every segment but the last one of each hypothesis.
+          kwargs: Any argument of `WhisperModel.transcribe` except clip_timestamps. The
+            initial_prompt is only used until the first segment is committed, and the
+            language detected on the first committed segments is used afterwards if
+            language is not set.
+        """
+        if agreement < 1:
+            raise ValueError("agreement must be at least 1")
+        self.model = model
+        self.min_chunk_duration = min_chunk_duration
+        self.max_buffer_duration = max_buffer_duration
+        self.agreement = agreement
+        self.transcribe_kwargs = kwargs
+        self.metrics = StreamingMetrics()
+
+        self._sampling_rate = model.feature_extractor.sampling_rate
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_offset = 0.0
+        self._num_samples = 0
+        self._num_decoded_samples = 0
+        self._num_stable = 0
+        # The stable texts used as prompt, the prompt is truncated by the model anyway.
+        self._prompt = collections.deque(maxlen=8)
+        # The words of the segments of the last hypotheses, for the local agreement.
+        self._history = collections.deque(maxlen=agreement - 1)
+        self._provisional = []
+
+    def push(self, audio: np.ndarray) -> StreamingUpdate:
+        """Appends audio sampled at 16kHz to the stream and decodes the buffer if enough
+        new audio was pushed since the last decoding.
+
+        Returns:
+          The segments committed by this call and the current provisional segments.
+        """
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        self._buffer = np.concatenate([self._buffer, audio])
+        self._num_samples += audio.shape[0]
+        self.metrics.audio_duration = self._num_samples / self._sampling_rate
+
+        new_samples = self._num_samples - self._num_decoded_samples
+        if new_samples < self.min_chunk_duration * self._sampling_rate:
+            return StreamingUpdate(stable=[], provisional=self._provisional)
+        return self._process(final=False)
+
+    def flush(self) -> StreamingUpdate:
+        """Commits the rest of the stream, e.g. when it ends. The transcriber can then be
+        used for a new stream continuing the timeline.
+
+        Returns:
+          The segments committed by this call, without provisional segments.
+        """
+        if self._buffer.shape[0] == 0:
+            self._provisional = []
+            return StreamingUpdate(stable=[], provisional=[])
+
+        update = self._process(final=True)
+        self._buffer = self._buffer[:0]
+        self._buffer_offset = self._num_samples / self._sampling_rate
+        return update
+
+    def _process(self, final: bool) -> StreamingUpdate:
+        hypothesis, info = self._decode()
+        words = [get_words_to_agree(segment) for segment in hypothesis]
+
+        if final:
+            num_stable = len(hypothesis)
+        else:
+            num_stable = 0
+            if len(self._history) == self.agreement - 1:
+                for segment_words in words[:-1]:
+                    if any(
+                        len(previous) <= num_stable
+                        or previous[num_stable] != segment_words
+                        for previous in self._history
+                    ):
+                        break
+                    num_stable += 1
+
+            buffer_duration = self._buffer.shape[0] / self._sampling_rate
+            if num_stable == 0 and buffer_duration > self.max_buffer_duration:
+                if hypothesis:
+                    self.metrics.forced_commits += 1
+                    num_stable = max(len(hypothesis) - 1, 1)
+                else:
+                    # No speech: only keep the last min_chunk_duration seconds.
+                    self._trim(
+                        self._num_samples / self._sampling_rate
+                        - self.min_chunk_duration
+                    )
+
+        stable = hypothesis[:num_stable]
+        self._provisional = [] if final else hypothesis[num_stable:]
+        if num_stable > 0 or final:
+            self._history.clear()
+        if num_stable > 0:
+            self._trim(stable[-1].end)
+        if not final:
+            self._history.append(words[num_stable:])
+
+        stream_end = self._num_samples / self._sampling_rate
+        for segment in stable:
+            self._num_stable += 1
+            segment.id = self._num_stable
+            self._prompt.append(segment.text)
+            self.metrics.latencies.append(max(stream_end - segment.end, 0.0))
+
+        if stable and self.transcribe_kwargs.get("language") is None:
+            self.transcribe_kwargs["language"] = info.language
+
+        return StreamingUpdate(stable=stable, provisional=self._provisional)
+
+    def _decode(self) -> Tuple[List[Segment], TranscriptionInfo]:
+        """Transcribes the buffer and returns the segments in the stream timeline."""
+        kwargs = dict(self.transcribe_kwargs)
+        if self._prompt:
+            kwargs["initial_prompt"] = "".join(self._prompt)
+
+        start_time = time.perf_counter()
+        segments, info = self.model.transcribe(self._buffer, **kwargs)
+        segments = list(segments)
+        self.metrics.processing_time += time.perf_counter() - start_time
+        self.metrics.num_decodes += 1
+        self.metrics.decoded_duration += self._buffer.shape[0] / self._sampling_rate
+        self._num_decoded_samples = self._num_samples
+
+        # The timestamps are clamped to the buffer, which is trimmed at the stable ends.
+        offset = self._buffer_offset
+        end = self._buffer.shape[0] / self._sampling_rate
+        seek_offset = round(offset * self.model.frames_per_second)
+        return [
+            replace(
+                segment,
+                seek=segment.seek + seek_offset,
+                start=round(min(segment.start, end) + offset, 3),
+                end=round(min(segment.end, end) + offset, 3),
+                words=(
+                    [
+                        replace(
+                            word,
+                            start=round(min(word.start, end) + offset, 2),
+                            end=round(min(word.end, end) + offset, 2),
+                        )
+                        for word in segment.words
+                    ]
+                    if segment.words is not None
+                    else None
+                ),
+            )
+            for segment in segments
+        ], info
+
+    def _trim(self, timestamp: float) -> None:
+        """Removes the buffered audio before timestamp (in the stream timeline)."""
+        num_samples = round((timestamp - self._buffer_offset) * self._sampling_rate)
+        num_samples = min(max(num_samples, 0), self._buffer.shape[0])
+        self._buffer = self._buffer[num_samples:]
+        self._buffer_offset += num_samples / self._sampling_rate
 
-        pbar.close()
-        self.last_speech_timestamp = 0.0
+
+def get_words_to_agree(segment: Segment) -> List[str]:
+    """Returns the lowercase words of a segment without punctuation, so that hypotheses
+    only differing by the punctuation or the case agree.
+    """
+    return re.sub(r"[^\w\s']", " ", segment.text.lower()).split()
 
 
 class WhisperModel:
@@ -631,6 +2422,8 @@ class WhisperModel:
         files: dict = None,
         revision: Optional[str] = None,
         use_auth_token: Optional[Union[str, bool]] = None,
+        dynamic_batch_size: int = 1,
+        dynamic_batch_max_wait: float = 0.005,
         **model_kwargs,
     ):
         """Initializes the Whisper model.
@@ -667,6 +2460,11 @@ class WhisperModel:
             commit hash.
           use_auth_token: HuggingFace authentication token or True to use the
             token stored by the HuggingFace config folder.
+          dynamic_batch_size: When transcribe() is called from multiple Python threads,
+            the windows of the concurrent transcriptions are encoded and decoded together
+            in batches of up to this size (see BatchScheduler). 1 disables dynamic batching.
+          dynamic_batch_max_wait: Maximum time in seconds a window waits for windows of
+            other transcriptions to fill its batch.
         """
         self.logger = get_logger()
 
@@ -720,6 +2518,39 @@ class WhisperModel:
         )
         self.time_precision = 0.02
         self.max_length = 448
+        # Bounded executor preparing the transcriptions of transcribe_async, and bound on
+        # the number of their threads decoding segments at the same time.
+        self._async_executor = ThreadPoolExecutor(
+            max_workers=self.model.num_workers,
+            thread_name_prefix="faster_whisper",
+        )
+        self._async_decode_semaphore = threading.Semaphore(self.model.num_workers)
+        # Auxiliary language detection models loaded from a size or path, with the
+        # loading options of this model.
+        self._language_detection_models = {}
+        self._language_detection_models_lock = threading.Lock()
+        self._language_detection_model_kwargs = dict(
+            device=self.model.device,
+            device_index=self.model.device_index,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            download_root=download_root,
+            local_files_only=local_files_only,
+        )
+        self.scheduler = None
+        if dynamic_batch_size > 1:
+            self.scheduler = BatchScheduler(
+                self.model,
+                self.hf_tokenizer.token_to_id("<|startoftranscript|>"),
+                max_batch_size=dynamic_batch_size,
+                max_wait=dynamic_batch_max_wait,
+            )
+
+    def __del__(self):
+        if getattr(self, "scheduler", None) is not None:
+            self.scheduler.close()
+        if getattr(self, "_async_executor", None) is not None:
+            self._async_executor.shutdown(wait=False)
 
     @property
     def supported_languages(self) -> List[str]:
@@ -781,6 +2612,7 @@ class WhisperModel:
         multilingual: bool = False,
         vad_filter: bool = False,
         vad_parameters: Optional[Union[dict, VadOptions]] = None,
+        vad_mode: str = "concatenate",
         max_new_tokens: Optional[int] = None,
         chunk_length: Optional[int] = None,
         clip_timestamps: Union[str, List[float]] = "0",
@@ -788,6 +2620,18 @@ class WhisperModel:
         hotwords: Optional[str] = None,
         language_detection_threshold: Optional[float] = 0.5,
         language_detection_segments: int = 1,
+        speculative_encoding: bool = False,
+        batched_fallback: int = 0,
+        language_detection_model: Optional[Union[str, "WhisperModel"]] = None,
+        language_lock_windows: int = 0,
+        language_lock_interval: int = 0,
+        adaptive_beam: bool = False,
+        adaptive_beam_log_prob_threshold: Optional[float] = -0.5,
+        adaptive_beam_compression_ratio_threshold: Optional[float] = 2.0,
+        max_new_tokens_per_second: Optional[float] = None,
+        time_scale: float = 1.0,
+        clip_encode_batch_size: int = 8,
+        parallel_regions: int = 1,
     ) -> Tuple[Iterable[Segment], TranscriptionInfo]:
         """Transcribes an input file.
 
@@ -841,6 +2685,10 @@ class WhisperModel:
             https://github.com/snakers4/silero-vad.
           vad_parameters: Dictionary of Silero VAD parameters or VadOptions class (see available
             parameters and default values in the class `VadOptions`).
+          vad_mode: How the VAD output is applied when vad_filter is True. "concatenate"
+            stitches the speech chunks together before computing the features, "seek" keeps
+            the original audio and converts the speech chunks into clip timestamps so that
+            the windows without speech are skipped.
           max_new_tokens: Maximum number of new tokens to generate per-chunk. If not set,
             the maximum will be set by the default max_length.
           chunk_length: The length of audio segments. If it is not None, it will overwrite the
@@ -857,6 +2705,61 @@ class WhisperModel:
           language_detection_threshold: If the maximum probability of the language tokens is higher
            than this value, the language is detected.
           language_detection_segments: Number of segments to consider for the language detection.
+          speculative_encoding: Encode the next window on a background thread while the current
+            window is being decoded, assuming the decoding will move to the end of the current
+            window. The prefetched encoder output is only used if the prediction was correct,
+            see `TranscriptionInfo.windows` for the hit rate. The encoding can only overlap with
+            the decoding when the model has more than one worker (see `num_workers`).
+          batched_fallback: Number of fallback temperatures submitted together with the first
+            temperature, so that they are decoded concurrently instead of only after the
+            previous temperature failed. The first acceptable result in temperature order is
+            kept, the remaining temperatures are decoded sequentially as needed. The fallback
+            level used by each window is reported in `TranscriptionInfo.windows`.
+            The fallbacks are only submitted ahead for the window following a window that
+            fell back, or up to the number of idle model workers. Each submitted fallback is
+            a full sampling decode (`best_of` hypotheses) that runs to completion even when
+            the first temperature passes, so up to `batched_fallback` extra decodes are paid
+            per window and they delay the next window when there are not enough idle workers.
+          language_detection_model: Smaller multilingual model (a WhisperModel instance, or a
+            size or path to load one) that detects the language instead of this model.
+            See `detect_language`.
+          language_lock_windows: When multilingual is True, stop detecting the language of
+            every window after this number of consecutive windows confidently detected with the
+            same language (see `language_detection_threshold`). The lock is released when a
+            window fails the `log_prob_threshold` or `compression_ratio_threshold` checks.
+            0 detects the language of every window.
+          language_lock_interval: While the language is locked, detect it again every this
+            number of windows. 0 never detects it while locked. The language used for each
+            window is reported in `TranscriptionInfo.windows`.
+          adaptive_beam: Decode each window greedily first, and only decode it again with
+            `beam_size` on the same encoder output if the greedy result is outside the band
+            set by `adaptive_beam_log_prob_threshold` and
+            `adaptive_beam_compression_ratio_threshold`, or needs a fallback. The windows that
+            needed the beam search are reported in `TranscriptionInfo.windows`.
+          adaptive_beam_log_prob_threshold: Reject the greedy result if its average log
+            probability is lower than this value.
+          adaptive_beam_compression_ratio_threshold: Reject the greedy result if its
+            compression ratio is higher than this value.
+          max_new_tokens_per_second: Cap the number of tokens decoded for each window to this
+            rate times the speech duration of the window (at least one second), estimated
+            from the frame energy. A decoding reaching the cap, typically a repetition loop,
+            triggers a fallback instead of running to the maximum length. The caps are
+            reported in `TranscriptionInfo.windows`.
+          time_scale: Speed up the audio by this factor with a pitch-preserving time stretch
+            applied after the VAD, e.g. 1.25 to 1.5 for clean and slow speech, so that fewer
+            windows are encoded and decoded. The segment and word timestamps are scaled back
+            to the original audio, but `TranscriptionInfo.windows` and the segment seek
+            positions are relative to the stretched audio.
+          clip_encode_batch_size: When clip_timestamps lists clips shorter than a window, encode
+            the first window of up to this number of upcoming clips in a single call. These
+            windows start at the clip starts whatever the decoding, and the encoder output does
+            not depend on the prompt. 1 encodes each window separately.
+          parallel_regions: When vad_filter is True, cut the audio at the longest silences into
+            up to this number of regions of similar speech duration. Each region is transcribed
+            by its own sequential loop, without conditioning on the text of the previous
+            regions, and up to `num_workers` regions are decoded concurrently. The segments
+            are still yielded in order, as soon as the previous regions are complete. The
+            initial_prompt and prefix only apply to the first region.
         Returns:
           A tuple with:
 
@@ -865,6 +2768,12 @@ class WhisperModel:
         """
         sampling_rate = self.feature_extractor.sampling_rate
 
+        if not isinstance(task, str):
+            # The next window depends on the timestamps decoded for each task.
+            raise ValueError(
+                "Multiple tasks are only supported by BatchedInferencePipeline"
+            )
+
         if multilingual and not self.model.is_multilingual:
             self.logger.warning(
                 "The current model is English-only but the multilingual parameter is set to"
@@ -882,15 +2791,51 @@ class WhisperModel:
             "Processing audio with duration %s", format_timestamp(duration)
         )
 
+        if vad_mode not in ("concatenate", "seek"):
+            raise ValueError(
+                "'%s' is not a valid VAD mode (accepted modes: concatenate, seek)"
+                % vad_mode
+            )
+
         if vad_filter and clip_timestamps == "0":
             if vad_parameters is None:
                 vad_parameters = VadOptions()
             elif isinstance(vad_parameters, dict):
                 vad_parameters = VadOptions(**vad_parameters)
             speech_chunks = get_speech_timestamps(audio, vad_parameters)
-            audio_chunks, chunks_metadata = collect_chunks(audio, speech_chunks)
-            audio = np.concatenate(audio_chunks, axis=0)
-            duration_after_vad = audio.shape[0] / sampling_rate
+            speech_regions = split_speech_chunks(speech_chunks, parallel_regions)
+
+            if vad_mode == "seek" and speech_chunks:
+                # The clips do not span the silences between two regions.
+                clip_timestamps = [
+                    timestamp
+                    for region_chunks in speech_regions
+                    for timestamp in get_clip_timestamps(
+                        region_chunks,
+                        sampling_rate,
+                        max_duration=chunk_length
+                        or self.feature_extractor.chunk_length,
+                    )
+                ]
+                region_starts = [
+                    region_chunks[0]["start"] / sampling_rate
+                    for region_chunks in speech_regions[1:]
+                ]
+                duration_after_vad = (
+                    sum(chunk["end"] - chunk["start"] for chunk in speech_chunks)
+                    / sampling_rate
+                )
+            else:
+                audio_chunks, chunks_metadata = collect_chunks(audio, speech_chunks)
+                audio = np.concatenate(audio_chunks, axis=0)
+                duration_after_vad = audio.shape[0] / sampling_rate
+                region_starts = list(
+                    itertools.accumulate(
+                        sum(chunk["end"] - chunk["start"] for chunk in region_chunks)
+                        / sampling_rate
+                        for region_chunks in speech_regions[:-1]
+                    )
+                )
 
             self.logger.info(
                 "VAD filter removed %s of audio",
@@ -910,12 +2855,26 @@ class WhisperModel:
                     ),
                 )
 
+            if vad_mode == "seek":
+                # The timestamps are already relative to the original audio.
+                speech_chunks = None
+
         else:
             speech_chunks = None
+            region_starts = []
+
+        if time_scale != 1:
+            audio = time_stretch(audio, time_scale, sampling_rate)
+            clip_timestamps = scale_clip_timestamps(clip_timestamps, time_scale)
 
         features = self.feature_extractor(audio, chunk_length=chunk_length)
+        region_seeks = [
+            round(start / time_scale * self.frames_per_second)
+            for start in region_starts
+        ]
 
         encoder_output = None
+        encoder_output_features = None
         all_language_probs = None
 
         # detecting the language if not provided
@@ -935,15 +2894,41 @@ class WhisperModel:
                     if start_timestamp * self.frames_per_second < content_frames
                     else 0
                 )
-                (
-                    language,
-                    language_probability,
-                    all_language_probs,
-                ) = self.detect_language(
-                    features=features[..., seek:],
-                    language_detection_segments=language_detection_segments,
-                    language_detection_threshold=language_detection_threshold,
-                )
+                if language_detection_model is not None:
+                    # The auxiliary model computes its own features from the audio.
+                    (
+                        language,
+                        language_probability,
+                        all_language_probs,
+                    ) = self.detect_language(
+                        audio=audio[seek * self.feature_extractor.hop_length :],
+                        language_detection_segments=language_detection_segments,
+                        language_detection_threshold=language_detection_threshold,
+                        language_detection_model=language_detection_model,
+                    )
+                else:
+                    (
+                        language,
+                        language_probability,
+                        all_language_probs,
+                        encoder_output,
+                    ) = self.detect_language(
+                        features=features[..., seek:content_frames],
+                        language_detection_segments=language_detection_segments,
+                        language_detection_threshold=language_detection_threshold,
+                        return_encoder_output=True,
+                    )
+                    # The first window is not encoded again if it has the same features.
+                    # The window is sliced as in generate_segments, without the last frame.
+                    encoder_output_features = pad_or_trim(
+                        features[
+                            ...,
+                            seek : min(
+                                seek + self.feature_extractor.nb_max_frames,
+                                content_frames,
+                            ),
+                        ]
+                    )
 
                 self.logger.info(
                     "Detected language '%s' with probability %.2f",
@@ -1000,14 +2985,47 @@ class WhisperModel:
             clip_timestamps=clip_timestamps,
             hallucination_silence_threshold=hallucination_silence_threshold,
             hotwords=hotwords,
+            speculative_encoding=speculative_encoding,
+            batched_fallback=batched_fallback,
+            language_detection_threshold=language_detection_threshold,
+            language_lock_windows=language_lock_windows,
+            language_lock_interval=language_lock_interval,
+            adaptive_beam=adaptive_beam,
+            adaptive_beam_log_prob_threshold=adaptive_beam_log_prob_threshold,
+            adaptive_beam_compression_ratio_threshold=(
+                adaptive_beam_compression_ratio_threshold
+            ),
+            max_new_tokens_per_second=max_new_tokens_per_second,
+            clip_encode_batch_size=clip_encode_batch_size,
         )
 
-        segments = self.generate_segments(
-            features, tokenizer, options, log_progress, encoder_output
-        )
+        windows = []
+        if region_seeks:
+            segments = self._generate_region_segments(
+                features,
+                region_seeks,
+                tokenizer,
+                options,
+                log_progress,
+                encoder_output,
+                windows,
+                encoder_output_features,
+            )
+        else:
+            segments = self.generate_segments(
+                features,
+                tokenizer,
+                options,
+                log_progress,
+                encoder_output,
+                windows,
+                encoder_output_features,
+            )
 
-        if speech_chunks:
-            segments = restore_speech_timestamps(segments, speech_chunks, sampling_rate)
+        if speech_chunks or time_scale != 1:
+            segments = restore_speech_timestamps(
+                segments, speech_chunks, sampling_rate, time_scale
+            )
 
         info = TranscriptionInfo(
             language=language,
@@ -1017,9 +3035,46 @@ class WhisperModel:
             transcription_options=options,
             vad_options=vad_parameters,
             all_language_probs=all_language_probs,
+            windows=windows,
         )
 
-        return segments, info
+        return segments, info
+
+    async def transcribe_async(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        executor: Optional[Executor] = None,
+        max_pending_segments: int = 16,
+        **kwargs,
+    ) -> Tuple[AsyncIterator[Segment], TranscriptionInfo]:
+        """Asyncio version of `transcribe`.
+
+        The audio decoding, the VAD and the language detection run in a bounded executor.
+        The windows are then decoded by a thread dedicated to the call, which blocks while
+        max_pending_segments segments wait for the consumer, so that slow consumers do not
+        hold the workers of the executor. Each call starts a thread, but only as many
+        threads as the model has workers decode at the same time. Cancelling the task
+        iterating over the segments stops the transcription after the window being decoded.
+
+        Arguments:
+          audio: Path to the input file (or a file-like object), or the audio waveform.
+          executor: Executor preparing the transcription. If not set, the executor of the
+            model is used, which prepares as many transcriptions as the model has workers.
+          max_pending_segments: Maximum number of segments decoded in advance of the consumer.
+          kwargs: Any argument of `transcribe`.
+
+        Returns:
+          A tuple with:
+
+            - an async iterator over transcribed segments
+            - an instance of TranscriptionInfo
+        """
+        return await transcribe_async(
+            functools.partial(self.transcribe, audio, **kwargs),
+            executor or self._async_executor,
+            max_pending_segments,
+            self._async_decode_semaphore,
+        )
 
     def _split_segments_by_timestamps(
         self,
@@ -1107,7 +3162,15 @@ class WhisperModel:
         options: TranscriptionOptions,
         log_progress,
         encoder_output: Optional[ctranslate2.StorageView] = None,
+        windows: Optional[List[WindowInfo]] = None,
+        encoder_output_features: Optional[np.ndarray] = None,
     ) -> Iterable[Segment]:
+        """Transcribes the features window by window.
+
+        encoder_output is an already computed encoder output for the first window. If
+        encoder_output_features is set, it is only reused when the first window has the same
+        features, otherwise it is reused when the first window starts at the beginning.
+        """
         content_frames = features.shape[-1] - 1
         content_duration = float(content_frames * self.feature_extractor.time_per_frame)
 
@@ -1139,6 +3202,7 @@ class WhisperModel:
         seek = seek_clips[clip_idx][0]
         all_tokens = []
         prompt_reset_since = 0
+        previous_fallback = False
 
         if options.initial_prompt is not None:
             if isinstance(options.initial_prompt, str):
@@ -1148,245 +3212,597 @@ class WhisperModel:
             else:
                 all_tokens.extend(options.initial_prompt)
 
+        initial_encoder_output = encoder_output
+        # Encoder outputs of the first windows of the upcoming short clips.
+        encoded_clips = {}
+        language_lock = LanguageLock(options)
+        executor = (
+            ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="faster_whisper_encode"
+            )
+            if options.speculative_encoding
+            else None
+        )
+        prefetch = None
+
+        def prefetch_window(
+            next_seek: int, prefetch: Optional[tuple]
+        ) -> Optional[tuple]:
+            # Speculatively encode the window the loop would visit from next_seek.
+            next_window = self._get_window(
+                next_seek, clip_idx, seek_clips, content_frames
+            )
+            if prefetch is not None:
+                if prefetch[:2] == next_window:
+                    return prefetch
+                prefetch[2].cancel()
+            if next_window is None or next_window in encoded_clips:
+                return None
+            next_seek, next_segment_size = next_window
+            next_segment = pad_or_trim(
+                features[:, next_seek : next_seek + next_segment_size]
+            )
+            future = executor.submit(self.encode, next_segment)
+            return next_seek, next_segment_size, future
+
+        def encode_clips(clip_idx: int) -> None:
+            # The clips shorter than a window are decoded in a single window starting at
+            # the clip start, unless the decoding stops before the clip end.
+            clip_windows = []
+            for clip_start, clip_end in seek_clips[clip_idx:]:
+                clip_size = min(clip_end, content_frames) - clip_start
+                if clip_size <= 0:
+                    continue
+                if clip_size > self.feature_extractor.nb_max_frames:
+                    break
+                clip_windows.append((clip_start, clip_size))
+                if len(clip_windows) == options.clip_encode_batch_size:
+                    break
+
+            if len(clip_windows) < 2:
+                return
+
+            encoder_output = get_numpy_array(
+                self.encode(
+                    np.stack(
+                        [
+                            pad_or_trim(features[:, start : start + size])
+                            for start, size in clip_windows
+                        ]
+                    )
+                )
+            )
+            for i, clip_window in enumerate(clip_windows):
+                encoded_clips[clip_window] = get_ctranslate2_storage(
+                    encoder_output[i : i + 1]
+                )
+
         pbar = tqdm(total=content_duration, unit="seconds", disable=not log_progress)
         last_speech_timestamp = 0.0
         # NOTE: This loop is obscurely flattened to make the diff readable.
         # A later commit should turn this into a simpler nested loop.
         # for seek_clip_start, seek_clip_end in seek_clips:
         #     while seek < seek_clip_end
-        while clip_idx < len(seek_clips):
-            seek_clip_start, seek_clip_end = seek_clips[clip_idx]
-            if seek_clip_end > content_frames:
-                seek_clip_end = content_frames
-            if seek < seek_clip_start:
-                seek = seek_clip_start
-            if seek >= seek_clip_end:
-                clip_idx += 1
-                if clip_idx < len(seek_clips):
-                    seek = seek_clips[clip_idx][0]
-                continue
-            time_offset = seek * self.feature_extractor.time_per_frame
-            window_end_time = float(
-                (seek + self.feature_extractor.nb_max_frames)
-                * self.feature_extractor.time_per_frame
-            )
-            segment_size = min(
-                self.feature_extractor.nb_max_frames,
-                content_frames - seek,
-                seek_clip_end - seek,
-            )
-            segment = features[:, seek : seek + segment_size]
-            segment_duration = segment_size * self.feature_extractor.time_per_frame
-            segment = pad_or_trim(segment)
+        try:
+            while clip_idx < len(seek_clips):
+                seek_clip_start, seek_clip_end = seek_clips[clip_idx]
+                if seek_clip_end > content_frames:
+                    seek_clip_end = content_frames
+                if seek < seek_clip_start:
+                    seek = seek_clip_start
+                if seek >= seek_clip_end:
+                    clip_idx += 1
+                    if clip_idx < len(seek_clips):
+                        seek = seek_clips[clip_idx][0]
+                    continue
+                time_offset = seek * self.feature_extractor.time_per_frame
+                window_end_time = float(
+                    (seek + self.feature_extractor.nb_max_frames)
+                    * self.feature_extractor.time_per_frame
+                )
+                segment_size = min(
+                    self.feature_extractor.nb_max_frames,
+                    content_frames - seek,
+                    seek_clip_end - seek,
+                )
+                segment = features[:, seek : seek + segment_size]
+                segment_duration = segment_size * self.feature_extractor.time_per_frame
+                segment = pad_or_trim(segment)
 
-            if self.logger.isEnabledFor(logging.DEBUG):
-                self.logger.debug(
-                    "Processing segment at %s", format_timestamp(time_offset)
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(
+                        "Processing segment at %s", format_timestamp(time_offset)
+                    )
+
+                previous_tokens = all_tokens[prompt_reset_since:]
+
+                window = WindowInfo(
+                    seek=seek, start=time_offset, duration=segment_duration
                 )
+                if windows is not None:
+                    windows.append(window)
+
+                if prefetch is not None and prefetch[:2] == (seek, segment_size):
+                    encoder_output = prefetch[2].result()
+                    window.encoder_prefetched = True
+                else:
+                    if prefetch is not None:
+                        prefetch[2].cancel()
+                    if initial_encoder_output is not None and (
+                        np.array_equal(segment, encoder_output_features)
+                        if encoder_output_features is not None
+                        else seek == 0
+                    ):
+                        encoder_output = initial_encoder_output
+                    else:
+                        if (
+                            options.clip_encode_batch_size > 1
+                            and (seek, segment_size) not in encoded_clips
+                            and seek == seek_clip_start
+                            and seek + segment_size == seek_clip_end
+                        ):
+                            encoded_clips.clear()
+                            encode_clips(clip_idx)
+                        encoder_output = encoded_clips.pop((seek, segment_size), None)
+                        if encoder_output is not None:
+                            window.encoder_batched = True
+                        else:
+                            encoder_output = self.encode(segment)
+                initial_encoder_output = None
+                prefetch = None
+
+                if executor is not None:
+                    # Assume the decoding will move to the end of the window.
+                    prefetch = prefetch_window(seek + segment_size, None)
+
+                if options.multilingual:
+                    if language_lock.should_detect():
+                        results = self.model.detect_language(encoder_output)
+                        language_token, language_probability = results[0][0]
+                        language = language_token[2:-2]
+
+                        tokenizer.language = tokenizer.tokenizer.token_to_id(
+                            language_token
+                        )
+                        tokenizer.language_code = language
+                        language_lock.update(language, language_probability)
+                        window.language_probability = language_probability
+                    else:
+                        language_lock.skip()
+                window.language = tokenizer.language_code
 
-            previous_tokens = all_tokens[prompt_reset_since:]
+                prompt = self.get_prompt(
+                    tokenizer,
+                    previous_tokens,
+                    without_timestamps=options.without_timestamps,
+                    prefix=options.prefix if seek == 0 else None,
+                    hotwords=options.hotwords,
+                )
 
-            if seek > 0 or encoder_output is None:
-                encoder_output = self.encode(segment)
+                max_new_tokens = None
+                if options.max_new_tokens_per_second is not None:
+                    window.speech_duration = get_speech_duration(
+                        features[:, seek : seek + segment_size],
+                        self.feature_extractor.time_per_frame,
+                    )
+                    max_new_tokens = window.max_new_tokens = get_max_new_tokens(
+                        window.speech_duration, options.max_new_tokens_per_second
+                    )
 
-            if options.multilingual:
-                results = self.model.detect_language(encoder_output)
-                language_token, language_probability = results[0][0]
-                language = language_token[2:-2]
+                (
+                    result,
+                    avg_logprob,
+                    temperature,
+                    compression_ratio,
+                ) = self.generate_with_fallback(
+                    encoder_output,
+                    prompt,
+                    tokenizer,
+                    options,
+                    window,
+                    max_new_tokens,
+                    fallback_likely=previous_fallback,
+                )
+                previous_fallback = temperature != options.temperatures[0]
+                window.temperature = temperature
+                window.avg_logprob = avg_logprob
+                window.compression_ratio = compression_ratio
+                window.no_speech_prob = result.no_speech_prob
+                if options.multilingual:
+                    language_lock.update_decoding(avg_logprob, compression_ratio)
+
+                if options.no_speech_threshold is not None:
+                    # no voice activity check
+                    should_skip = result.no_speech_prob > options.no_speech_threshold
 
-                tokenizer.language = tokenizer.tokenizer.token_to_id(language_token)
-                tokenizer.language_code = language
+                    if (
+                        options.log_prob_threshold is not None
+                        and avg_logprob > options.log_prob_threshold
+                    ):
+                        # don't skip if the logprob is high enough, despite the no_speech_prob
+                        should_skip = False
+
+                    if should_skip:
+                        self.logger.debug(
+                            "No speech threshold is met (%f > %f)",
+                            result.no_speech_prob,
+                            options.no_speech_threshold,
+                        )
 
-            prompt = self.get_prompt(
-                tokenizer,
-                previous_tokens,
-                without_timestamps=options.without_timestamps,
-                prefix=options.prefix if seek == 0 else None,
-                hotwords=options.hotwords,
-            )
+                        # fast-forward to the next segment boundary
+                        seek += segment_size
+                        continue
+
+                tokens = result.sequences_ids[0]
+
+                previous_seek = seek
+
+                # anomalous words are very long/short/improbable
+                def word_anomaly_score(word: dict) -> float:
+                    probability = word.get("probability", 0.0)
+                    duration = word["end"] - word["start"]
+                    score = 0.0
+                    if probability < 0.15:
+                        score += 1.0
+                    if duration < 0.133:
+                        score += (0.133 - duration) * 15
+                    if duration > 2.0:
+                        score += duration - 2.0
+                    return score
+
+                def is_segment_anomaly(segment: Optional[dict]) -> bool:
+                    if segment is None or not segment["words"]:
+                        return False
+                    words = [
+                        w for w in segment["words"] if w["word"] not in punctuation
+                    ]
+                    words = words[:8]
+                    score = sum(word_anomaly_score(w) for w in words)
+                    return score >= 3 or score + 0.01 >= len(words)
+
+                def next_words_segment(segments: List[dict]) -> Optional[dict]:
+                    return next((s for s in segments if s["words"]), None)
 
-            (
-                result,
-                avg_logprob,
-                temperature,
-                compression_ratio,
-            ) = self.generate_with_fallback(encoder_output, prompt, tokenizer, options)
+                (
+                    current_segments,
+                    seek,
+                    single_timestamp_ending,
+                ) = self._split_segments_by_timestamps(
+                    tokenizer=tokenizer,
+                    tokens=tokens,
+                    time_offset=time_offset,
+                    segment_size=segment_size,
+                    segment_duration=segment_duration,
+                    seek=seek,
+                )
+
+                if options.word_timestamps:
+                    self.add_word_timestamps(
+                        [current_segments],
+                        tokenizer,
+                        encoder_output,
+                        segment_size,
+                        options.prepend_punctuations,
+                        options.append_punctuations,
+                        last_speech_timestamp=last_speech_timestamp,
+                    )
+                    if not single_timestamp_ending:
+                        last_word_end = get_end(current_segments)
+                        if last_word_end is not None and last_word_end > time_offset:
+                            seek = round(last_word_end * self.frames_per_second)
+
+                    # skip silence before possible hallucinations
+                    if options.hallucination_silence_threshold is not None:
+                        threshold = options.hallucination_silence_threshold
+
+                        # if first segment might be a hallucination, skip leading silence
+                        first_segment = next_words_segment(current_segments)
+                        if first_segment is not None and is_segment_anomaly(
+                            first_segment
+                        ):
+                            gap = first_segment["start"] - time_offset
+                            if gap > threshold:
+                                seek = previous_seek + round(
+                                    gap * self.frames_per_second
+                                )
+                                continue
+
+                        # skip silence before any possible hallucination that is surrounded
+                        # by silence or more hallucinations
+                        hal_last_end = last_speech_timestamp
+                        for si in range(len(current_segments)):
+                            segment = current_segments[si]
+                            if not segment["words"]:
+                                continue
+                            if is_segment_anomaly(segment):
+                                next_segment = next_words_segment(
+                                    current_segments[si + 1 :]
+                                )
+                                if next_segment is not None:
+                                    hal_next_start = next_segment["words"][0]["start"]
+                                else:
+                                    hal_next_start = time_offset + segment_duration
+                                silence_before = (
+                                    segment["start"] - hal_last_end > threshold
+                                    or segment["start"] < threshold
+                                    or segment["start"] - time_offset < 2.0
+                                )
+                                silence_after = (
+                                    hal_next_start - segment["end"] > threshold
+                                    or is_segment_anomaly(next_segment)
+                                    or window_end_time - segment["end"] < 2.0
+                                )
+                                if silence_before and silence_after:
+                                    seek = round(
+                                        max(time_offset + 1, segment["start"])
+                                        * self.frames_per_second
+                                    )
+                                    if content_duration - segment["end"] < threshold:
+                                        seek = content_frames
+                                    current_segments[si:] = []
+                                    break
+                            hal_last_end = segment["end"]
 
-            if options.no_speech_threshold is not None:
-                # no voice activity check
-                should_skip = result.no_speech_prob > options.no_speech_threshold
+                    last_word_end = get_end(current_segments)
+                    if last_word_end is not None:
+                        last_speech_timestamp = last_word_end
 
-                if (
-                    options.log_prob_threshold is not None
-                    and avg_logprob > options.log_prob_threshold
-                ):
-                    # don't skip if the logprob is high enough, despite the no_speech_prob
-                    should_skip = False
+                if executor is not None:
+                    # Replace the speculative window if the prediction was wrong.
+                    prefetch = prefetch_window(seek, prefetch)
 
-                if should_skip:
-                    self.logger.debug(
-                        "No speech threshold is met (%f > %f)",
-                        result.no_speech_prob,
-                        options.no_speech_threshold,
+                for segment in current_segments:
+                    tokens = segment["tokens"]
+                    text = tokenizer.decode(tokens)
+
+                    if segment["start"] == segment["end"] or not text.strip():
+                        continue
+
+                    all_tokens.extend(tokens)
+                    idx += 1
+
+                    yield Segment(
+                        id=idx,
+                        seek=previous_seek,
+                        start=segment["start"],
+                        end=segment["end"],
+                        text=text,
+                        tokens=tokens,
+                        temperature=temperature,
+                        avg_logprob=avg_logprob,
+                        compression_ratio=compression_ratio,
+                        no_speech_prob=result.no_speech_prob,
+                        words=(
+                            [Word(**word) for word in segment["words"]]
+                            if options.word_timestamps
+                            else None
+                        ),
                     )
 
-                    # fast-forward to the next segment boundary
-                    seek += segment_size
-                    continue
+                if (
+                    not options.condition_on_previous_text
+                    or temperature > options.prompt_reset_on_temperature
+                ):
+                    if options.condition_on_previous_text:
+                        self.logger.debug(
+                            "Reset prompt. prompt_reset_on_temperature threshold is met %f > %f",
+                            temperature,
+                            options.prompt_reset_on_temperature,
+                        )
 
-            tokens = result.sequences_ids[0]
+                    prompt_reset_since = len(all_tokens)
 
-            previous_seek = seek
-
-            # anomalous words are very long/short/improbable
-            def word_anomaly_score(word: dict) -> float:
-                probability = word.get("probability", 0.0)
-                duration = word["end"] - word["start"]
-                score = 0.0
-                if probability < 0.15:
-                    score += 1.0
-                if duration < 0.133:
-                    score += (0.133 - duration) * 15
-                if duration > 2.0:
-                    score += duration - 2.0
-                return score
-
-            def is_segment_anomaly(segment: Optional[dict]) -> bool:
-                if segment is None or not segment["words"]:
-                    return False
-                words = [w for w in segment["words"] if w["word"] not in punctuation]
-                words = words[:8]
-                score = sum(word_anomaly_score(w) for w in words)
-                return score >= 3 or score + 0.01 >= len(words)
-
-            def next_words_segment(segments: List[dict]) -> Optional[dict]:
-                return next((s for s in segments if s["words"]), None)
+                pbar.update(
+                    (min(content_frames, seek) - previous_seek)
+                    * self.feature_extractor.time_per_frame,
+                )
+            pbar.close()
+        finally:
+            if executor is not None:
+                # The encode being prefetched is cancelled if the consumer stops early.
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        if executor is not None:
+            self.logger.debug(
+                "Speculative encoding hit rate: %d/%d",
+                sum(window.encoder_prefetched for window in windows or []),
+                max(len(windows or []) - 1, 0),
+            )
 
-            (
-                current_segments,
-                seek,
-                single_timestamp_ending,
-            ) = self._split_segments_by_timestamps(
-                tokenizer=tokenizer,
-                tokens=tokens,
-                time_offset=time_offset,
-                segment_size=segment_size,
-                segment_duration=segment_duration,
-                seek=seek,
-            )
-
-            if options.word_timestamps:
-                self.add_word_timestamps(
-                    [current_segments],
-                    tokenizer,
-                    encoder_output,
-                    segment_size,
-                    options.prepend_punctuations,
-                    options.append_punctuations,
-                    last_speech_timestamp=last_speech_timestamp,
+        if windows and self.logger.isEnabledFor(logging.DEBUG):
+            fallback_counts = collections.Counter(
+                window.temperature
+                for window in windows
+                if window.temperature is not None
+            )
+            self.logger.debug(
+                "Windows per fallback temperature: %s",
+                ", ".join(
+                    "%.1f: %d" % (temperature, count)
+                    for temperature, count in sorted(fallback_counts.items())
+                ),
+            )
+            if options.adaptive_beam:
+                self.logger.debug(
+                    "Adaptive beam search: %d/%d windows needed the beam search",
+                    sum(bool(window.beam_search) for window in windows),
+                    sum(window.beam_search is not None for window in windows),
                 )
-                if not single_timestamp_ending:
-                    last_word_end = get_end(current_segments)
-                    if last_word_end is not None and last_word_end > time_offset:
-                        seek = round(last_word_end * self.frames_per_second)
-
-                # skip silence before possible hallucinations
-                if options.hallucination_silence_threshold is not None:
-                    threshold = options.hallucination_silence_threshold
-
-                    # if first segment might be a hallucination, skip leading silence
-                    first_segment = next_words_segment(current_segments)
-                    if first_segment is not None and is_segment_anomaly(first_segment):
-                        gap = first_segment["start"] - time_offset
-                        if gap > threshold:
-                            seek = previous_seek + round(gap * self.frames_per_second)
-                            continue
-
-                    # skip silence before any possible hallucination that is surrounded
-                    # by silence or more hallucinations
-                    hal_last_end = last_speech_timestamp
-                    for si in range(len(current_segments)):
-                        segment = current_segments[si]
-                        if not segment["words"]:
-                            continue
-                        if is_segment_anomaly(segment):
-                            next_segment = next_words_segment(
-                                current_segments[si + 1 :]
-                            )
-                            if next_segment is not None:
-                                hal_next_start = next_segment["words"][0]["start"]
-                            else:
-                                hal_next_start = time_offset + segment_duration
-                            silence_before = (
-                                segment["start"] - hal_last_end > threshold
-                                or segment["start"] < threshold
-                                or segment["start"] - time_offset < 2.0
-                            )
-                            silence_after = (
-                                hal_next_start - segment["end"] > threshold
-                                or is_segment_anomaly(next_segment)
-                                or window_end_time - segment["end"] < 2.0
-                            )
-                            if silence_before and silence_after:
-                                seek = round(
-                                    max(time_offset + 1, segment["start"])
-                                    * self.frames_per_second
-                                )
-                                if content_duration - segment["end"] < threshold:
-                                    seek = content_frames
-                                current_segments[si:] = []
-                                break
-                        hal_last_end = segment["end"]
-
-                last_word_end = get_end(current_segments)
-                if last_word_end is not None:
-                    last_speech_timestamp = last_word_end
-            for segment in current_segments:
-                tokens = segment["tokens"]
-                text = tokenizer.decode(tokens)
-
-                if segment["start"] == segment["end"] or not text.strip():
-                    continue
 
-                all_tokens.extend(tokens)
-                idx += 1
+    def _generate_region_segments(
+        self,
+        features: np.ndarray,
+        region_seeks: List[int],
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        log_progress,
+        encoder_output: Optional[ctranslate2.StorageView] = None,
+        windows: Optional[List[WindowInfo]] = None,
+        encoder_output_features: Optional[np.ndarray] = None,
+        max_pending_segments: int = 16,
+    ) -> Iterable[Segment]:
+        """Transcribes independent regions of the features concurrently.
 
-                yield Segment(
-                    id=idx,
-                    seek=previous_seek,
-                    start=segment["start"],
-                    end=segment["end"],
-                    text=text,
-                    tokens=tokens,
-                    temperature=temperature,
-                    avg_logprob=avg_logprob,
-                    compression_ratio=compression_ratio,
-                    no_speech_prob=result.no_speech_prob,
-                    words=(
-                        [Word(**word) for word in segment["words"]]
-                        if options.word_timestamps
-                        else None
-                    ),
-                )
+        The regions start at region_seeks (in frames) and each of them is transcribed by its
+        own generate_segments loop in a thread, up to num_workers at a time. The segments are
+        yielded in order: the segments of a region are buffered until the previous regions
+        are complete, and a region is paused once max_pending_segments of its segments are
+        buffered.
+        """
+        content_frames = features.shape[-1] - 1
+        time_per_frame = self.feature_extractor.time_per_frame
 
-            if (
-                not options.condition_on_previous_text
-                or temperature > options.prompt_reset_on_temperature
-            ):
-                if options.condition_on_previous_text:
-                    self.logger.debug(
-                        "Reset prompt. prompt_reset_on_temperature threshold is met %f > %f",
-                        temperature,
-                        options.prompt_reset_on_temperature,
+        clip_timestamps = options.clip_timestamps
+        if isinstance(clip_timestamps, str):
+            clip_timestamps = [
+                float(ts)
+                for ts in (clip_timestamps.split(",") if clip_timestamps else [])
+            ]
+        if len(clip_timestamps) % 2 == 1:
+            clip_timestamps = clip_timestamps + [content_frames * time_per_frame]
+
+        seek_clips = [
+            (
+                round(clip_start * self.frames_per_second),
+                round(clip_end * self.frames_per_second),
+            )
+            for clip_start, clip_end in zip(clip_timestamps[::2], clip_timestamps[1::2])
+        ] or [(0, content_frames)]
+
+        bounds = [0] + region_seeks + [content_frames]
+        regions = []
+        for start, end in zip(bounds, bounds[1:]):
+            # The clips spanning several regions are cut at the region bounds.
+            region_clip_timestamps = [
+                (seek - start) * time_per_frame
+                for clip_start, clip_end in seek_clips
+                if clip_start < end and clip_end > start
+                for seek in (max(clip_start, start), min(clip_end, end))
+            ]
+            if not region_clip_timestamps:
+                continue
+            region_options = replace(options, clip_timestamps=region_clip_timestamps)
+            if regions:
+                # The prompt and prefix are meant for the beginning of the audio.
+                region_options.initial_prompt = None
+                region_options.prefix = None
+            regions.append((start, end, region_options, []))
+
+        end_of_region = object()
+        # The regions ahead of the consumer stop after max_pending_segments segments.
+        queues = [queue.Queue(maxsize=max_pending_segments) for _ in regions]
+        stopped = threading.Event()
+
+        def put(region_idx: int, item) -> None:
+            while not stopped.is_set():
+                try:
+                    queues[region_idx].put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def transcribe_region(region_idx: int) -> None:
+            start, end, region_options, region_windows = regions[region_idx]
+            try:
+                if stopped.is_set():
+                    return
+                # The language detected in multilingual mode is set on the tokenizer.
+                region_segments = self.generate_segments(
+                    features[:, start : end + 1],
+                    copy.copy(tokenizer),
+                    region_options,
+                    log_progress,
+                    encoder_output if start == 0 else None,
+                    region_windows,
+                    encoder_output_features if start == 0 else None,
+                )
+                try:
+                    for segment in region_segments:
+                        put(region_idx, segment)
+                        if stopped.is_set():
+                            break
+                finally:
+                    region_segments.close()
+            except BaseException as e:
+                put(region_idx, e)
+            finally:
+                put(region_idx, end_of_region)
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(regions), self.model.num_workers),
+            thread_name_prefix="faster_whisper_region",
+        )
+        try:
+            for region_idx in range(len(regions)):
+                executor.submit(transcribe_region, region_idx)
+
+            idx = 0
+            for region_queue, (start, _, _, region_windows) in zip(queues, regions):
+                offset = start * time_per_frame
+                while True:
+                    segment = region_queue.get()
+                    if segment is end_of_region:
+                        break
+                    if isinstance(segment, BaseException):
+                        raise segment
+                    idx += 1
+                    yield replace(
+                        segment,
+                        id=idx,
+                        seek=segment.seek + start,
+                        start=round(segment.start + offset, 3),
+                        end=round(segment.end + offset, 3),
+                        words=(
+                            [
+                                replace(
+                                    word,
+                                    start=round(word.start + offset, 2),
+                                    end=round(word.end + offset, 2),
+                                )
+                                for word in segment.words
+                            ]
+                            if segment.words is not None
+                            else None
+                        ),
                     )
 
-                prompt_reset_since = len(all_tokens)
+                if windows is not None:
+                    for window in region_windows:
+                        window.seek += start
+                        window.start += offset
+                    windows.extend(region_windows)
+        finally:
+            # The regions being decoded stop after their current window, and the regions
+            # waiting for a worker are cancelled.
+            stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_window(
+        self,
+        seek: int,
+        clip_idx: int,
+        seek_clips: List[Tuple[int, int]],
+        content_frames: int,
+    ) -> Optional[Tuple[int, int]]:
+        """Returns the seek and size of the window that the decoding loop of
+        generate_segments visits next when it is at the given seek and clip.
+        """
+        while clip_idx < len(seek_clips):
+            seek_clip_start, seek_clip_end = seek_clips[clip_idx]
+            seek_clip_end = min(seek_clip_end, content_frames)
+            seek = max(seek, seek_clip_start)
+            if seek < seek_clip_end:
+                segment_size = min(
+                    self.feature_extractor.nb_max_frames,
+                    content_frames - seek,
+                    seek_clip_end - seek,
+                )
+                return seek, segment_size
+            clip_idx += 1
+            if clip_idx < len(seek_clips):
+                seek = seek_clips[clip_idx][0]
 
-            pbar.update(
-                (min(content_frames, seek) - previous_seek)
-                * self.feature_extractor.time_per_frame,
-            )
-        pbar.close()
+        return None
 
     def encode(self, features: np.ndarray) -> ctranslate2.StorageView:
         # When the model is running on multiple GPUs, the encoder output should be moved
@@ -1395,6 +3811,10 @@ class WhisperModel:
 
         if features.ndim == 2:
             features = np.expand_dims(features, 0)
+
+        if self.scheduler is not None:
+            return self.scheduler.encode(features)
+
         features = get_ctranslate2_storage(features)
 
         return self.model.encode(features, to_cpu=to_cpu)
@@ -1405,6 +3825,9 @@ class WhisperModel:
         prompt: List[int],
         tokenizer: Tokenizer,
         options: TranscriptionOptions,
+        window: Optional[WindowInfo] = None,
+        max_new_tokens: Optional[int] = None,
+        fallback_likely: bool = False,
     ) -> Tuple[ctranslate2.models.WhisperGenerationResult, float, float, float]:
         decode_result = None
         all_results = []
@@ -1429,7 +3852,32 @@ class WhisperModel:
                 f"so that their combined length is less that {self.max_length}."
             )
 
-        for temperature in options.temperatures:
+        # The speech-rate cap only applies when it is lower than the maximum length.
+        capped = (
+            max_new_tokens is not None and len(prompt) + max_new_tokens < max_length
+        )
+        if capped:
+            max_length = len(prompt) + max_new_tokens
+
+        def reached_cap(
+            result: ctranslate2.models.WhisperGenerationResult, temperature: float
+        ) -> bool:
+            # The decoding ran out of tokens, the end of text token can be the last one.
+            if not capped or len(result.sequences_ids[0]) < max_new_tokens - 1:
+                return False
+
+            self.logger.debug(
+                "Token cap is reached with temperature %.1f (%d tokens)",
+                temperature,
+                max_new_tokens,
+            )
+            if window is not None:
+                window.capped_decodings += 1
+            return True
+
+        def generate(
+            temperature: float, asynchronous: bool = False, greedy: bool = False
+        ):
             if temperature > 0:
                 kwargs = {
                     "beam_size": 1,
@@ -1439,11 +3887,18 @@ class WhisperModel:
                 }
             else:
                 kwargs = {
-                    "beam_size": options.beam_size,
+                    "beam_size": 1 if greedy else options.beam_size,
                     "patience": options.patience,
                 }
 
-            result = self.model.generate(
+            if asynchronous:
+                generator = self.model
+                kwargs["asynchronous"] = True
+            else:
+                # Windows of concurrent transcriptions are decoded together by the scheduler.
+                generator = self.model if self.scheduler is None else self.scheduler
+
+            return generator.generate(
                 encoder_output,
                 [prompt],
                 length_penalty=options.length_penalty,
@@ -1458,6 +3913,9 @@ class WhisperModel:
                 **kwargs,
             )[0]
 
+        def get_decode_result(
+            result: ctranslate2.models.WhisperGenerationResult, temperature: float
+        ) -> Tuple[ctranslate2.models.WhisperGenerationResult, float, float, float]:
             tokens = result.sequences_ids[0]
 
             # Recover the average log prob from the returned score.
@@ -1468,51 +3926,84 @@ class WhisperModel:
             text = tokenizer.decode(tokens).strip()
             compression_ratio = get_compression_ratio(text)
 
-            decode_result = (
-                result,
-                avg_logprob,
-                temperature,
-                compression_ratio,
+            return result, avg_logprob, temperature, compression_ratio
+
+        if (
+            options.adaptive_beam
+            and options.beam_size > 1
+            and options.temperatures[0] == 0
+        ):
+            # The beam search only runs on the same encoder output if the greedy result
+            # is not good enough.
+            result = generate(0.0, greedy=True)
+            decode_result = get_decode_result(result, 0.0)
+            _, avg_logprob, _, compression_ratio = decode_result
+            needs_beam_search = reached_cap(result, 0.0) or self._needs_beam_search(
+                avg_logprob, compression_ratio, result.no_speech_prob, options
             )
+            if window is not None:
+                window.beam_search = needs_beam_search
+            if not needs_beam_search:
+                return decode_result
+
             all_results.append(decode_result)
+            if (
+                options.compression_ratio_threshold is not None
+                and compression_ratio <= options.compression_ratio_threshold
+            ):
+                below_cr_threshold_results.append(decode_result)
+
+        # Submit the first temperatures together so that the fallbacks are decoded while
+        # the previous temperatures are checked. CTranslate2 cannot sample with different
+        # temperatures in the same batch, so each temperature is a separate request.
+        # The fallbacks only run ahead when the previous window fell back, or on workers
+        # that would otherwise be idle, since a window passing with the first temperature
+        # does not need them and CTranslate2 cannot cancel a submitted decoding.
+        num_speculative = 0
+        if options.batched_fallback > 0:
+            if fallback_likely:
+                num_speculative = options.batched_fallback
+            else:
+                idle_workers = (
+                    self.model.num_workers
+                    - self.model.num_active_batches
+                    - self.model.num_queued_batches
+                    - 1
+                )
+                num_speculative = max(min(options.batched_fallback, idle_workers), 0)
 
-            needs_fallback = False
+        submitted = []
+        if num_speculative > 0:
+            submitted = [
+                generate(temperature, asynchronous=True)
+                for temperature in options.temperatures[: num_speculative + 1]
+            ]
 
-            if options.compression_ratio_threshold is not None:
-                if compression_ratio > options.compression_ratio_threshold:
-                    needs_fallback = True  # too repetitive
+        for i, temperature in enumerate(options.temperatures):
+            if i < len(submitted):
+                result = submitted[i].result()
+            else:
+                result = generate(temperature)
 
-                    self.logger.debug(
-                        "Compression ratio threshold is not met with temperature %.1f (%f > %f)",
-                        temperature,
-                        compression_ratio,
-                        options.compression_ratio_threshold,
-                    )
-                else:
-                    below_cr_threshold_results.append(decode_result)
+            decode_result = get_decode_result(result, temperature)
+            _, avg_logprob, _, compression_ratio = decode_result
+            all_results.append(decode_result)
 
             if (
-                options.log_prob_threshold is not None
-                and avg_logprob < options.log_prob_threshold
+                options.compression_ratio_threshold is not None
+                and compression_ratio <= options.compression_ratio_threshold
             ):
-                needs_fallback = True  # average log probability is too low
+                below_cr_threshold_results.append(decode_result)
 
-                self.logger.debug(
-                    "Log probability threshold is not met with temperature %.1f (%f < %f)",
-                    temperature,
-                    avg_logprob,
-                    options.log_prob_threshold,
-                )
-
-            if (
-                options.no_speech_threshold is not None
-                and result.no_speech_prob > options.no_speech_threshold
-                and options.log_prob_threshold is not None
-                and avg_logprob < options.log_prob_threshold
+            if not reached_cap(result, temperature) and not self._needs_fallback(
+                avg_logprob,
+                compression_ratio,
+                result.no_speech_prob,
+                temperature,
+                options,
             ):
-                needs_fallback = False  # silence
-
-            if not needs_fallback:
+                # The remaining decodings still run but their results are dropped.
+                submitted.clear()
                 break
         else:
             # all failed, select the result with the highest average log probability
@@ -1529,6 +4020,96 @@ class WhisperModel:
 
         return decode_result
 
+    def _get_language_detection_model(
+        self, model: Union[str, "WhisperModel"]
+    ) -> "WhisperModel":
+        if isinstance(model, WhisperModel):
+            language_detection_model = model
+        else:
+            with self._language_detection_models_lock:
+                language_detection_model = self._language_detection_models.get(model)
+                if language_detection_model is None:
+                    language_detection_model = WhisperModel(
+                        model, **self._language_detection_model_kwargs
+                    )
+                    self._language_detection_models[model] = language_detection_model
+
+        if not language_detection_model.model.is_multilingual:
+            raise ValueError("The language detection model must be multilingual")
+
+        return language_detection_model
+
+    def _needs_fallback(
+        self,
+        avg_logprob: float,
+        compression_ratio: float,
+        no_speech_prob: float,
+        temperature: float,
+        options: TranscriptionOptions,
+    ) -> bool:
+        needs_fallback = False
+
+        if (
+            options.compression_ratio_threshold is not None
+            and compression_ratio > options.compression_ratio_threshold
+        ):
+            needs_fallback = True  # too repetitive
+
+            self.logger.debug(
+                "Compression ratio threshold is not met with temperature %.1f (%f > %f)",
+                temperature,
+                compression_ratio,
+                options.compression_ratio_threshold,
+            )
+
+        if (
+            options.log_prob_threshold is not None
+            and avg_logprob < options.log_prob_threshold
+        ):
+            needs_fallback = True  # average log probability is too low
+
+            self.logger.debug(
+                "Log probability threshold is not met with temperature %.1f (%f < %f)",
+                temperature,
+                avg_logprob,
+                options.log_prob_threshold,
+            )
+
+        if (
+            options.no_speech_threshold is not None
+            and no_speech_prob > options.no_speech_threshold
+            and options.log_prob_threshold is not None
+            and avg_logprob < options.log_prob_threshold
+        ):
+            needs_fallback = False  # silence
+
+        return needs_fallback
+
+    def _needs_beam_search(
+        self,
+        avg_logprob: float,
+        compression_ratio: float,
+        no_speech_prob: float,
+        options: TranscriptionOptions,
+    ) -> bool:
+        if (
+            options.adaptive_beam_log_prob_threshold is not None
+            and avg_logprob < options.adaptive_beam_log_prob_threshold
+        ) or (
+            options.adaptive_beam_compression_ratio_threshold is not None
+            and compression_ratio > options.adaptive_beam_compression_ratio_threshold
+        ):
+            self.logger.debug(
+                "Greedy decoding is rejected (avg_logprob %f, compression ratio %f)",
+                avg_logprob,
+                compression_ratio,
+            )
+            return True
+
+        return self._needs_fallback(
+            avg_logprob, compression_ratio, no_speech_prob, 0.0, options
+        )
+
     def get_prompt(
         self,
         tokenizer: Tokenizer,
@@ -1773,7 +4354,12 @@ class WhisperModel:
         vad_parameters: Union[dict, VadOptions] = None,
         language_detection_segments: int = 1,
         language_detection_threshold: float = 0.5,
-    ) -> Tuple[str, float, List[Tuple[str, float]]]:
+        return_encoder_output: bool = False,
+        language_detection_model: Optional[Union[str, "WhisperModel"]] = None,
+    ) -> Union[
+        Tuple[str, float, List[Tuple[str, float]]],
+        Tuple[str, float, List[Tuple[str, float]], ctranslate2.StorageView],
+    ]:
         """
         Use Whisper to detect the language of the input audio or features.
 
@@ -1789,16 +4375,64 @@ class WhisperModel:
             language_detection_threshold: If the maximum probability of the language tokens is
                 higher than this value, the language is detected.
             language_detection_segments: Number of segments to consider for the language detection.
+            return_encoder_output: Also return the encoder output of the first segment, so that
+                it can be reused for the transcription.
+            language_detection_model: Smaller multilingual model (a WhisperModel instance, or a
+                size or path to load one) that detects the language instead of this model. This
+                model is only used when the probability detected by the auxiliary model is not
+                higher than `language_detection_threshold`. The features of the auxiliary model are
+                computed from `audio`, so `features` can only be used if both models have the
+                same number of Mel bins.
 
         Returns:
             language: Detected language.
             language_probability: Probability of the detected language.
             all_language_probs: List of tuples with all language names and probabilities.
+            encoder_output: Encoder output of the first segment, only returned if
+                `return_encoder_output` is True. It is None when the language was detected
+                by `language_detection_model`.
         """
         assert (
             audio is not None or features is not None
         ), "Either `audio` or `features` must be provided."
 
+        if language_detection_model is not None:
+            language_detection_model = self._get_language_detection_model(
+                language_detection_model
+            )
+            if (
+                audio is None
+                and language_detection_model.model.n_mels != self.model.n_mels
+            ):
+                raise ValueError(
+                    "`audio` must be provided when the language detection model does not "
+                    "use the same features as this model"
+                )
+
+            (
+                language,
+                language_probability,
+                all_language_probs,
+            ) = language_detection_model.detect_language(
+                audio=audio,
+                features=features,
+                vad_filter=vad_filter,
+                vad_parameters=vad_parameters,
+                language_detection_segments=language_detection_segments,
+                language_detection_threshold=language_detection_threshold,
+            )
+            if language_probability > language_detection_threshold:
+                if return_encoder_output:
+                    return language, language_probability, all_language_probs, None
+                return language, language_probability, all_language_probs
+
+            self.logger.debug(
+                "Language detection model is not confident (%s with probability %.2f), "
+                "using the main model",
+                language,
+                language_probability,
+            )
+
         if audio is not None:
             if vad_filter:
                 speech_chunks = get_speech_timestamps(audio, vad_parameters)
@@ -1814,14 +4448,25 @@ class WhisperModel:
             ..., : language_detection_segments * self.feature_extractor.nb_max_frames
         ]
 
-        detected_language_info = {}
-        for i in range(0, features.shape[-1], self.feature_extractor.nb_max_frames):
-            encoder_output = self.encode(
-                pad_or_trim(features[..., i : i + self.feature_extractor.nb_max_frames])
+        # The segments are encoded and classified in a single batch.
+        encoder_output = self.encode(
+            np.stack(
+                [
+                    pad_or_trim(
+                        features[..., i : i + self.feature_extractor.nb_max_frames]
+                    )
+                    for i in range(
+                        0, features.shape[-1], self.feature_extractor.nb_max_frames
+                    )
+                ]
             )
-            # results is a list of tuple[str, float] with language names and probabilities.
-            results = self.model.detect_language(encoder_output)[0]
+        )
+        # batch_results is a list of list of tuple[str, float] with language names and
+        # probabilities for each segment.
+        batch_results = self.model.detect_language(encoder_output)
 
+        detected_language_info = {}
+        for results in batch_results:
             # Parse language names to strip out markers
             all_language_probs = [(token[2:-2], prob) for (token, prob) in results]
             # Get top language token and probability
@@ -1838,36 +4483,150 @@ class WhisperModel:
             )
             language_probability = max(detected_language_info[language])
 
+        if return_encoder_output:
+            if len(batch_results) > 1:
+                encoder_output = get_ctranslate2_storage(
+                    get_numpy_array(encoder_output)[:1]
+                )
+            return language, language_probability, all_language_probs, encoder_output
         return language, language_probability, all_language_probs
 
 
+def get_batched_segment(
+    segment: dict, idx: int, options: TranscriptionOptions
+) -> Segment:
+    return Segment(
+        seek=segment["seek"],
+        id=idx,
+        text=segment["text"],
+        start=round(segment["start"], 3),
+        end=round(segment["end"], 3),
+        words=(
+            None
+            if not options.word_timestamps
+            else [Word(**word) for word in segment["words"]]
+        ),
+        tokens=segment["tokens"],
+        avg_logprob=segment["avg_logprob"],
+        no_speech_prob=segment["no_speech_prob"],
+        compression_ratio=segment["compression_ratio"],
+        temperature=segment["temperature"],
+    )
+
+
 def restore_speech_timestamps(
     segments: Iterable[Segment],
-    speech_chunks: List[dict],
+    speech_chunks: Optional[List[dict]],
     sampling_rate: int,
+    time_scale: float = 1.0,
 ) -> Iterable[Segment]:
-    ts_map = SpeechTimestampsMap(speech_chunks, sampling_rate)
+    """Maps the timestamps of the segments back to the original audio.
+
+    The timestamps are first multiplied by time_scale to undo the time stretch of the
+    audio, then mapped from the concatenated speech chunks, if any, to the original audio.
+    """
+    ts_map = (
+        SpeechTimestampsMap(speech_chunks, sampling_rate) if speech_chunks else None
+    )
 
     for segment in segments:
-        if segment.words:
-            words = []
-            for word in segment.words:
-                # Ensure the word start and end times are resolved to the same chunk.
-                middle = (word.start + word.end) / 2
-                chunk_index = ts_map.get_chunk_index(middle)
-                word.start = ts_map.get_original_time(word.start, chunk_index)
-                word.end = ts_map.get_original_time(word.end, chunk_index)
-                words.append(word)
-
-            segment.start = words[0].start
-            segment.end = words[-1].end
-            segment.words = words
+        if time_scale != 1:
+            segment.start = round(segment.start * time_scale, 3)
+            segment.end = round(segment.end * time_scale, 3)
+            if segment.words:
+                for word in segment.words:
+                    word.start = round(word.start * time_scale, 2)
+                    word.end = round(word.end * time_scale, 2)
+                # The segment spans its words, as after the word alignment.
+                segment.start = segment.words[0].start
+                segment.end = segment.words[-1].end
+        if ts_map is not None:
+            remap_segments_timestamps([segment], ts_map)
+        yield segment
 
-        else:
-            segment.start = ts_map.get_original_time(segment.start)
-            segment.end = ts_map.get_original_time(segment.end, is_end=True)
 
-        yield segment
+async def transcribe_async(
+    transcribe: Callable[[], Tuple[Iterable[Segment], TranscriptionInfo]],
+    executor: Executor,
+    max_pending_segments: int,
+    decode_semaphore: threading.Semaphore,
+) -> Tuple[AsyncIterator[Segment], TranscriptionInfo]:
+    """Runs a transcribe call in the executor and returns an async iterator over its segments,
+    decoded by a thread dedicated to the call (see `iterate_in_executor`). The threads only
+    decode while they hold decode_semaphore.
+    """
+    loop = asyncio.get_running_loop()
+    segments, info = await loop.run_in_executor(executor, transcribe)
+    segments = iterate_in_executor(
+        segments, max_pending_items=max_pending_segments, semaphore=decode_semaphore
+    )
+    return segments, info
+
+
+def split_segment_streams(
+    segments: Iterable[Tuple[str, Segment]], tasks: List[str]
+) -> Dict[str, Iterator[Segment]]:
+    """Splits (task, segment) tuples into one lazy stream of segments per task.
+
+    The segments of a stream are buffered while another stream is being consumed.
+    """
+    segments = iter(segments)
+    buffers = {task: collections.deque() for task in tasks}
+
+    def stream(task: str) -> Iterator[Segment]:
+        buffer = buffers[task]
+        while True:
+            while buffer:
+                yield buffer.popleft()
+            item = next(segments, None)
+            if item is None:
+                return
+            buffers[item[0]].append(item[1])
+
+    return {task: stream(task) for task in tasks}
+
+
+def remap_segments_timestamps(
+    segments: List[Segment],
+    ts_map: SpeechTimestampsMap,
+) -> List[Segment]:
+    """Maps the segment and word timestamps of a batch of segments back to the original
+    audio timeline, using a single vectorized lookup for all the words of the batch.
+    """
+    word_segments = [segment for segment in segments if segment.words]
+    plain_segments = [segment for segment in segments if not segment.words]
+
+    if word_segments:
+        words = [word for segment in word_segments for word in segment.words]
+        starts = np.array([word.start for word in words], dtype=np.float64)
+        ends = np.array([word.end for word in words], dtype=np.float64)
+
+        # Ensure the word start and end times are resolved to the same chunk.
+        chunk_indices = ts_map.get_chunk_indices((starts + ends) / 2)
+        starts = ts_map.get_original_times(starts, chunk_indices)
+        ends = ts_map.get_original_times(ends, chunk_indices)
+
+        for word, start, end in zip(words, starts, ends):
+            word.start = start
+            word.end = end
+
+        for segment in word_segments:
+            segment.start = segment.words[0].start
+            segment.end = segment.words[-1].end
+
+    if plain_segments:
+        starts = ts_map.get_original_times(
+            [segment.start for segment in plain_segments]
+        )
+        ends = ts_map.get_original_times(
+            [segment.end for segment in plain_segments], is_end=True
+        )
+
+        for segment, start, end in zip(plain_segments, starts, ends):
+            segment.start = start
+            segment.end = end
+
+    return segments
 
 
 def get_ctranslate2_storage(segment: np.ndarray) -> ctranslate2.StorageView:
@@ -1876,6 +4635,47 @@ def get_ctranslate2_storage(segment: np.ndarray) -> ctranslate2.StorageView:
     return segment
 
 
+def scale_clip_timestamps(
+    clip_timestamps: Union[str, List[float]], time_scale: float
+) -> List[float]:
+    """Moves the clip timestamps to the audio sped up by time_scale."""
+    if isinstance(clip_timestamps, str):
+        clip_timestamps = [
+            float(ts) for ts in (clip_timestamps.split(",") if clip_timestamps else [])
+        ]
+    return [ts / time_scale for ts in clip_timestamps]
+
+
+def get_leading_chunks(chunks: List[np.ndarray], size: int) -> List[np.ndarray]:
+    """Returns the first chunks covering at least size samples or frames (last axis)."""
+    leading_chunks = []
+    for chunk in chunks:
+        if size <= 0:
+            break
+        leading_chunks.append(chunk)
+        size -= chunk.shape[-1]
+    return leading_chunks
+
+
+def get_speech_duration(features: np.ndarray, time_per_frame: float) -> float:
+    """Estimates the duration of speech in log-Mel features from the frame energy.
+
+    A frame is counted as speech if its loudest Mel bin is within 30 dB of the loudest frame,
+    which errs on the side of overestimating the speech in noisy windows.
+    """
+    if features.shape[-1] == 0:
+        return 0.0
+    # The normalized log-Mel features use 40 dB per unit.
+    frame_levels = features.max(axis=0)
+    num_speech_frames = np.count_nonzero(frame_levels >= frame_levels.max() - 0.75)
+    return float(num_speech_frames * time_per_frame)
+
+
+def get_max_new_tokens(speech_duration: float, tokens_per_second: float) -> int:
+    """Returns the token cap of a window with the given speech duration."""
+    return ceil(max(speech_duration, 1.0) * tokens_per_second)
+
+
 def get_compression_ratio(text: str) -> float:
     text_bytes = text.encode("utf-8")
     return len(text_bytes) / len(zlib.compress(text_bytes))
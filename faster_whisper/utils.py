@@ -1,13 +1,29 @@
+import asyncio
+import contextlib
 import logging
 import os
+import queue
 import re
+import threading
 
-from typing import List, Optional, Union
+from concurrent.futures import Executor
+from typing import (
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
 
 import huggingface_hub
 
 from tqdm.auto import tqdm
 
+T = TypeVar("T")
+
 _MODELS = {
     "tiny.en": "Systran/faster-whisper-tiny.en",
     "tiny": "Systran/faster-whisper-tiny",
@@ -149,3 +165,227 @@ def get_end(segments: List[dict]) -> Optional[float]:
         (w["end"] for s in reversed(segments) for w in reversed(s["words"])),
         segments[-1]["end"] if segments else None,
     )
+
+
+_END_OF_ITERATION = object()
+
+
+class _Producer:
+    """Consumes a blocking iterable ahead of its consumer.
+
+    Each item is passed to put as (item, None), an error raised by the iterable as
+    (None, error), and the end of the iteration as (_END_OF_ITERATION, None). The producer
+    blocks when max_pending_items items are not consumed yet. If set, the semaphore is
+    held while an item is computed.
+    """
+
+    def __init__(
+        self,
+        iterable: Iterable[T],
+        put: Callable[[tuple], None],
+        max_pending_items: int,
+        semaphore: Optional[threading.Semaphore] = None,
+    ):
+        self.stopped = threading.Event()
+        self._iterable = iterable
+        self._put = put
+        self._free_slots = threading.Semaphore(max_pending_items)
+        self._semaphore = semaphore or contextlib.nullcontext()
+
+    def run(self) -> None:
+        iterator = iter(self._iterable)
+        try:
+            while not self.stopped.is_set():
+                self._free_slots.acquire()
+                if self.stopped.is_set():
+                    break
+                try:
+                    with self._semaphore:
+                        item = next(iterator)
+                except StopIteration:
+                    break
+                self._put((item, None))
+        except BaseException as e:
+            self._put((None, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            self._put((_END_OF_ITERATION, None))
+
+    def start_thread(self, name: str) -> None:
+        threading.Thread(target=self.run, name=name, daemon=True).start()
+
+    def consumed(self) -> None:
+        """Frees the slot of an item taken by the consumer."""
+        self._free_slots.release()
+
+    def stop(self) -> None:
+        """Stops the producer after the item it is currently computing."""
+        self.stopped.set()
+        self._free_slots.release()
+
+
+async def iterate_in_executor(
+    iterable: Iterable[T],
+    executor: Optional[Executor] = None,
+    max_pending_items: int = 16,
+    semaphore: Optional[threading.Semaphore] = None,
+) -> AsyncIterator[T]:
+    """Iterates over a blocking iterable from an asyncio event loop.
+
+    The iterable is consumed by a single producer which pushes the items to the event loop,
+    so that there is no thread hop per item. The producer blocks when max_pending_items
+    items are waiting to be consumed. Closing or cancelling the async iterator stops the
+    producer after the item it is currently computing.
+
+    Args:
+      iterable: Blocking iterable, for example a generator of segments.
+      executor: Executor running the producer. Note that a slow consumer holds a worker of
+        the executor while the producer is blocked. If not set, the producer runs in a
+        thread dedicated to this iterator.
+      max_pending_items: Maximum number of items produced in advance of the consumer.
+      semaphore: Semaphore held by the producer while it computes an item, e.g. to bound
+        the number of iterables computed concurrently by their dedicated threads. It is
+        not held while the producer waits for the consumer.
+
+    Returns:
+      An async iterator over the items of the iterable.
+    """
+    loop = asyncio.get_running_loop()
+    items = asyncio.Queue()
+
+    def put(item: tuple) -> None:
+        try:
+            loop.call_soon_threadsafe(items.put_nowait, item)
+        except RuntimeError:
+            # The event loop is closed.
+            producer.stopped.set()
+
+    producer = _Producer(iterable, put, max_pending_items, semaphore)
+    if executor is None:
+        producer.start_thread("faster_whisper_async")
+    else:
+        loop.run_in_executor(executor, producer.run)
+
+    try:
+        while True:
+            item, error = await items.get()
+            if error is not None:
+                raise error
+            if item is _END_OF_ITERATION:
+                break
+            producer.consumed()
+            yield item
+    finally:
+        # The producer stops after its current item, without blocking the event loop.
+        producer.stop()
+
+
+def iterate_in_thread(iterable: Iterable[T], max_pending_items: int = 1) -> Iterator[T]:
+    """Iterates over a blocking iterable consumed ahead by a background thread.
+
+    The thread computes the next items while the consumer processes the current one, which
+    overlaps the two when the producer releases the GIL (e.g. in CTranslate2 calls). The
+    producer blocks when max_pending_items items are waiting to be consumed. Closing the
+    iterator stops the producer after the item it is currently computing.
+
+    Args:
+      iterable: Blocking iterable, for example a generator of decoded batches.
+      max_pending_items: Maximum number of items produced in advance of the consumer.
+
+    Returns:
+      An iterator over the items of the iterable.
+    """
+    items = queue.Queue()
+    producer = _Producer(iterable, items.put, max_pending_items)
+    producer.start_thread("faster_whisper_prefetch")
+
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is _END_OF_ITERATION:
+                break
+            producer.consumed()
+            yield item
+    finally:
+        producer.stop()
+
+
+def get_memory_usage() -> Optional[int]:
+    """Returns the resident memory of the process in bytes, or None if it is unknown.
+
+    The memory is read from /proc, so it is only known on Linux.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class PeakMemoryMonitor:
+    """Measures the peak growth of the resident memory of the process during a block.
+
+    The memory is sampled by a background thread every `interval` seconds, so short peaks
+    can be missed. The peak and its growth are None if the memory is unknown (see
+    `get_memory_usage`).
+
+    The resident memory is the one of the whole process: the growth also counts the memory
+    allocated by the other threads during the block. When the blocks of several monitors
+    overlap, their growth cannot be attributed to either block and peak_growth is None
+    (`overlapped` is set). The allocations of threads running without a monitor are not
+    detected.
+
+    Example:
+      with PeakMemoryMonitor() as monitor:
+          model.generate(...)
+      print(monitor.peak_growth)
+    """
+
+    _active = set()
+    _active_lock = threading.Lock()
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self.peak_growth: Optional[int] = None
+        self.overlapped = False
+        self._start = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.peak = max(self.peak, get_memory_usage() or 0)
+
+    def __enter__(self) -> "PeakMemoryMonitor":
+        with PeakMemoryMonitor._active_lock:
+            for monitor in PeakMemoryMonitor._active:
+                monitor.overlapped = True
+            self.overlapped = bool(PeakMemoryMonitor._active)
+            PeakMemoryMonitor._active.add(self)
+
+        self._start = get_memory_usage()
+        if self._start is not None:
+            self.peak = self._start
+            self._thread = threading.Thread(
+                target=self._sample, name="faster_whisper_memory", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        with PeakMemoryMonitor._active_lock:
+            PeakMemoryMonitor._active.discard(self)
+
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self.peak = max(self.peak, get_memory_usage() or 0)
+        if not self.overlapped:
+            self.peak_growth = self.peak - self._start
@@ -1,4 +1,3 @@
-import bisect
 import functools
 import os
 
@@ -36,6 +35,12 @@ class VadOptions:
           when max_speech_duration_s is reached.
       use_max_poss_sil_at_max_speech: Whether to use the maximum possible silence at
           max_speech_duration_s or not. If not, the last silence is used.
+      quantized: Use the int8 quantized Silero VAD model instead of the fp32 model. It is
+        slightly faster at the cost of small differences in the speech probabilities.
+      window_stride: Run the Silero VAD model on one window out of every window_stride
+        windows of 512 samples and reuse its speech probability for the skipped windows.
+        Values higher than 1 reduce the VAD cost proportionally but make the speech
+        boundaries less accurate.
     """
 
     threshold: float = 0.5
@@ -46,6 +51,8 @@ class VadOptions:
     speech_pad_ms: int = 400
     min_silence_at_max_speech: int = 98
     use_max_poss_sil_at_max_speech: bool = True
+    quantized: bool = False
+    window_stride: int = 1
 
 
 def get_speech_timestamps(
@@ -90,12 +97,12 @@ def get_speech_timestamps(
 
     audio_length_samples = len(audio)
 
-    model = get_vad_model()
+    model = get_vad_model(vad_options.quantized)
 
     padded_audio = np.pad(
         audio, (0, window_size_samples - audio.shape[0] % window_size_samples)
     )
-    speech_probs = model(padded_audio)
+    speech_probs = model(padded_audio, window_stride=vad_options.window_stride)
 
     triggered = False
     speeches = []
@@ -277,24 +284,78 @@ def collect_chunks(
     return audio_chunks, chunks_metadata
 
 
+def get_clip_timestamps(
+    chunks: List[dict],
+    sampling_rate: int = 16000,
+    max_duration: float = 30,
+) -> List[float]:
+    """This function converts the speech chunks into clip timestamps (in seconds) over the
+    original audio. Consecutive chunks are merged into the same clip as long as the clip
+    still fits in max_duration (s), so that only the silences that would otherwise start a
+    new window are skipped.
+    """
+    clips = []
+
+    for chunk in chunks:
+        if clips and chunk["end"] - clips[-1]["start"] <= max_duration * sampling_rate:
+            clips[-1]["end"] = chunk["end"]
+        else:
+            clips.append({"start": chunk["start"], "end": chunk["end"]})
+
+    return [
+        timestamp / sampling_rate
+        for clip in clips
+        for timestamp in (clip["start"], clip["end"])
+    ]
+
+
+def split_speech_chunks(chunks: List[dict], num_regions: int) -> List[List[dict]]:
+    """This function splits the speech chunks into up to num_regions groups of similar speech
+    duration. Each split is made at the longest silence between two chunks around the ideal
+    split point, so that the groups can be transcribed independently.
+    """
+    if num_regions <= 1 or len(chunks) < 2:
+        return [chunks]
+
+    speech_duration = np.cumsum([chunk["end"] - chunk["start"] for chunk in chunks])
+    speech_before_gaps = speech_duration[:-1]
+    gaps = np.array(
+        [
+            next_chunk["start"] - chunk["end"]
+            for chunk, next_chunk in zip(chunks, chunks[1:])
+        ]
+    )
+    span = speech_duration[-1] / (2 * num_regions)
+
+    splits = set()
+    for region in range(1, num_regions):
+        target = speech_duration[-1] * region / num_regions
+        candidates = [
+            i
+            for i in np.flatnonzero(np.abs(speech_before_gaps - target) <= span)
+            if i not in splits
+        ]
+        if candidates:
+            splits.add(max(candidates, key=lambda i: gaps[i]))
+
+    bounds = [0] + sorted(int(i) + 1 for i in splits) + [len(chunks)]
+    return [chunks[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
 class SpeechTimestampsMap:
     """Helper class to restore original speech timestamps."""
 
     def __init__(self, chunks: List[dict], sampling_rate: int, time_precision: int = 2):
         self.sampling_rate = sampling_rate
         self.time_precision = time_precision
-        self.chunk_end_sample = []
-        self.total_silence_before = []
 
-        previous_end = 0
-        silent_samples = 0
+        starts = np.array([chunk["start"] for chunk in chunks], dtype=np.int64)
+        ends = np.array([chunk["end"] for chunk in chunks], dtype=np.int64)
+        previous_ends = np.concatenate(([0], ends[:-1]))
+        silent_samples = np.cumsum(starts - previous_ends)
 
-        for chunk in chunks:
-            silent_samples += chunk["start"] - previous_end
-            previous_end = chunk["end"]
-
-            self.chunk_end_sample.append(chunk["end"] - silent_samples)
-            self.total_silence_before.append(silent_samples / sampling_rate)
+        self.chunk_end_sample = ends - silent_samples
+        self.total_silence_before = silent_samples / sampling_rate
 
     def get_original_time(
         self,
@@ -305,24 +366,51 @@ class SpeechTimestampsMap:
         if chunk_index is None:
             chunk_index = self.get_chunk_index(time, is_end)
 
-        total_silence_before = self.total_silence_before[chunk_index]
+        total_silence_before = float(self.total_silence_before[chunk_index])
         return round(total_silence_before + time, self.time_precision)
 
     def get_chunk_index(self, time: float, is_end: bool = False) -> int:
-        sample = int(time * self.sampling_rate)
-        if sample in self.chunk_end_sample and is_end:
-            return self.chunk_end_sample.index(sample)
+        return int(self.get_chunk_indices(np.array([time]), is_end)[0])
 
-        return min(
-            bisect.bisect(self.chunk_end_sample, sample),
-            len(self.chunk_end_sample) - 1,
+    def get_original_times(
+        self,
+        times: np.ndarray,
+        chunk_indices: Optional[np.ndarray] = None,
+        is_end: bool = False,
+    ) -> List[float]:
+        """Vectorized version of `get_original_time` for an array of times."""
+        times = np.asarray(times, dtype=np.float64)
+        if chunk_indices is None:
+            chunk_indices = self.get_chunk_indices(times, is_end)
+
+        original_times = self.total_silence_before[chunk_indices] + times
+        # np.round is not correctly rounded for decimals, keep the builtin semantics.
+        return [round(time, self.time_precision) for time in original_times.tolist()]
+
+    def get_chunk_indices(self, times: np.ndarray, is_end: bool = False) -> np.ndarray:
+        """Vectorized version of `get_chunk_index` for an array of times."""
+        samples = (np.asarray(times, dtype=np.float64) * self.sampling_rate).astype(
+            np.int64
         )
+        last_index = len(self.chunk_end_sample) - 1
+        indices = np.minimum(
+            np.searchsorted(self.chunk_end_sample, samples, side="right"), last_index
+        )
+
+        if is_end:
+            # A time falling exactly on a chunk end belongs to that chunk.
+            left = np.searchsorted(self.chunk_end_sample, samples, side="left")
+            on_end = self.chunk_end_sample[np.minimum(left, last_index)] == samples
+            indices = np.where(on_end, left, indices)
+
+        return indices
 
 
 @functools.lru_cache
-def get_vad_model():
+def get_vad_model(quantized: bool = False):
     """Returns the VAD model instance."""
-    path = os.path.join(get_assets_path(), "silero_vad_v6.onnx")
+    filename = "silero_vad_v6_int8.onnx" if quantized else "silero_vad_v6.onnx"
+    path = os.path.join(get_assets_path(), filename)
     return SileroVADModel(path)
 
 
@@ -348,12 +436,17 @@ class SileroVADModel:
         )
 
     def __call__(
-        self, audio: np.ndarray, num_samples: int = 512, context_size_samples: int = 64
+        self,
+        audio: np.ndarray,
+        num_samples: int = 512,
+        context_size_samples: int = 64,
+        window_stride: int = 1,
     ):
         assert audio.ndim == 1, "Input should be a 1D array"
         assert (
             audio.shape[0] % num_samples == 0
         ), "Input size should be a multiple of num_samples"
+        assert window_stride >= 1, "window_stride should be a positive integer"
 
         h = np.zeros((1, 1, 128), dtype="float32")
         c = np.zeros((1, 1, 128), dtype="float32")
@@ -369,6 +462,9 @@ class SileroVADModel:
         batched_audio = np.concatenate([context, batched_audio], 1)
 
         batched_audio = batched_audio.reshape(-1, num_samples + context_size_samples)
+        num_windows = batched_audio.shape[0]
+        if window_stride > 1:
+            batched_audio = batched_audio[::window_stride]
 
         encoder_batch_size = 10000
         num_segments = batched_audio.shape[0]
@@ -382,4 +478,7 @@ class SileroVADModel:
 
         out = np.concatenate(outputs, axis=0)
 
+        if window_stride > 1:
+            out = np.repeat(out, window_stride, axis=0)[:num_windows]
+
         return out
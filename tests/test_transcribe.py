@@ -1,9 +1,37 @@
+import asyncio
 import inspect
+import itertools
 import os
+import threading
 
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
-from faster_whisper import BatchedInferencePipeline, WhisperModel, decode_audio
+import numpy as np
+import pytest
+
+from faster_whisper import (
+    BatchedInferencePipeline,
+    CascadePipeline,
+    StreamingTranscriber,
+    WhisperModel,
+    decode_audio,
+)
+from faster_whisper.audio import time_stretch
+from faster_whisper.transcribe import (
+    Segment,
+    Word,
+    get_leading_chunks,
+    get_speech_duration,
+    restore_speech_timestamps,
+)
+from faster_whisper.utils import get_memory_usage
+from faster_whisper.vad import (
+    SpeechTimestampsMap,
+    VadOptions,
+    get_clip_timestamps,
+    get_speech_timestamps,
+    split_speech_chunks,
+)
 
 
 def test_supported_languages():
@@ -59,6 +87,325 @@ def test_transcribe(jfk_path):
     )
 
 
+def test_performance_options(data_dir, jfk_path):
+    # These options only change how the work is scheduled, not the segments.
+    model = WhisperModel("tiny", num_workers=2)
+    jfk = decode_audio(jfk_path)
+    cases = [
+        (
+            os.path.join(data_dir, "multilingual.mp3"),
+            dict(language="en", without_timestamps=True, temperature=0.0),
+            dict(speculative_encoding=True),
+            lambda windows: [window.encoder_prefetched for window in windows]
+            == [False, True],
+        ),
+        (
+            jfk_path,
+            dict(language="en"),
+            dict(batched_fallback=2),
+            lambda windows: [window.temperature for window in windows] == [0.0],
+        ),
+        (
+            np.concatenate([jfk, jfk, jfk]),
+            dict(clip_timestamps="0,11,11,22,22,33", clip_encode_batch_size=1),
+            dict(clip_encode_batch_size=8),
+            lambda windows: sum(window.encoder_batched for window in windows) == 3,
+        ),
+    ]
+
+    for audio, kwargs, options, check_windows in cases:
+        segments, _ = model.transcribe(audio, **kwargs)
+        reference = [(segment.start, segment.end, segment.text) for segment in segments]
+
+        segments, info = model.transcribe(audio, **{**kwargs, **options})
+        assert [
+            (segment.start, segment.end, segment.text) for segment in segments
+        ] == reference
+        assert check_windows(info.windows)
+
+
+def test_speculative_encoding(data_dir):
+    model = WhisperModel("tiny", num_workers=2)
+    audio = decode_audio(os.path.join(data_dir, "multilingual.mp3"))
+
+    # Stopping the iteration early shuts down the encoding thread.
+    segments, _ = model.transcribe(audio, language="en", speculative_encoding=True)
+    next(segments)
+    segments.close()
+    for thread in threading.enumerate():
+        if thread.name.startswith("faster_whisper_encode"):
+            thread.join(timeout=10)
+            assert not thread.is_alive()
+
+
+def test_batched_fallback(jfk_path):
+    model = WhisperModel("tiny")
+
+    class GenerateCounter:
+        def __init__(self, model):
+            self.model = model
+            self.asynchronous_calls = 0
+
+        def generate(self, *args, **kwargs):
+            if kwargs.get("asynchronous"):
+                self.asynchronous_calls += 1
+            return self.model.generate(*args, **kwargs)
+
+        def __getattr__(self, name):
+            return getattr(self.model, name)
+
+    model.model = GenerateCounter(model.model)
+
+    segments, info = model.transcribe(jfk_path, language="en", batched_fallback=2)
+    list(segments)
+    assert [window.temperature for window in info.windows] == [0.0]
+
+    # The single worker is busy with the first temperature and no window fell back
+    # before, so no fallback is decoded ahead.
+    assert model.model.asynchronous_calls == 0
+
+
+def test_adaptive_beam_search(jfk_path):
+    model = WhisperModel("tiny")
+    pipeline = BatchedInferencePipeline(model=model)
+
+    for transcriber in (model, pipeline):
+        kwargs = dict(
+            language="en",
+            temperature=0.0,
+            log_prob_threshold=None,
+            compression_ratio_threshold=None,
+        )
+
+        def transcribe(**options):
+            segments, info = transcriber.transcribe(jfk_path, **kwargs, **options)
+            return [segment.text for segment in segments], info.windows
+
+        greedy, _ = transcribe(beam_size=1)
+        beam, _ = transcribe(beam_size=5)
+
+        # The greedy result is always accepted.
+        texts, windows = transcribe(
+            adaptive_beam=True,
+            adaptive_beam_log_prob_threshold=None,
+            adaptive_beam_compression_ratio_threshold=None,
+        )
+        assert texts == greedy
+        assert [window.beam_search for window in windows] == [False] * len(windows)
+
+        # The greedy result is never accepted, the windows are decoded with the beam.
+        texts, windows = transcribe(
+            adaptive_beam=True, adaptive_beam_log_prob_threshold=0.0
+        )
+        assert texts == beam
+        assert [window.beam_search for window in windows] == [True] * len(windows)
+
+
+def test_get_speech_duration():
+    features = np.full((80, 3000), -0.5, dtype=np.float32)
+    features[:, 1000:1500] = 1.0
+
+    assert get_speech_duration(features, 0.01) == 5.0
+    assert get_speech_duration(features[:, :1000], 0.01) == 10.0
+    assert get_speech_duration(features[:, :0], 0.01) == 0.0
+
+
+def test_max_new_tokens_per_second(jfk_path):
+    model = WhisperModel("tiny")
+    pipeline = BatchedInferencePipeline(model=model)
+    kwargs = dict(language="en", temperature=0.0)
+
+    for transcriber in (model, pipeline):
+        # The cap is higher than the maximum length.
+        segments, info = transcriber.transcribe(
+            jfk_path, max_new_tokens_per_second=100, **kwargs
+        )
+        assert list(segments)
+        assert all(window.capped_decodings == 0 for window in info.windows)
+
+        # The cap is reached and triggers a fallback.
+        segments, info = transcriber.transcribe(
+            jfk_path, max_new_tokens_per_second=0.5, **kwargs
+        )
+        segments = list(segments)
+        for window in info.windows:
+            assert 0 < window.speech_duration <= 30
+            assert window.max_new_tokens == np.ceil(window.speech_duration * 0.5)
+            assert window.capped_decodings == 1
+        for segment in segments:
+            assert len(segment.tokens) <= info.windows[0].max_new_tokens
+
+
+def test_time_stretch():
+    sampling_rate = 16000
+    tone = np.sin(2 * np.pi * 440 * np.arange(2 * sampling_rate) / sampling_rate)
+    tone = tone.astype(np.float32)
+
+    for rate in (0.8, 1.25, 1.5):
+        stretched = time_stretch(tone, rate)
+        assert stretched.dtype == np.float32
+        assert stretched.shape[0] == round(tone.shape[0] / rate)
+
+        # The pitch is preserved.
+        spectrum = np.abs(np.fft.rfft(stretched[4000:20000]))
+        assert np.argmax(spectrum) * sampling_rate / 16000 == 440
+
+    assert time_stretch(tone, 1.0) is tone
+
+
+def test_time_scale(jfk_path):
+    model = WhisperModel("tiny")
+    pipeline = BatchedInferencePipeline(model=model)
+
+    for transcriber in (model, pipeline):
+        segments, info = transcriber.transcribe(
+            jfk_path, time_scale=1.25, word_timestamps=True
+        )
+        segments = list(segments)
+        assert segments
+        assert info.windows[0].duration <= 11 / 1.25 + 0.02
+
+        # The timestamps are relative to the original audio.
+        assert segments[-1].end > 11 / 1.25
+        for segment in segments:
+            assert 0 <= segment.start <= segment.end <= info.duration + 0.5
+            assert segment.start == round(segment.start, 3)
+            assert segment.end == round(segment.end, 3)
+            for word in segment.words:
+                assert segment.start <= word.start <= word.end <= segment.end
+                assert word.start == round(word.start, 2)
+                assert word.end == round(word.end, 2)
+
+
+def test_dynamic_batching(data_dir, jfk_path):
+    jfk = decode_audio(jfk_path)
+    long_jfk = np.concatenate([jfk, np.zeros(16000, dtype=np.float32)] * 6)
+    # The streams differ in their initial prompt and in the length of their previous
+    # text over several windows, so their prompts have different lengths.
+    streams = [
+        (jfk_path, None),
+        (os.path.join(data_dir, "multilingual.mp3"), None),
+        (long_jfk, None),
+        (long_jfk, "Hello there my friends."),
+        (jfk_path, "Hello there my friends."),
+    ]
+    kwargs = dict(language="en", temperature=0.0, condition_on_previous_text=True)
+
+    model = WhisperModel("tiny")
+    references = []
+    for audio, initial_prompt in streams:
+        segments, _ = model.transcribe(audio, initial_prompt=initial_prompt, **kwargs)
+        references.append([segment.text for segment in segments])
+
+    model = WhisperModel("tiny", dynamic_batch_size=4, dynamic_batch_max_wait=0.5)
+
+    def transcribe(stream):
+        audio, initial_prompt = stream
+        segments, _ = model.transcribe(audio, initial_prompt=initial_prompt, **kwargs)
+        return [segment.text for segment in segments]
+
+    with ThreadPoolExecutor(max_workers=len(streams)) as executor:
+        results = list(executor.map(transcribe, streams))
+
+    assert results == references
+
+
+def test_transcribe_async(jfk_path):
+    model = WhisperModel("tiny")
+    pipeline = BatchedInferencePipeline(model)
+
+    async def transcribe(transcriber):
+        segments, info = await transcriber.transcribe_async(jfk_path, language="en")
+        return [segment.text async for segment in segments], info
+
+    for transcriber in (model, pipeline):
+        texts, info = asyncio.run(transcribe(transcriber))
+        segments, _ = transcriber.transcribe(jfk_path, language="en")
+        assert texts == [segment.text for segment in segments]
+        assert info.language == "en"
+
+    audio = np.concatenate([decode_audio(jfk_path)] * 6)
+
+    async def transcribe_with_stalled_consumer():
+        # The consumer of the first transcription stops iterating while its producer is
+        # blocked: the single worker of the model must still serve the second one.
+        stalled, _ = await model.transcribe_async(
+            audio, language="en", max_pending_segments=1
+        )
+        await stalled.__anext__()
+        texts, _ = await asyncio.wait_for(transcribe(model), timeout=120)
+        await stalled.aclose()
+        return texts
+
+    texts = asyncio.run(transcribe_with_stalled_consumer())
+    segments, _ = model.transcribe(jfk_path, language="en")
+    assert texts == [segment.text for segment in segments]
+
+
+def test_streaming_transcriber(jfk_path):
+    model = WhisperModel("tiny")
+    audio = decode_audio(jfk_path)
+    streamer = StreamingTranscriber(model, min_chunk_duration=1.0, language="en")
+
+    stable = []
+    num_pushes = 0
+    for i in range(0, audio.shape[0], 8000):
+        update = streamer.push(audio[i : i + 8000])
+        num_pushes += 1
+        stable.extend(update.stable)
+        for segment in update.provisional:
+            assert segment.start >= (stable[-1].end if stable else 0) - 0.1
+    update = streamer.flush()
+    assert update.provisional == []
+    stable.extend(update.stable)
+
+    assert [segment.id for segment in stable] == list(range(1, len(stable) + 1))
+    for previous, segment in zip(stable, stable[1:]):
+        assert segment.start >= previous.end - 0.1
+    assert stable[-1].end <= 11.1
+
+    text = "".join(segment.text for segment in stable).lower()
+    assert "what your country can do for you" in text
+
+    metrics = streamer.metrics
+    assert metrics.audio_duration == pytest.approx(audio.shape[0] / 16000)
+    assert num_pushes // 2 <= metrics.num_decodes <= num_pushes // 2 + 2
+    assert len(metrics.latencies) == len(stable)
+    assert metrics.real_time_factor > 0
+    # Re-running transcribe on the growing stream would decode every pushed prefix.
+    assert metrics.decoded_duration < sum(
+        (i + 1) * 1.0 for i in range(metrics.num_decodes)
+    )
+
+
+def test_cascade_pipeline(data_dir):
+    audio_path = os.path.join(data_dir, "multilingual.mp3")
+    kwargs = dict(language="en", temperature=0.0)
+    model = WhisperModel("tiny")
+
+    segments, _ = model.transcribe(audio_path, **kwargs)
+    reference = [segment.text for segment in segments]
+
+    # No window is escalated, the draft segments are returned.
+    pipeline = CascadePipeline(model, model, None, None, None)
+    segments, info = pipeline.transcribe(audio_path, **kwargs)
+    assert [segment.text for segment in segments] == reference
+    assert not any(window.escalated for window in info.windows)
+
+    # Every window is decoded again by the main model.
+    pipeline = CascadePipeline(model, model, log_prob_threshold=0.0)
+    segments, info = pipeline.transcribe(audio_path, word_timestamps=True, **kwargs)
+    segments = list(segments)
+    assert len(info.windows) > 1
+    assert all(window.escalated for window in info.windows)
+    assert [segment.id for segment in segments] == list(range(1, len(segments) + 1))
+
+    # The segments of a window stay in the audio consumed by the draft model.
+    for segment in segments:
+        window = [w for w in info.windows if w.seek <= segment.seek][-1]
+        assert segment.start >= window.start
+
+
 def test_batched_transcribe(physcisworks_path):
     model = WhisperModel("tiny")
     batched_model = BatchedInferencePipeline(model=model)
@@ -88,6 +435,227 @@ def test_batched_transcribe(physcisworks_path):
     assert len(segments) > 7
 
 
+def test_batched_temperature_fallback(jfk_path):
+    model = WhisperModel("tiny")
+    pipeline = BatchedInferencePipeline(model=model)
+
+    segments, _ = pipeline.transcribe(jfk_path, temperature=0.0)
+    reference = list(segments)
+
+    # The chunk already passes the thresholds with the first temperature.
+    segments, _ = pipeline.transcribe(jfk_path)
+    assert [segment.text for segment in segments] == [
+        segment.text for segment in reference
+    ]
+
+    # With an unreachable log prob threshold, the chunk is decoded with every temperature
+    # and the result with the highest average log probability is kept.
+    segments, _ = pipeline.transcribe(jfk_path, log_prob_threshold=0.0)
+    segments = list(segments)
+    assert segments
+    assert segments[0].avg_logprob >= reference[0].avg_logprob
+
+
+def test_transcribe_many(jfk_path):
+    model = WhisperModel("tiny")
+    pipeline = BatchedInferencePipeline(model)
+    audio = decode_audio(jfk_path)
+    silence = np.zeros(2 * 16000, dtype=np.float32)
+    inputs = [
+        jfk_path,
+        audio[: 5 * 16000],
+        silence,
+        np.concatenate([audio, silence, audio, silence, audio, silence, audio]),
+        audio,
+    ]
+
+    results = list(pipeline.transcribe_many(inputs, batch_size=4, word_timestamps=True))
+    assert len(results) == len(inputs)
+
+    for audio_input, (segments, info) in zip(inputs, results):
+        reference, reference_info = pipeline.transcribe(
+            audio_input, batch_size=4, word_timestamps=True
+        )
+        reference = list(reference)
+
+        assert [segment.id for segment in segments] == list(range(1, len(segments) + 1))
+        assert [
+            (segment.start, segment.end, segment.text, segment.words)
+            for segment in segments
+        ] == [
+            (segment.start, segment.end, segment.text, segment.words)
+            for segment in reference
+        ]
+        assert info.duration == reference_info.duration
+        assert len(info.windows) == len(reference_info.windows)
+
+
+def test_prefetch_batches(jfk_path):
+    model = WhisperModel("tiny")
+    pipeline = BatchedInferencePipeline(model)
+    audio = decode_audio(jfk_path)
+    silence = np.zeros(2 * 16000, dtype=np.float32)
+    audio = np.concatenate([audio, silence, audio, silence, audio, silence, audio])
+
+    def transcribe(prefetch_batches):
+        segments, info = pipeline.transcribe(
+            audio,
+            batch_size=2,
+            word_timestamps=True,
+            prefetch_batches=prefetch_batches,
+        )
+        return [
+            (segment.id, segment.start, segment.end, segment.text, segment.words)
+            for segment in segments
+        ], len(info.windows)
+
+    expected = transcribe(prefetch_batches=0)
+    assert transcribe(prefetch_batches=2) == expected
+
+    inputs = [audio, silence, jfk_path]
+    assert [
+        [(segment.start, segment.end, segment.text) for segment in segments]
+        for segments, _ in pipeline.transcribe_many(inputs, batch_size=2)
+    ] == [
+        [(segment.start, segment.end, segment.text) for segment in segments]
+        for segments, _ in pipeline.transcribe_many(
+            inputs, batch_size=2, prefetch_batches=2
+        )
+    ]
+
+
+def test_batched_concurrent_transcriptions(jfk_path):
+    model = WhisperModel("tiny", num_workers=4)
+    pipeline = BatchedInferencePipeline(model)
+    audio = decode_audio(jfk_path)
+    silence = np.zeros(16000, dtype=np.float32)
+    inputs = [
+        audio,
+        np.concatenate([audio[5 * 16000 :], silence, audio]),
+        np.concatenate([audio, silence, audio[: 5 * 16000]]),
+        audio[: 8 * 16000],
+    ]
+
+    def transcribe(audio):
+        segments, info = pipeline.transcribe(audio, batch_size=1, word_timestamps=True)
+        return [
+            (segment.id, segment.start, segment.end, segment.text, segment.words)
+            for segment in segments
+        ], [(window.start, window.duration) for window in info.windows]
+
+    expected = [transcribe(audio) for audio in inputs]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in range(3):
+            assert list(executor.map(transcribe, inputs * 2)) == expected * 2
+
+    # Interleave the generators of two transcriptions in the same thread.
+    first, _ = pipeline.transcribe(inputs[1], batch_size=1, word_timestamps=True)
+    second, _ = pipeline.transcribe(inputs[2], batch_size=1, word_timestamps=True)
+    interleaved = ([], [])
+    for first_segment, second_segment in itertools.zip_longest(first, second):
+        for segments, segment in zip(interleaved, (first_segment, second_segment)):
+            if segment is not None:
+                segments.append(
+                    (
+                        segment.id,
+                        segment.start,
+                        segment.end,
+                        segment.text,
+                        segment.words,
+                    )
+                )
+    assert list(interleaved) == [expected[1][0], expected[2][0]]
+
+
+def test_auto_batch_size(jfk_path):
+    model = WhisperModel("tiny")
+    audio = decode_audio(jfk_path)
+    silence = np.zeros(16000, dtype=np.float32)
+    audio = np.concatenate([audio, silence] * 6)
+
+    def transcribe(pipeline, batch_size):
+        segments, _ = pipeline.transcribe(
+            audio, batch_size=batch_size, word_timestamps=True
+        )
+        return [(segment.start, segment.end, segment.text) for segment in segments]
+
+    pipeline = BatchedInferencePipeline(model)
+    expected = transcribe(pipeline, batch_size=8)
+    assert transcribe(pipeline, batch_size="auto") == expected
+
+    tuner = pipeline.batch_size_tuner
+    ((key, _),) = {
+        key_stage for key_stage in tuner.measures if key_stage[1] == "decode"
+    }
+    sizes = [rows for rows, _, _ in tuner.measures[key, "decode"]]
+    assert sizes[:2] == [1, 2]
+    assert all(size <= 2 * previous for previous, size in zip(sizes, sizes[1:]))
+    assert len(tuner.measures[key, "segment"]) == len(sizes)
+
+    # Another beam size changes the cost of a row and is calibrated again.
+    segments, _ = pipeline.transcribe(audio, batch_size="auto", beam_size=1)
+    list(segments)
+    assert len({key for key, _ in tuner.measures}) == 2
+
+    with pytest.raises(ValueError):
+        pipeline.transcribe(audio, batch_size="max")
+    with pytest.raises(ValueError):
+        pipeline.transcribe(audio, batch_size="auto", prefetch_batches=2)
+
+    if get_memory_usage() is not None:
+        # The batches exceeding the budget are halved down to a single chunk.
+        pipeline = BatchedInferencePipeline(model, memory_budget=1)
+        assert transcribe(pipeline, batch_size="auto") == expected
+        tuner = pipeline.batch_size_tuner
+        assert all(
+            rows == 1 for measures in tuner.measures.values() for rows, _, _ in measures
+        )
+
+
+def test_transcribe_clips(jfk_path):
+    model = WhisperModel("tiny")
+    pipeline = BatchedInferencePipeline(model=model)
+    audio = decode_audio(jfk_path)
+    clips = [audio[i * 32000 : (i + 1) * 32000] for i in range(5)]
+
+    for max_clips_per_window in (None, 1):
+        results = pipeline.transcribe_clips(
+            clips,
+            max_clips_per_window=max_clips_per_window,
+            language="en",
+            word_timestamps=True,
+        )
+        assert len(results) == len(clips)
+        assert any(results)
+
+        # The timestamps are relative to the start of each clip.
+        for clip, segments in zip(clips, results):
+            assert [segment.id for segment in segments] == list(
+                range(1, len(segments) + 1)
+            )
+            for segment in segments:
+                assert 0 <= segment.start <= segment.end <= clip.shape[0] / 16000
+                for word in segment.words:
+                    assert 0 <= word.start <= word.end <= clip.shape[0] / 16000
+
+    # Each clip gets the text of its own transcription, without word timestamps.
+    def normalize(segments):
+        text = "".join(segment.text for segment in segments).lower()
+        return "".join(c for c in text if c.isalpha() or c == " ").split()
+
+    segments, _ = pipeline.transcribe(audio, language="en")
+    reference = normalize(segments)
+    results = pipeline.transcribe_clips([audio] * 3, language="en")
+    for segments in results:
+        assert normalize(segments) == reference
+        assert all(segment.words is None for segment in segments)
+
+    assert pipeline.transcribe_clips([]) == []
+    with pytest.raises(ValueError):
+        pipeline.transcribe_clips([audio, np.zeros(31 * 16000, dtype=np.float32)])
+
+
 def test_empty_audio():
     audio = np.asarray([], dtype="float32")
     model = WhisperModel("tiny")
@@ -139,6 +707,180 @@ def test_vad(jfk_path):
     assert info.vad_options.speech_pad_ms == 200
 
 
+def test_vad_seek_mode(jfk_path):
+    model = WhisperModel("tiny")
+    segments, info = model.transcribe(
+        jfk_path,
+        vad_filter=True,
+        vad_parameters=dict(min_silence_duration_ms=500, speech_pad_ms=200),
+        vad_mode="seek",
+    )
+    segments = list(segments)
+
+    assert len(segments) == 1
+    segment = segments[0]
+
+    assert segment.text == (
+        " And so my fellow Americans ask not what your country can do for you, "
+        "ask what you can do for your country."
+    )
+
+    assert 0 < segment.start < 1
+    assert 10 < segment.end < 11
+    assert info.duration_after_vad < info.duration
+
+
+def test_vad_variants(jfk_path):
+    audio = decode_audio(jfk_path)
+    reference = get_speech_timestamps(audio, VadOptions())
+
+    for vad_options in [
+        VadOptions(quantized=True),
+        VadOptions(window_stride=2),
+    ]:
+        speech_timestamps = get_speech_timestamps(audio, vad_options)
+        assert len(speech_timestamps) == len(reference)
+        for chunk, reference_chunk in zip(speech_timestamps, reference):
+            assert abs(chunk["start"] - reference_chunk["start"]) <= 1024
+            assert abs(chunk["end"] - reference_chunk["end"]) <= 1024
+
+
+def test_get_clip_timestamps():
+    chunks = [
+        {"start": 16000, "end": 32000},
+        {"start": 48000, "end": 80000},
+        {"start": 640000, "end": 656000},
+    ]
+
+    assert get_clip_timestamps(chunks, 16000, max_duration=30) == [1, 5, 40, 41]
+    assert get_clip_timestamps(chunks, 16000, max_duration=3) == [1, 2, 3, 5, 40, 41]
+    assert get_clip_timestamps([], 16000) == []
+
+
+def test_split_speech_chunks():
+    chunks = [
+        {"start": 0, "end": 16000},
+        {"start": 160000, "end": 176000},
+        {"start": 192000, "end": 208000},
+        {"start": 320000, "end": 336000},
+    ]
+
+    assert split_speech_chunks(chunks, 1) == [chunks]
+    assert split_speech_chunks(chunks, 2) == [chunks[:1], chunks[1:]]
+    assert split_speech_chunks(chunks, 4) == [[chunk] for chunk in chunks]
+    assert split_speech_chunks(chunks[:1], 2) == [chunks[:1]]
+    assert split_speech_chunks([], 2) == [[]]
+
+
+def test_parallel_regions(jfk_path):
+    model = WhisperModel("tiny", num_workers=2)
+    jfk = decode_audio(jfk_path)
+    silence = np.zeros(5 * 16000, dtype=np.float32)
+    audio = np.concatenate([jfk, silence, jfk, silence, jfk])
+
+    for vad_mode in ["concatenate", "seek"]:
+        segments, info = model.transcribe(
+            audio, vad_filter=True, vad_mode=vad_mode, parallel_regions=3
+        )
+        segments = list(segments)
+
+        assert [segment.id for segment in segments] == list(range(1, len(segments) + 1))
+        assert all(
+            segment.start <= next_segment.start
+            for segment, next_segment in zip(segments, segments[1:])
+        )
+        assert all(
+            window.start <= next_window.start
+            for window, next_window in zip(info.windows, info.windows[1:])
+        )
+        text = "".join(segment.text for segment in segments)
+        assert text.count("ask not what your country can do for you") == 3
+        assert any(segment.start > 2 * jfk.shape[0] / 16000 + 5 for segment in segments)
+
+    # Stopping the iteration early stops the regions.
+    segments, _ = model.transcribe(audio, vad_filter=True, parallel_regions=3)
+    next(segments)
+    segments.close()
+    for thread in threading.enumerate():
+        if thread.name.startswith(("faster_whisper_region", "faster_whisper_encode")):
+            thread.join(timeout=30)
+            assert not thread.is_alive()
+
+
+def test_parallel_regions_multilingual(data_dir):
+    model = WhisperModel("tiny", num_workers=2)
+    multilingual = decode_audio(os.path.join(data_dir, "multilingual.mp3"))
+    silence = np.zeros(5 * 16000, dtype=np.float32)
+    audio = np.concatenate([multilingual, silence, multilingual])
+
+    # The regions detect the language of their windows concurrently.
+    segments, info = model.transcribe(
+        audio,
+        multilingual=True,
+        vad_filter=True,
+        vad_mode="seek",
+        parallel_regions=2,
+    )
+    list(segments)
+
+    second_start = (multilingual.shape[0] + silence.shape[0]) / 16000
+    first = [window.language for window in info.windows if window.start < second_start]
+    second = [
+        window.language for window in info.windows if window.start >= second_start
+    ]
+    for languages in (first, second):
+        assert languages[0] == "en"
+        assert languages[-1] == "de"
+
+
+def test_speech_timestamps_map():
+    chunks = [{"start": 16000, "end": 32000}, {"start": 48000, "end": 80000}]
+    ts_map = SpeechTimestampsMap(chunks, 16000)
+
+    assert ts_map.get_chunk_index(0.5) == 0
+    assert ts_map.get_chunk_index(1.0) == 1
+    assert ts_map.get_chunk_index(1.0, is_end=True) == 0
+    assert ts_map.get_chunk_index(10.0) == 1
+    assert ts_map.get_original_time(0.5) == 1.5
+    assert ts_map.get_original_time(1.0, is_end=True) == 2.0
+    assert ts_map.get_original_time(2.5) == 4.5
+    assert ts_map.get_original_times([0.5, 1.0, 2.5]) == [1.5, 3.0, 4.5]
+    assert ts_map.get_original_times([1.0], is_end=True) == [2.0]
+
+
+def test_restore_speech_timestamps():
+    chunks = [{"start": 16000, "end": 32000}, {"start": 48000, "end": 80000}]
+
+    def make_segment(start, end, words):
+        return Segment(
+            id=1,
+            seek=0,
+            start=start,
+            end=end,
+            text="",
+            tokens=[],
+            avg_logprob=0.0,
+            compression_ratio=1.0,
+            no_speech_prob=0.0,
+            words=words,
+            temperature=0.0,
+        )
+
+    segments = [
+        make_segment(0.2, 1.0, None),
+        make_segment(
+            0.5,
+            2.5,
+            [Word(0.5, 0.9, " hello", 0.9), Word(1.2, 2.5, " world", 0.9)],
+        ),
+    ]
+    segments = list(restore_speech_timestamps(segments, chunks, 16000))
+
+    assert (segments[0].start, segments[0].end) == (1.2, 2.0)
+    assert [(w.start, w.end) for w in segments[1].words] == [(1.5, 1.9), (3.2, 4.5)]
+    assert (segments[1].start, segments[1].end) == (1.5, 4.5)
+
+
 def test_stereo_diarization(data_dir):
     model = WhisperModel("tiny")
 
@@ -214,6 +956,128 @@ def test_multilingual_transcription(data_dir):
     )
 
 
+def test_multilingual_language_lock(data_dir):
+    model = WhisperModel("tiny")
+    audio = decode_audio(os.path.join(data_dir, "multilingual.mp3"))
+    kwargs = dict(
+        multilingual=True,
+        without_timestamps=True,
+        condition_on_previous_text=False,
+        language_lock_windows=1,
+    )
+
+    # The language is locked after the first window.
+    segments, info = model.transcribe(audio, **kwargs)
+    segments = list(segments)
+    assert len(info.windows) == 2
+    assert info.windows[0].language == "en"
+    assert info.windows[0].language_probability is not None
+    assert info.windows[1].language == "en"
+    assert info.windows[1].language_probability is None
+
+    # The locked language is checked again on every window.
+    segments, info = model.transcribe(audio, language_lock_interval=1, **kwargs)
+    segments = list(segments)
+    assert [window.language for window in info.windows] == ["en", "de"]
+    assert all(window.language_probability is not None for window in info.windows)
+
+
+def test_multitask_transcription(data_dir):
+    model = WhisperModel("tiny")
+    pipeline = BatchedInferencePipeline(model)
+    audio = decode_audio(os.path.join(data_dir, "multilingual.mp3"))
+
+    streams, info = pipeline.transcribe(
+        audio, task=("transcribe", "translate"), temperature=0.0
+    )
+    streams = {task: list(segments) for task, segments in streams.items()}
+
+    for task in ("transcribe", "translate"):
+        segments, _ = pipeline.transcribe(audio, task=task, temperature=0.0)
+        segments = list(segments)
+        assert [segment.text for segment in streams[task]] == [
+            segment.text for segment in segments
+        ]
+        assert [segment.start for segment in streams[task]] == [
+            segment.start for segment in segments
+        ]
+
+
+def test_language_detection_encoder_output_reuse(data_dir):
+    model = WhisperModel("tiny")
+
+    encode = model.encode
+    num_encodes = 0
+
+    def counting_encode(features):
+        nonlocal num_encodes
+        num_encodes += 1
+        return encode(features)
+
+    model.encode = counting_encode
+
+    # The audio of jfk.flac is shorter than a window.
+    for audio_file, clip_timestamps in (
+        ("multilingual.mp3", "0"),
+        ("multilingual.mp3", "5"),
+        ("jfk.flac", "0"),
+    ):
+        audio = decode_audio(os.path.join(data_dir, audio_file))
+        num_encodes = 0
+        segments, info = model.transcribe(audio, clip_timestamps=clip_timestamps)
+        texts = [segment.text for segment in segments]
+        detection_num_encodes = num_encodes
+
+        num_encodes = 0
+        segments, _ = model.transcribe(
+            audio, language=info.language, clip_timestamps=clip_timestamps
+        )
+        assert [segment.text for segment in segments] == texts
+
+        # The window encoded for the language detection is not encoded again.
+        assert detection_num_encodes == num_encodes
+
+
+def test_language_detection_model(jfk_path):
+    model = WhisperModel("base")
+    language_detection_model = WhisperModel("tiny")
+    audio = decode_audio(jfk_path)
+
+    # The auxiliary model is confident, the main model is not used.
+    assert model.detect_language(
+        audio, language_detection_model=language_detection_model
+    ) == language_detection_model.detect_language(audio)
+
+    # The auxiliary model never reaches the threshold, the main model is used.
+    assert model.detect_language(
+        audio,
+        language_detection_threshold=1.0,
+        language_detection_model=language_detection_model,
+    ) == model.detect_language(audio, language_detection_threshold=1.0)
+
+    segments, info = model.transcribe(
+        jfk_path, language_detection_model=language_detection_model
+    )
+    assert info.language == "en"
+
+    # A model loaded from a size uses the loading options of the main model.
+    model = WhisperModel("base", compute_type="int8")
+    assert model.detect_language(audio, language_detection_model="tiny")[0] == "en"
+    language_detection_model = model._language_detection_models["tiny"]
+    assert language_detection_model.model.compute_type.startswith("int8")
+    assert model._get_language_detection_model("tiny") is language_detection_model
+
+
+def test_get_leading_chunks():
+    features = [np.zeros((80, size), dtype=np.float32) for size in (1000, 2500, 700)]
+
+    assert get_leading_chunks(features, 0) == []
+    assert len(get_leading_chunks(features, 1000)) == 1
+    assert len(get_leading_chunks(features, 3000)) == 2
+    assert len(get_leading_chunks(features, 6000)) == 3
+    assert get_leading_chunks([], 3000) == []
+
+
 def test_hotwords(data_dir):
     model = WhisperModel("tiny")
     pipeline = BatchedInferencePipeline(model)
@@ -240,10 +1104,36 @@ def test_transcribe_signature():
         inspect.getargs(BatchedInferencePipeline.transcribe.__code__).args
     )
     pipeline_transcribe_args.remove("batch_size")
+    pipeline_transcribe_args.remove("prefetch_batches")
 
     assert model_transcribe_args == pipeline_transcribe_args
 
 
+def test_batched_unsupported_arguments(jfk_path):
+    pipeline = BatchedInferencePipeline(model=WhisperModel("tiny"))
+
+    for kwargs in [
+        {"vad_mode": "seek"},
+        {"speculative_encoding": True},
+        {"batched_fallback": 2},
+        {"clip_encode_batch_size": 4},
+        {"parallel_regions": 2},
+    ]:
+        with pytest.raises(ValueError):
+            pipeline.transcribe(jfk_path, **kwargs)
+        # The errors are raised at the call, before iterating over the results.
+        with pytest.raises(ValueError):
+            pipeline.transcribe_many([jfk_path], **kwargs)
+
+    for kwargs in [
+        {"batch_size": "max"},
+        {"batch_size": "auto", "prefetch_batches": 2},
+        {"task": ("transcribe", "translate")},
+    ]:
+        with pytest.raises(ValueError):
+            pipeline.transcribe_many([jfk_path], **kwargs)
+
+
 def test_monotonic_timestamps(physcisworks_path):
     model = WhisperModel("base")
     pipeline = BatchedInferencePipeline(model=model)
@@ -1,6 +1,18 @@
+import asyncio
 import os
+import threading
+import time
+
+import numpy as np
+import pytest
 
 from faster_whisper import available_models, download_model
+from faster_whisper.utils import (
+    PeakMemoryMonitor,
+    get_memory_usage,
+    iterate_in_executor,
+    iterate_in_thread,
+)
 
 
 def test_available_models():
@@ -27,3 +39,159 @@ def test_download_model_in_cache(tmpdir):
     cache_dir = str(tmpdir.join("model"))
     download_model("tiny", cache_dir=cache_dir)
     assert os.path.isdir(cache_dir)
+
+
+def test_iterate_in_executor():
+    produced = []
+
+    def generate():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    async def consume():
+        items = []
+        async for item in iterate_in_executor(generate(), max_pending_items=2):
+            # The producer never runs more than max_pending_items ahead.
+            assert len(produced) - len(items) <= 2
+            items.append(item)
+            await asyncio.sleep(0.01)
+        return items
+
+    assert asyncio.run(consume()) == list(range(10))
+
+
+def test_iterate_in_executor_semaphore():
+    semaphore = threading.Semaphore(1)
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def generate():
+        nonlocal running, max_running
+        for i in range(5):
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+            yield i
+
+    async def consume():
+        return [
+            item async for item in iterate_in_executor(generate(), semaphore=semaphore)
+        ]
+
+    async def consume_all():
+        return await asyncio.gather(consume(), consume(), consume())
+
+    # The items of the concurrent iterators are computed one at a time.
+    assert asyncio.run(consume_all()) == [list(range(5))] * 3
+    assert max_running == 1
+
+
+def test_iterate_in_executor_cancel():
+    closed = threading.Event()
+
+    def generate():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    async def consume():
+        async for item in iterate_in_executor(generate(), max_pending_items=1):
+            if item == 3:
+                raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(consume())
+    assert closed.wait(timeout=5)
+
+
+def test_iterate_in_executor_error():
+    def generate():
+        yield 0
+        raise ValueError("decoding error")
+
+    async def consume():
+        return [item async for item in iterate_in_executor(generate())]
+
+    with pytest.raises(ValueError, match="decoding error"):
+        asyncio.run(consume())
+
+
+def test_iterate_in_thread():
+    produced = []
+    threads = set()
+
+    def generate():
+        for i in range(10):
+            produced.append(i)
+            threads.add(threading.get_ident())
+            yield i
+
+    items = []
+    for item in iterate_in_thread(generate(), max_pending_items=2):
+        # The producer never runs more than max_pending_items ahead.
+        assert len(produced) - len(items) <= 3
+        items.append(item)
+        time.sleep(0.01)
+
+    assert items == list(range(10))
+    # The items are produced by a single background thread.
+    assert len(threads) == 1
+    assert threading.get_ident() not in threads
+
+
+def test_iterate_in_thread_close():
+    closed = threading.Event()
+
+    def generate():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    items = iterate_in_thread(generate())
+    assert next(items) == 0
+    items.close()
+    assert closed.wait(timeout=5)
+
+
+def test_iterate_in_thread_error():
+    def generate():
+        yield 0
+        raise ValueError("decoding error")
+
+    with pytest.raises(ValueError, match="decoding error"):
+        list(iterate_in_thread(generate()))
+
+
+@pytest.mark.skipif(
+    get_memory_usage() is None, reason="The memory usage is only known on Linux"
+)
+def test_peak_memory_monitor():
+    with PeakMemoryMonitor() as monitor:
+        array = np.ones(64 * 1024 * 1024 // 8)
+        time.sleep(0.05)
+        del array
+
+    assert monitor.peak_growth >= 32 * 1024 * 1024
+    assert monitor.peak >= get_memory_usage()
+
+    # The growth of overlapping blocks cannot be attributed to either of them.
+    with PeakMemoryMonitor() as outer:
+        with PeakMemoryMonitor() as inner:
+            pass
+
+    assert outer.overlapped and inner.overlapped
+    assert outer.peak_growth is None and inner.peak_growth is None
+    assert outer.peak is not None